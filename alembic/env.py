@@ -1,10 +1,15 @@
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config, pool
+from loguru import logger
+from sqlalchemy import Connection, engine_from_config, pool
 from sqlmodel import SQLModel
 
 from alembic import context
 from repository_infrastructure_example.application.settings import PostgresSettings
+from repository_infrastructure_example.infrastructure.migrations import (
+    MigrationRunner,
+    OnVersionApply,
+)
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -70,12 +75,34 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
 
-    with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+    runner = MigrationRunner(
+        lock_timeout=postgres_settings.migration_lock_timeout,
+        max_attempts=postgres_settings.migration_max_attempts,
+        retry_backoff=postgres_settings.migration_retry_backoff,
+    )
+
+    def migrate(connection: Connection, on_version_apply: OnVersionApply) -> None:
+        # One transaction per revision, so that a retry resumes at the revision
+        # that could not acquire its locks
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
+            on_version_apply=on_version_apply,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
 
+    timings = runner.run(connectable, migrate)
+    if timings:
+        logger.info(
+            f"Applied {len(timings)} revision(s) in "
+            f"{sum(timing.duration for timing in timings):.3f}s, "
+            f"{sum(timing.lock_wait for timing in timings):.3f}s spent waiting "
+            f"for locks."
+        )
+
 
 if context.is_offline_mode():
     run_migrations_offline()
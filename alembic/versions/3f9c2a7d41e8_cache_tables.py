@@ -0,0 +1,65 @@
+"""cache tables
+
+Revision ID: 3f9c2a7d41e8
+Revises: 5508a36b2b3a
+Create Date: 2026-10-19 10:12:37.418562
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9c2a7d41e8"
+down_revision: Union[str, Sequence[str], None] = "5508a36b2b3a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # UNLOGGED tables skip the write-ahead log. They are emptied after a crash
+    # and not replicated, which is fine for a cache.
+    op.create_table(
+        "cache_entries",
+        sa.Column("key", sa.Text(), nullable=False),
+        # NULL for sets, whose members are kept in `cache_set_members`
+        sa.Column("value", sa.LargeBinary(), nullable=True),
+        # NULL for entries that do not expire
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("key"),
+        prefixes=["UNLOGGED"],
+    )
+    # Serves the sweeps of expired entries
+    op.create_index(
+        "ix_cache_entries_expires_at",
+        "cache_entries",
+        ["expires_at"],
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+    # Serves deletions by prefix patterns with LIKE, whatever the collation
+    op.create_index(
+        "ix_cache_entries_key_pattern",
+        "cache_entries",
+        ["key"],
+        postgresql_ops={"key": "text_pattern_ops"},
+    )
+    op.create_table(
+        "cache_set_members",
+        sa.Column("key", sa.Text(), nullable=False),
+        sa.Column("member", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["key"], ["cache_entries.key"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("key", "member"),
+        prefixes=["UNLOGGED"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("cache_set_members")
+    op.drop_index("ix_cache_entries_key_pattern", table_name="cache_entries")
+    op.drop_index("ix_cache_entries_expires_at", table_name="cache_entries")
+    op.drop_table("cache_entries")
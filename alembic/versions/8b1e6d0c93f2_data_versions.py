@@ -0,0 +1,78 @@
+"""data versions
+
+Revision ID: 8b1e6d0c93f2
+Revises: 3f9c2a7d41e8
+Create Date: 2026-10-19 14:03:51.207316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b1e6d0c93f2"
+down_revision: Union[str, Sequence[str], None] = "3f9c2a7d41e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_VERSIONED_TABLES: tuple[str, ...] = ("organisations", "users")
+# Number of rows the version of a table is spread over
+_STRIPE_COUNT: int = 32
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The version of a table is the sum of its stripes. Writers advance the
+    # stripe of their backend, so that concurrent writers to the same table do
+    # not queue up on a single row
+    data_versions = op.create_table(
+        "data_versions",
+        sa.Column("table_name", sa.Text(), nullable=False),
+        sa.Column("stripe", sa.SmallInteger(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("table_name", "stripe"),
+    )
+    op.bulk_insert(
+        data_versions,
+        [
+            {"table_name": table_name, "stripe": stripe, "version": 0}
+            for table_name in _VERSIONED_TABLES
+            for stripe in range(_STRIPE_COUNT)
+        ],
+    )
+
+    # The version is advanced within the writing transaction, so that it only
+    # becomes visible together with the written data. A sequence would not
+    # do, it advances before the data is committed, and a reader could pair
+    # the data from before the write with the version after it
+    op.execute(
+        f"""
+        CREATE FUNCTION advance_data_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE data_versions SET version = version + 1
+            WHERE table_name = TG_TABLE_NAME
+            AND stripe = pg_backend_pid() % {_STRIPE_COUNT};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table_name in _VERSIONED_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table_name}_advance_data_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name}
+            FOR EACH STATEMENT EXECUTE FUNCTION advance_data_version()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in _VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table_name}_advance_data_version ON {table_name}")
+    op.execute("DROP FUNCTION advance_data_version()")
+    op.drop_table("data_versions")
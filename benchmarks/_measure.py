@@ -0,0 +1,59 @@
+import statistics
+import time
+from collections.abc import Callable, Mapping, Sequence
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+
+def measure(function: Callable[[], object], *, repeat: int) -> list[float]:
+    """
+    Measure the wall-clock time of repeated calls to a function.
+
+    :param function: The function to call.
+    :param repeat: How often to call the function.
+    :return: The duration of every call in seconds.
+    """
+    durations: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def print_durations(title: str, durations: Mapping[str, Sequence[float]]) -> None:
+    """
+    Print a summary table of measured durations.
+
+    :param title: The title of the table.
+    :param durations: The measured durations in seconds by benchmark name.
+    :return: None
+    """
+    table = Table(title=title, show_header=True, header_style="bold")
+    table.add_column("Benchmark")
+    table.add_column("Runs", justify="right")
+    table.add_column("Min (ms)", justify="right")
+    table.add_column("Median (ms)", justify="right")
+    table.add_column("P95 (ms)", justify="right")
+    table.add_column("Max (ms)", justify="right")
+
+    for name, values in durations.items():
+        milliseconds = sorted(value * 1000 for value in values)
+        p95 = (
+            statistics.quantiles(milliseconds, n=20)[18]
+            if len(milliseconds) > 1
+            else milliseconds[-1]
+        )
+        table.add_row(
+            name,
+            str(len(milliseconds)),
+            f"{milliseconds[0]:.3f}",
+            f"{statistics.median(milliseconds):.3f}",
+            f"{p95:.3f}",
+            f"{milliseconds[-1]:.3f}",
+        )
+
+    console.print(table)
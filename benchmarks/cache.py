@@ -0,0 +1,238 @@
+"""
+Benchmarks for the lookups of the cache backends.
+"""
+
+from typing import Annotated, Final
+from uuid import uuid4
+
+import typer
+from _measure import console, measure, print_durations
+
+from repository_infrastructure_example.application.settings import (
+    PostgresSettings,
+    RedisSettings,
+)
+from repository_infrastructure_example.caching.cache import CacheService
+from repository_infrastructure_example.caching.codecs import ModelCodec
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from repository_infrastructure_example.caching.postgres import PostgresCacheService
+from repository_infrastructure_example.caching.redis import RedisCacheService
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+from repository_infrastructure_example.domain.organisation import Organisation
+from repository_infrastructure_example.infrastructure.postgres import PostgresClient
+from repository_infrastructure_example.infrastructure.redis import (
+    get_client_side_cache,
+    get_redis_client,
+)
+from repository_infrastructure_example.repositories.postgresql.organisation.repository import (
+    PostgresOrganisationRepository,
+)
+from repository_infrastructure_example.repositories.postgresql.user.repository import (
+    PostgresUserRepository,
+)
+
+# Keeps the benchmark keys apart from the keys of the application
+_KEY_PREFIX: Final[str] = "benchmark"
+
+cache_app = typer.Typer()
+
+
+@cache_app.command()
+def cache(
+    repeat: Annotated[int, typer.Option(help="Number of runs per benchmark.")] = 1000,
+    set_size: Annotated[
+        int, typer.Option(help="Number of IDs in the cached set.")
+    ] = 1000,
+) -> None:
+    """Compares membership checks of the memory and the Redis cache backends."""
+    cache_key_manager = CacheKeyManager(prefix=_KEY_PREFIX)
+    key = cache_key_manager.get_user_ids_key(uuid4(), generation=0)
+    ids = {str(uuid4()) for _ in range(set_size)}
+    member = next(iter(ids))
+    non_member = str(uuid4())
+
+    redis_client = get_redis_client(RedisSettings())
+    backends: dict[str, CacheService] = {
+        "memory": MemoryCacheService(
+            ttl_policy=TtlPolicy(), max_entries=1, max_size=set_size * len(member)
+        ),
+        "redis": RedisCacheService(redis_client=redis_client, ttl_policy=TtlPolicy()),
+    }
+
+    durations: dict[str, list[float]] = {}
+    try:
+        for name, cache_service in backends.items():
+            cache_service.store_set(key=key, value=ids)
+            durations[f"{name}: member"] = measure(
+                lambda cache_service=cache_service: cache_service.is_member(
+                    key=key, member=member
+                ),
+                repeat=repeat,
+            )
+            durations[f"{name}: non-member"] = measure(
+                lambda cache_service=cache_service: cache_service.is_member(
+                    key=key, member=non_member
+                ),
+                repeat=repeat,
+            )
+            durations[f"{name}: not cached"] = measure(
+                lambda cache_service=cache_service: cache_service.is_member(
+                    key=f"{key}_missing", member=member
+                ),
+                repeat=repeat,
+            )
+    finally:
+        redis_client.delete(key)
+
+    print_durations(f"Membership checks in a set of {set_size} IDs", durations)
+
+
+@cache_app.command()
+def client_side_cache(
+    repeat: Annotated[int, typer.Option(help="Number of runs per benchmark.")] = 1000,
+    set_size: Annotated[
+        int, typer.Option(help="Number of IDs in the cached set.")
+    ] = 1000,
+) -> None:
+    """Compares the membership checks of `ensure_*` with and without client-side caching."""
+    cache_key_manager = CacheKeyManager(prefix=_KEY_PREFIX)
+    key = cache_key_manager.get_user_ids_key(uuid4(), generation=0)
+    ids = {str(uuid4()) for _ in range(set_size)}
+    member = next(iter(ids))
+    non_member = str(uuid4())
+
+    settings = RedisSettings(client_side_caching=True)
+    client_cache = get_client_side_cache(settings)
+    redis_client = get_redis_client(settings)
+    cached_redis_client = get_redis_client(settings, client_side_cache=client_cache)
+    backends: dict[str, CacheService] = {
+        "server": RedisCacheService(redis_client=redis_client, ttl_policy=TtlPolicy()),
+        "client-side": RedisCacheService(
+            redis_client=cached_redis_client,
+            ttl_policy=TtlPolicy(),
+            is_client_side_cached=True,
+        ),
+    }
+
+    def check_after_write(cache_service: CacheService) -> None:
+        # Another client writes to the set, invalidating the cached replies
+        redis_client.srem(key, non_member)
+        cache_service.check_member(key=key, member=member)
+
+    durations: dict[str, list[float]] = {}
+    try:
+        redis_client.delete(key)
+        backends["server"].store_set(key=key, value=ids)
+        for name, cache_service in backends.items():
+            durations[f"{name}: member"] = measure(
+                lambda cache_service=cache_service: cache_service.check_member(
+                    key=key, member=member
+                ),
+                repeat=repeat,
+            )
+            durations[f"{name}: non-member"] = measure(
+                lambda cache_service=cache_service: cache_service.check_member(
+                    key=key, member=non_member
+                ),
+                repeat=repeat,
+            )
+            durations[f"{name}: after a write"] = measure(
+                lambda cache_service=cache_service: check_after_write(cache_service),
+                repeat=repeat,
+            )
+    finally:
+        redis_client.delete(key)
+
+    print_durations(f"Membership checks in a set of {set_size} IDs", durations)
+
+    if client_cache is not None:
+        console.print(client_cache.statistics)
+
+
+@cache_app.command()
+def postgres_cache(
+    repeat: Annotated[int, typer.Option(help="Number of runs per benchmark.")] = 1000,
+) -> None:
+    """Compares lookups in the Postgres cache with the repository queries they replace."""
+    postgres_client = PostgresClient(PostgresSettings().get_connection_uri())
+    organisation_repository = PostgresOrganisationRepository(
+        session_factory=postgres_client.session
+    )
+    user_repository = PostgresUserRepository(session_factory=postgres_client.session)
+
+    organisation_ids = organisation_repository.get_most_active_organisation_ids(1)
+    if not organisation_ids:
+        console.print("No organisation with users found, seed the database first.")
+        raise typer.Exit(code=1)
+
+    organisation_id = organisation_ids[0]
+    organisation = organisation_repository.get_organisation(organisation_id)
+    user_ids = {
+        str(user_id) for user_id in user_repository.get_user_ids(organisation_id)
+    }
+    user_id = next(iter(user_ids))
+
+    cache_key_manager = CacheKeyManager(prefix=_KEY_PREFIX)
+    organisation_ids_key = cache_key_manager.organisation_ids_key
+    user_ids_key = cache_key_manager.get_user_ids_key(organisation_id, generation=0)
+    organisation_key = cache_key_manager.get_organisation_key(
+        organisation_id, generation=0
+    )
+    organisation_codec = ModelCodec(Organisation)
+
+    # Requires the migrations creating the cache tables
+    cache_service = PostgresCacheService(
+        session_factory=postgres_client.session, ttl_policy=TtlPolicy()
+    )
+    cache_service.store_set(
+        key=organisation_ids_key,
+        value={
+            str(organisation_id)
+            for organisation_id in organisation_repository.get_organisation_ids()
+        },
+    )
+    cache_service.store_set(key=user_ids_key, value=user_ids)
+    if organisation is not None:
+        cache_service.store_value(
+            key=organisation_key, value=organisation, codec=organisation_codec
+        )
+
+    durations: dict[str, list[float]] = {}
+    try:
+        durations["repository: organisation exists"] = measure(
+            lambda: organisation_repository.organisation_exists(organisation_id),
+            repeat=repeat,
+        )
+        durations["postgres cache: organisation exists"] = measure(
+            lambda: cache_service.is_member(
+                key=organisation_ids_key, member=str(organisation_id)
+            ),
+            repeat=repeat,
+        )
+        durations["repository: user exists"] = measure(
+            lambda: user_repository.get_user_ids(organisation_id),
+            repeat=repeat,
+        )
+        durations["postgres cache: user exists"] = measure(
+            lambda cache_service=cache_service: cache_service.is_member(
+                key=user_ids_key, member=user_id
+            ),
+            repeat=repeat,
+        )
+        durations["repository: organisation"] = measure(
+            lambda: organisation_repository.get_organisation(organisation_id),
+            repeat=repeat,
+        )
+        durations["postgres cache: organisation"] = measure(
+            lambda cache_service=cache_service: cache_service.get_value(
+                organisation_key, codec=organisation_codec
+            ),
+            repeat=repeat,
+        )
+    finally:
+        cache_service.delete_matching(f"{_KEY_PREFIX}__*")
+
+    print_durations(
+        f"Lookups for an organisation with {len(user_ids)} users", durations
+    )
@@ -0,0 +1,105 @@
+"""
+Simulation of the cache rebuilds caused by keys expiring.
+"""
+
+import heapq
+import random
+import statistics
+from collections import Counter
+from typing import Annotated, Final
+from uuid import uuid4
+
+import typer
+from _measure import console
+from rich.table import Table
+
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+# Keeps the benchmark keys apart from the keys of the application
+_KEY_PREFIX: Final[str] = "benchmark"
+# Jitter simulated unless given on the command line
+_DEFAULT_JITTER: Final[tuple[float, ...]] = (0.0, 0.1, 0.25)
+
+expiry_app = typer.Typer()
+
+
+def _simulate_rebuilds(
+    keys: list[str], *, ttl_policy: TtlPolicy, duration: int
+) -> Counter[int]:
+    """
+    Simulate keys written at once and populated again as soon as they expire.
+
+    :param keys: The cache keys, all written at the start.
+    :param ttl_policy: The policy deciding the TTL of the keys.
+    :param duration: The simulated time in seconds.
+    :return: The number of rebuilds per second.
+    """
+    expiries: list[tuple[float, str]] = []
+    for key in keys:
+        ttl = ttl_policy.get_ttl(key)
+        if ttl is not None:
+            expiries.append((ttl, key))
+    heapq.heapify(expiries)
+
+    rebuilds: Counter[int] = Counter()
+    while expiries and expiries[0][0] < duration:
+        expires_at, key = heapq.heappop(expiries)
+        rebuilds[int(expires_at)] += 1
+
+        ttl = ttl_policy.get_ttl(key)
+        if ttl is not None:
+            heapq.heappush(expiries, (expires_at + ttl, key))
+    return rebuilds
+
+
+@expiry_app.command()
+def expiry(
+    keys: Annotated[
+        int, typer.Option(help="Number of keys written during the warm-up.")
+    ] = 10_000,
+    ttl: Annotated[int, typer.Option(help="TTL of the keys in seconds.")] = 60,
+    duration: Annotated[int, typer.Option(help="Simulated time in seconds.")] = 600,
+    jitter: Annotated[
+        list[float] | None,
+        typer.Option(
+            help="TTL jitter to simulate, repeatable. Defaults to 0, 0.1 and 0.25."
+        ),
+    ] = None,
+    seed: Annotated[int, typer.Option(help="Seed of the random jitter.")] = 0,
+) -> None:
+    """Compares the rebuild spikes of keys expiring with and without TTL jitter."""
+    cache_key_manager = CacheKeyManager(prefix=_KEY_PREFIX)
+    cache_keys = [
+        cache_key_manager.get_user_ids_key(uuid4(), generation=0) for _ in range(keys)
+    ]
+
+    table = Table(
+        title=f"Rebuilds of {keys} keys with a TTL of {ttl}s over {duration}s",
+        show_header=True,
+        header_style="bold",
+    )
+    table.add_column("Jitter", justify="right")
+    table.add_column("Rebuilds", justify="right")
+    table.add_column("Seconds with rebuilds", justify="right")
+    table.add_column("P99 (per second)", justify="right")
+    table.add_column("Peak (per second)", justify="right")
+
+    for value in jitter or _DEFAULT_JITTER:
+        random.seed(seed)
+        rebuilds = _simulate_rebuilds(
+            cache_keys,
+            ttl_policy=TtlPolicy(default_ttl=ttl, jitter=value),
+            duration=duration,
+        )
+        per_second = [rebuilds[second] for second in range(duration)]
+        p99 = statistics.quantiles(per_second, n=100)[98] if duration > 1 else 0
+        table.add_row(
+            f"{value:.0%}",
+            str(rebuilds.total()),
+            str(len(rebuilds)),
+            f"{p99:.0f}",
+            str(max(per_second, default=0)),
+        )
+
+    console.print(table)
@@ -0,0 +1,26 @@
+"""
+Repository Infrastructure Example Benchmarks
+
+Run the benchmarks against the services configured in the `.env` file.
+"""
+
+import typer
+from cache import cache_app
+from expiry import expiry_app
+from startup import startup_app
+
+app = typer.Typer(help="Repository Example Benchmarks", no_args_is_help=True)
+
+
+@app.callback()
+def main() -> None:
+    """Run the benchmarks against the services configured in the `.env` file."""
+
+
+app.add_typer(startup_app)
+app.add_typer(cache_app)
+app.add_typer(expiry_app)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,65 @@
+"""
+Benchmarks for the start-up time of the entrypoints.
+"""
+
+import subprocess
+import sys
+from typing import Annotated, Final
+
+import typer
+from _measure import measure, print_durations
+
+from repository_infrastructure_example.application.context import ApplicationContext
+
+# Starts the API including its lifespan, without serving any request
+_API_START_UP_SCRIPT: Final[str] = """
+from fastapi.testclient import TestClient
+
+from repository_infrastructure_example.application.api.main import app
+
+with TestClient(app):
+    pass
+"""
+
+startup_app = typer.Typer()
+
+
+def _run(command: list[str]) -> None:
+    """
+    Run a command and wait for it to finish.
+
+    :param command: The command to run.
+    :return: None
+    :raises subprocess.CalledProcessError: If the command fails.
+    """
+    subprocess.run(command, check=True, capture_output=True)
+
+
+@startup_app.command()
+def startup(
+    repeat: Annotated[int, typer.Option(help="Number of runs per benchmark.")] = 5,
+) -> None:
+    """Measures how long the CLI and the API take to start."""
+    context = ApplicationContext()
+    context.clients.postgres.run_migrations(disable_logging=True)
+
+    durations = {
+        "CLI: organisations list": measure(
+            lambda: _run(
+                [sys.executable, "cli/main.py", "organisations", "list", "--limit=1"]
+            ),
+            repeat=repeat,
+        ),
+        "API: lifespan start-up": measure(
+            lambda: _run([sys.executable, "-c", _API_START_UP_SCRIPT]),
+            repeat=repeat,
+        ),
+        "Migrations: in-process schema check": measure(
+            context.clients.postgres.schema_is_up_to_date, repeat=repeat
+        ),
+        "Migrations: alembic upgrade head": measure(
+            lambda: _run(["alembic", "upgrade", "head"]), repeat=repeat
+        ),
+    }
+
+    print_durations("Start-up time", durations)
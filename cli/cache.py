@@ -0,0 +1,66 @@
+"""
+CLI for managing the cache.
+"""
+
+from typing import Annotated
+
+import typer
+from _context import get_context
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+cache_app = typer.Typer(help="Cache management commands", no_args_is_help=True)
+
+
+@cache_app.command("warm-up", help="Preload ID sets into the cache")
+def warm_up(
+    organisations: Annotated[
+        int | None,
+        typer.Option(
+            help="Number of most recently active organisations whose user IDs are "
+            "preloaded. Defaults to the cache settings."
+        ),
+    ] = None,
+    concurrency: Annotated[
+        int | None,
+        typer.Option(
+            help="Number of user ID sets preloaded at the same time. Defaults to "
+            "the cache settings."
+        ),
+    ] = None,
+    time_budget: Annotated[
+        float | None,
+        typer.Option(
+            help="Time in seconds after which no more user ID sets are preloaded. "
+            "Defaults to the cache settings."
+        ),
+    ] = None,
+) -> None:
+    ctx = get_context()
+    settings = ctx.settings.cache
+
+    report = ctx.services.cache_warm_up.warm_up(
+        organisation_limit=(
+            organisations
+            if organisations is not None
+            else settings.warm_up_organisations
+        ),
+        concurrency=concurrency or settings.warm_up_concurrency,
+        time_budget=time_budget or settings.warm_up_time_budget,
+    )
+
+    table = Table(show_header=True, header_style="bold")
+    table.add_column("Organisation IDs", justify="right")
+    table.add_column("User ID sets", justify="right")
+    table.add_column("Failed", justify="right")
+    table.add_column("Skipped", justify="right")
+    table.add_column("Duration", justify="right")
+    table.add_row(
+        str(report.organisation_id_count),
+        str(report.user_id_set_count),
+        str(report.failed_user_id_set_count),
+        str(report.skipped_user_id_set_count),
+        f"{report.duration:.3f}s",
+    )
+    console.print(table)
@@ -5,6 +5,7 @@ This CLI provides a set of commands for interacting with the repository example.
 """
 
 import typer
+from cache import cache_app
 from organisations import organisation_app
 from seed import seed_app
 from users import user_app
@@ -16,6 +17,7 @@ app.add_typer(version_app)
 app.add_typer(seed_app)
 app.add_typer(organisation_app, name="organisations")
 app.add_typer(user_app, name="users")
+app.add_typer(cache_app, name="cache")
 
 
 if __name__ == "__main__":
@@ -44,6 +44,7 @@ def get_user_service(
 
 
 # FastAPI dependency injection
+ApplicationContextDep = Annotated[ApplicationContext, Depends(get_application_context)]
 OrganisationServiceDep = Annotated[
     OrganisationService, Depends(get_organisation_service)
 ]
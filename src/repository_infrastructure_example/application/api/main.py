@@ -28,8 +28,21 @@ async def lifespan(app: FastAPI):
     # Set up application context
     context = ApplicationContext()
 
-    context.log_settings()
-    context.clients.postgres.run_migrations()
+    with context.startup_timer.measure("log_settings"):
+        context.log_settings()
+    context.clients.postgres.run_migrations(
+        timer=context.startup_timer,
+        lock_wait_timeout=context.settings.postgres.migration_lock_wait_timeout,
+    )
+    context.services.start_background_tasks()
+    if context.settings.cache.warm_up:
+        with context.startup_timer.measure("cache_warm_up"):
+            context.services.cache_warm_up.warm_up(
+                organisation_limit=context.settings.cache.warm_up_organisations,
+                concurrency=context.settings.cache.warm_up_concurrency,
+                time_budget=context.settings.cache.warm_up_time_budget,
+            )
+    context.startup_timer.log("Application start-up")
 
     # Store application context in the application state
     app.state.context = context
@@ -37,6 +50,9 @@ async def lifespan(app: FastAPI):
     # Yield control to the application
     yield
 
+    # Release resources held by the application context
+    context.close()
+
 
 # Create the FastAPI application
 app = FastAPI(
@@ -67,6 +83,9 @@ app.include_router(
     routers.organisation_router, dependencies=[Security(verify_endpoint_access)]
 )
 app.include_router(routers.user_router, dependencies=[Security(verify_endpoint_access)])
+app.include_router(
+    routers.metrics_router, dependencies=[Security(verify_endpoint_access)]
+)
 
 
 ##### Add (possibly protected) documentation routes
@@ -1,6 +1,9 @@
 from repository_infrastructure_example.application.api.routers.health import (
     health_router,
 )
+from repository_infrastructure_example.application.api.routers.metrics import (
+    metrics_router,
+)
 from repository_infrastructure_example.application.api.routers.organisation import (
     organisation_router,
 )
@@ -8,4 +11,4 @@ from repository_infrastructure_example.application.api.routers.user import (
     user_router,
 )
 
-__all__ = ["health_router", "organisation_router", "user_router"]
+__all__ = ["health_router", "metrics_router", "organisation_router", "user_router"]
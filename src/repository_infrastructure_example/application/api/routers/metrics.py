@@ -0,0 +1,150 @@
+from fastapi import APIRouter, status
+
+from repository_infrastructure_example.application.api.dependencies import (
+    ApplicationContextDep,
+)
+from repository_infrastructure_example.application.api.schemas.metrics import (
+    CacheMetricsModel,
+    ClientSideCacheMetricsModel,
+    IdentifierFilterMetricsModel,
+    OrganisationDirectoryMetricsModel,
+    SharedIdentifierIndexMetricsModel,
+    StartupMetricsModel,
+)
+from repository_infrastructure_example.infrastructure.redis_pool import (
+    RedisPoolStatistics,
+)
+
+metrics_router = APIRouter(prefix="/v1", tags=["metrics"])
+
+
+@metrics_router.get(
+    "/metrics/startup",
+    responses={
+        status.HTTP_200_OK: {
+            "model": StartupMetricsModel,
+            "description": "Durations of the start-up phases of this instance.",
+        },
+    },
+)
+def get_startup_metrics(context: ApplicationContextDep) -> StartupMetricsModel:
+    """Get the start-up critical path timings of this instance."""
+    return StartupMetricsModel(
+        total=context.startup_timer.total, phases=context.startup_timer.phases
+    )
+
+
+@metrics_router.get(
+    "/metrics/bloom",
+    responses={
+        status.HTTP_200_OK: {
+            "model": IdentifierFilterMetricsModel,
+            "description": "Size and accuracy of the Bloom filter of this instance.",
+        },
+    },
+)
+def get_identifier_filter_metrics(
+    context: ApplicationContextDep,
+) -> IdentifierFilterMetricsModel:
+    """Get the size and accuracy of the Bloom filter rejecting unknown IDs."""
+    identifier_filter = context.services.identifier_filter
+    return IdentifierFilterMetricsModel(
+        is_enabled=identifier_filter is not None,
+        statistics=identifier_filter.statistics if identifier_filter else None,
+    )
+
+
+@metrics_router.get(
+    "/metrics/shared-index",
+    responses={
+        status.HTTP_200_OK: {
+            "model": SharedIdentifierIndexMetricsModel,
+            "description": "Size and freshness of the ID index shared by the "
+            "processes of this host.",
+        },
+    },
+)
+def get_shared_index_metrics(
+    context: ApplicationContextDep,
+) -> SharedIdentifierIndexMetricsModel:
+    """Get the size and freshness of the shared index of organisation and user IDs."""
+    shared_index = context.services.shared_index
+    return SharedIdentifierIndexMetricsModel(
+        is_enabled=shared_index is not None,
+        statistics=shared_index.statistics if shared_index else None,
+    )
+
+
+@metrics_router.get(
+    "/metrics/organisation-directory",
+    responses={
+        status.HTTP_200_OK: {
+            "model": OrganisationDirectoryMetricsModel,
+            "description": "Size and staleness of the organisation directory of "
+            "this instance.",
+        },
+    },
+)
+def get_organisation_directory_metrics(
+    context: ApplicationContextDep,
+) -> OrganisationDirectoryMetricsModel:
+    """Get the size and staleness of the in-process copy of all organisations."""
+    organisation_directory = context.services.organisation_directory
+    return OrganisationDirectoryMetricsModel(
+        is_enabled=organisation_directory is not None,
+        statistics=organisation_directory.statistics
+        if organisation_directory
+        else None,
+    )
+
+
+@metrics_router.get(
+    "/metrics/cache",
+    responses={
+        status.HTTP_200_OK: {
+            "model": CacheMetricsModel,
+            "description": "Hits, misses, errors, latencies and payload sizes of "
+            "the cache tiers of this instance.",
+        },
+    },
+)
+def get_cache_metrics(context: ApplicationContextDep) -> CacheMetricsModel:
+    """Get the cache statistics per tier, key family and operation."""
+    return CacheMetricsModel(
+        tiers=[metrics.statistics for metrics in context.services.cache_metrics]
+    )
+
+
+@metrics_router.get(
+    "/metrics/redis-client-cache",
+    responses={
+        status.HTTP_200_OK: {
+            "model": ClientSideCacheMetricsModel,
+            "description": "Hits, misses and invalidations of the Redis "
+            "client-side cache of this instance.",
+        },
+    },
+)
+def get_client_side_cache_metrics(
+    context: ApplicationContextDep,
+) -> ClientSideCacheMetricsModel:
+    """Get the hit ratio and invalidations of the Redis client-side cache."""
+    client_side_cache = context.services.client_side_cache
+    return ClientSideCacheMetricsModel(
+        is_enabled=client_side_cache is not None,
+        statistics=client_side_cache.statistics if client_side_cache else None,
+    )
+
+
+@metrics_router.get(
+    "/metrics/redis-pool",
+    responses={
+        status.HTTP_200_OK: {
+            "model": RedisPoolStatistics,
+            "description": "Usage of the Redis connection pools of this instance.",
+        },
+    },
+)
+def get_redis_pool_metrics(context: ApplicationContextDep) -> RedisPoolStatistics:
+    """Get the connections in use, waiting callers and errors of the Redis pools."""
+    return context.clients.redis_pool_metrics.statistics
@@ -0,0 +1,68 @@
+from pydantic import BaseModel, Field
+
+from repository_infrastructure_example.caching.bloom import IdentifierFilterStatistics
+from repository_infrastructure_example.caching.client_side import (
+    ClientSideCacheStatistics,
+)
+from repository_infrastructure_example.caching.directory import (
+    OrganisationDirectoryStatistics,
+)
+from repository_infrastructure_example.caching.metrics import CacheTierStatistics
+from repository_infrastructure_example.caching.shared_index import (
+    SharedIdentifierIndexStatistics,
+)
+from repository_infrastructure_example.utilities.timing import PhaseTiming
+
+
+class StartupMetricsModel(BaseModel):
+    total: float = Field(
+        description="The duration of the start-up in seconds.", examples=[0.25]
+    )
+    phases: list[PhaseTiming] = Field(
+        description="The phases of the start-up in the order they ran."
+    )
+
+
+class IdentifierFilterMetricsModel(BaseModel):
+    is_enabled: bool = Field(
+        description="Whether lookups of unknown IDs are answered using a Bloom filter."
+    )
+    statistics: IdentifierFilterStatistics | None = Field(
+        description="The size and accuracy of the Bloom filter, if enabled."
+    )
+
+
+class SharedIdentifierIndexMetricsModel(BaseModel):
+    is_enabled: bool = Field(
+        description="Whether IDs are looked up in an index shared by the processes "
+        "of this host."
+    )
+    statistics: SharedIdentifierIndexStatistics | None = Field(
+        description="The size and freshness of the shared ID index, if enabled."
+    )
+
+
+class OrganisationDirectoryMetricsModel(BaseModel):
+    is_enabled: bool = Field(
+        description="Whether organisations are read from a copy in every process."
+    )
+    statistics: OrganisationDirectoryStatistics | None = Field(
+        description="The size and staleness of the organisation directory, if enabled."
+    )
+
+
+class CacheMetricsModel(BaseModel):
+    tiers: list[CacheTierStatistics] = Field(
+        description="The statistics of the cache tiers, nearest to the application "
+        "first."
+    )
+
+
+class ClientSideCacheMetricsModel(BaseModel):
+    is_enabled: bool = Field(
+        description="Whether Redis replies are served from a client-side cache."
+    )
+    statistics: ClientSideCacheStatistics | None = Field(
+        description="The hits, misses and invalidations of the client-side cache, "
+        "if enabled."
+    )
@@ -15,26 +15,52 @@ from repository_infrastructure_example.containers.clients import Clients
 from repository_infrastructure_example.containers.repositories import Repositories
 from repository_infrastructure_example.containers.services import Services
 from repository_infrastructure_example.infrastructure.postgres import PostgresClient
-from repository_infrastructure_example.infrastructure.redis import get_redis_client
+from repository_infrastructure_example.infrastructure.redis import (
+    get_client_side_cache,
+    get_redis_client,
+    get_redis_shard_clients,
+)
+from repository_infrastructure_example.infrastructure.redis_pool import (
+    RedisPoolMetrics,
+)
 from repository_infrastructure_example.utilities.logging import (
     log_settings,
     set_up_loguru,
 )
+from repository_infrastructure_example.utilities.timing import PhaseTimer
 
 
 class ApplicationContext:
     _clients: Clients
+    _startup_timer: PhaseTimer
 
     def __init__(self) -> None:
-        set_up_loguru(self.settings.logging.level)
-        self._set_up_clients()
+        self._startup_timer = PhaseTimer()
+
+        with self._startup_timer.measure("settings"):
+            set_up_loguru(self.settings.logging.level)
+        with self._startup_timer.measure("clients"):
+            self._set_up_clients()
 
     def _set_up_clients(self) -> None:
+        client_side_cache = get_client_side_cache(self.settings.redis)
+        redis_pool_metrics = RedisPoolMetrics()
         self._clients = Clients(
             postgres_client=PostgresClient(
                 connection_string=self.settings.postgres.get_connection_uri()
             ),
-            redis_client=get_redis_client(self.settings.redis),
+            redis_client=get_redis_client(
+                self.settings.redis,
+                client_side_cache=client_side_cache,
+                pool_metrics=redis_pool_metrics,
+            ),
+            redis_shard_clients=get_redis_shard_clients(
+                self.settings.redis,
+                client_side_cache=client_side_cache,
+                pool_metrics=redis_pool_metrics,
+            ),
+            redis_client_side_cache=client_side_cache,
+            redis_pool_metrics=redis_pool_metrics,
         )
 
     @cached_property
@@ -45,6 +71,10 @@ class ApplicationContext:
     def clients(self) -> Clients:
         return self._clients
 
+    @property
+    def startup_timer(self) -> PhaseTimer:
+        return self._startup_timer
+
     @cached_property
     def repositories(self) -> Repositories:
         return Repositories(
@@ -56,11 +86,22 @@ class ApplicationContext:
     def services(self) -> Services:
         return Services(
             repositories=self.repositories,
+            postgres_client=self.clients.postgres,
             redis_client=self.clients.redis,
+            redis_shard_clients=self.clients.redis_shards,
+            client_side_cache=self.clients.redis_client_side_cache,
             cache_settings=self.settings.cache,
             redis_cache_settings=self.settings.redis,
         )
 
+    def close(self) -> None:
+        """
+        Release the resources held by the application context.
+
+        :return: None
+        """
+        self.services.close()
+
     def log_settings(self) -> None:
         # Gather all settings, then log them
         settings_to_log: list[BaseModel] = [setting for _, setting in self.settings]
@@ -1,8 +1,10 @@
+from pathlib import Path
 from typing import Literal
 
 from pydantic import (
     BaseModel,
     Field,
+    NonNegativeInt,
     PositiveFloat,
     PositiveInt,
     SecretStr,
@@ -11,7 +13,12 @@ from pydantic import (
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing_extensions import Self
 
-from repository_infrastructure_example.caching.backend import CacheBackend
+from repository_infrastructure_example import __appname__
+from repository_infrastructure_example.caching.backend import (
+    CacheBackend,
+    RedisTopology,
+)
+from repository_infrastructure_example.caching.key_manager import CacheKeyFamily
 from repository_infrastructure_example.repositories.backend import RepositoryBackend
 
 
@@ -95,6 +102,26 @@ class PostgresSettings(BaseSettings):
         default=False,
         description="Whether to use SSL when connecting to the Postgresql server.",
     )
+    migration_lock_timeout: PositiveFloat = Field(
+        default=5.0,
+        description="The time in seconds a migration statement may wait for a lock "
+        "before the migration is aborted and retried. Defaults to 5 seconds.",
+    )
+    migration_lock_wait_timeout: PositiveFloat = Field(
+        default=300.0,
+        description="The time in seconds to wait for another instance to finish "
+        "migrating before the start-up is aborted. Defaults to 300 seconds.",
+    )
+    migration_max_attempts: PositiveInt = Field(
+        default=5,
+        description="The maximum number of attempts to apply a migration that "
+        "times out waiting for locks. Defaults to 5.",
+    )
+    migration_retry_backoff: PositiveFloat = Field(
+        default=1.0,
+        description="The initial delay in seconds between migration attempts, "
+        "doubled after every attempt. Defaults to 1 second.",
+    )
 
     def get_connection_uri(self, hide_password: bool = False) -> str:
         """Constructs a Postgresql connection URI.
@@ -125,8 +152,212 @@ class CacheSettings(BaseSettings):
     )
     keys_ttl: PositiveInt | None = Field(
         default=None,
-        description="The default time-to-live (TTL) in seconds for Redis keys."
-        "If None, keep keys forever.",
+        description="The default time-to-live (TTL) in seconds for cache keys, "
+        "used for key families without their own TTL. If None, keep keys forever.",
+    )
+    family_ttls: dict[CacheKeyFamily, PositiveInt] = Field(
+        default_factory=dict,
+        description="The time-to-live (TTL) in seconds per key family, e.g. "
+        '`{"organisation_ids": 300, "user_ids": 60}`. Families not listed use '
+        "the default TTL. Defaults to none.",
+    )
+    ttl_jitter: float = Field(
+        default=0.1,
+        ge=0,
+        lt=1,
+        description="The fraction of their TTL by which keys are randomly "
+        "shortened, so that keys written at the same time do not expire at the "
+        "same time. Defaults to 0.1.",
+    )
+    sliding_families: set[CacheKeyFamily] = Field(
+        default_factory=set,
+        description="The key families whose TTL is renewed whenever a key is read, "
+        'e.g. `["user_ids"]`. Read keys are not refreshed, so only ID sets kept '
+        "up to date on writes should slide. Ignored when Redis client-side "
+        "caching is enabled. Defaults to none.",
+    )
+    stale_window: NonNegativeInt = Field(
+        default=10,
+        description="The time in seconds keys are kept beyond their TTL. Expired "
+        "ID sets are served during this window while they are refreshed in the "
+        "background. Defaults to 10 seconds.",
+    )
+    refresh_ahead: NonNegativeInt = Field(
+        default=5,
+        description="The time in seconds before the end of their TTL at which "
+        "ID sets are refreshed in the background. Defaults to 5 seconds.",
+    )
+    memory_max_entries: PositiveInt = Field(
+        default=100_000,
+        description="The maximum number of keys held by the memory cache backend. "
+        "Defaults to 100000.",
+    )
+    memory_max_size: PositiveInt = Field(
+        default=256 * 1024 * 1024,
+        description="The maximum size in bytes of the values held by the memory "
+        "cache backend, counting a character of an ID as a byte. "
+        "Defaults to 256 MiB.",
+    )
+    postgres_fallback: bool = Field(
+        default=False,
+        description="Whether to serve the cache from the Postgres cache tables "
+        "while the Redis circuit breaker is open. Requires the Redis circuit "
+        "breaker. Defaults to False.",
+    )
+    postgres_sweep_interval: PositiveFloat = Field(
+        default=60.0,
+        description="The interval in seconds at which expired entries are deleted "
+        "from the Postgres cache tables. Defaults to 60 seconds.",
+    )
+    postgres_sweep_batch_size: PositiveInt = Field(
+        default=1000,
+        description="The number of expired entries deleted from the Postgres "
+        "cache tables per transaction. Defaults to 1000.",
+    )
+    disk_cache: bool = Field(
+        default=False,
+        description="Whether to keep a cache persisted to local files between the "
+        "in-process cache and the cache backend, so that it survives restarts. "
+        "Ignored for the memory backend. Defaults to False.",
+    )
+    disk_cache_directory: Path = Field(
+        default=Path(".cache"),
+        description="The directory holding the disk cache files. Defaults to `.cache`.",
+    )
+    disk_cache_slots: PositiveInt = Field(
+        default=16,
+        description="The number of disk cache files, each held by one process at "
+        "a time. Processes beyond it run without a disk cache. Defaults to 16.",
+    )
+    disk_cache_max_size: PositiveInt = Field(
+        default=256 * 1024 * 1024,
+        description="The size in bytes from which a disk cache file is compacted, "
+        "evicting its oldest entries. Defaults to 256 MiB.",
+    )
+    disk_cache_validation_interval: PositiveFloat = Field(
+        default=5.0,
+        description="The interval in seconds at which the disk cache is checked "
+        "against the version of the data in the database, dropping the entries "
+        "read from tables that have changed. Defaults to 5 seconds.",
+    )
+    local_cache: bool = Field(
+        default=True,
+        description="Whether to keep an in-process cache in front of the cache "
+        "backend. Ignored for the memory backend and when Redis client-side "
+        "caching is enabled. Defaults to True.",
+    )
+    local_ttl: PositiveFloat = Field(
+        default=5.0,
+        description="The time-to-live (TTL) in seconds for keys in the in-process "
+        "cache. Defaults to 5 seconds.",
+    )
+    local_max_entries: PositiveInt = Field(
+        default=10_000,
+        description="The maximum number of keys in the in-process cache. "
+        "Defaults to 10000.",
+    )
+    local_max_size: PositiveInt = Field(
+        default=64 * 1024 * 1024,
+        description="The maximum number of characters held by the in-process "
+        "cache. Defaults to 64 MiB worth of characters.",
+    )
+    compression_threshold: PositiveInt = Field(
+        default=1024,
+        description="The encoded size in bytes from which cached values are "
+        "compressed. Defaults to 1024 bytes.",
+    )
+    negative_ttl: PositiveFloat = Field(
+        default=5.0,
+        description="The time-to-live (TTL) in seconds for remembering that a "
+        "lookup found nothing. Defaults to 5 seconds.",
+    )
+    populate_lease_ttl: PositiveFloat = Field(
+        default=5.0,
+        description="The time in seconds after which the lease of a process "
+        "populating a cache key expires. Defaults to 5 seconds.",
+    )
+    populate_wait_timeout: PositiveFloat = Field(
+        default=1.0,
+        description="The time in seconds to wait for another process to populate "
+        "a cache key before populating it anyway. Defaults to 1 second.",
+    )
+    warm_up: bool = Field(
+        default=False,
+        description="Whether to preload ID sets into the cache when the API starts. "
+        "Defaults to False.",
+    )
+    warm_up_organisations: NonNegativeInt = Field(
+        default=100,
+        description="The number of most recently active organisations whose user "
+        "IDs are preloaded. Defaults to 100.",
+    )
+    warm_up_concurrency: PositiveInt = Field(
+        default=4,
+        description="The number of user ID sets preloaded at the same time. "
+        "Defaults to 4.",
+    )
+    warm_up_time_budget: PositiveFloat = Field(
+        default=10.0,
+        description="The time in seconds after which no more user ID sets are "
+        "preloaded. Defaults to 10 seconds.",
+    )
+    shared_index: bool = Field(
+        default=False,
+        description="Whether to look organisation and user IDs up in an index "
+        "shared by the processes of a host through memory-mapped files, before "
+        "consulting the cache. Defaults to False.",
+    )
+    shared_index_directory: Path = Field(
+        default=Path("/dev/shm") / __appname__,
+        description="The directory holding the files of the shared ID index, "
+        "which should be in memory. Defaults to a directory in `/dev/shm`.",
+    )
+    shared_index_refresh_interval: PositiveFloat = Field(
+        default=1.0,
+        description="The interval in seconds at which the shared ID index is "
+        "refreshed if the data in the database has changed. Defaults to 1 second.",
+    )
+    shared_index_rebuild_interval: PositiveFloat = Field(
+        default=10.0,
+        description="The minimum interval in seconds between two rebuilds of the "
+        "shared ID index, each of which loads all IDs from the database. Defaults "
+        "to 10 seconds.",
+    )
+    organisation_directory: bool = Field(
+        default=False,
+        description="Whether to keep a copy of all organisations in every process, "
+        "so that organisations are read without leaving the process. "
+        "Defaults to False.",
+    )
+    organisation_directory_refresh_interval: PositiveFloat = Field(
+        default=5.0,
+        description="The interval in seconds at which the organisation directory "
+        "is reloaded if the organisations have changed, bounding its staleness "
+        "when changes are not broadcast. Defaults to 5 seconds.",
+    )
+    identifier_filter: bool = Field(
+        default=False,
+        description="Whether to answer lookups of unknown organisation and user "
+        "IDs from the cached IDs instead of the database, using an in-memory "
+        "Bloom filter. IDs unknown to the filter are confirmed by the cached IDs "
+        "before being rejected. Defaults to False.",
+    )
+    identifier_filter_capacity: PositiveInt = Field(
+        default=100_000,
+        description="The minimum number of IDs the Bloom filter is sized for. "
+        "Defaults to 100000.",
+    )
+    identifier_filter_error_rate: float = Field(
+        default=0.01,
+        gt=0,
+        lt=1,
+        description="The false positive rate the Bloom filter is sized for. "
+        "Defaults to 0.01.",
+    )
+    identifier_filter_rebuild_interval: PositiveFloat = Field(
+        default=600.0,
+        description="The interval in seconds at which the Bloom filter is rebuilt "
+        "from the database. Defaults to 600 seconds.",
     )
 
     model_config = SettingsConfigDict(
@@ -138,11 +369,26 @@ class CacheSettings(BaseSettings):
 
 
 class RedisSettings(BaseSettings):
-    host: str = Field(default=..., description="The host of the Redis server.")
+    topology: RedisTopology = Field(
+        default=RedisTopology.STANDALONE,
+        description="How the cache is spread over Redis nodes. Defaults to a "
+        "single standalone server.",
+    )
+    host: str = Field(
+        default="localhost",
+        description="The host of the Redis server. Defaults to localhost.",
+    )
     port: int = Field(
         default=6379,
         description="The port to connect to the Redis server. Defaults to 6379.",
     )
+    nodes: list[str] = Field(
+        default_factory=list,
+        description="The `host:port` addresses of the Redis nodes, used instead "
+        "of the host and port if set. The cluster topology discovers further "
+        "nodes from them, the sharded topology uses exactly these. "
+        "Defaults to none.",
+    )
     password: SecretStr | None = Field(
         default=None,
         description="The password for the Redis server (optional).",
@@ -155,11 +401,79 @@ class RedisSettings(BaseSettings):
         default=30,
         description="The interval in seconds for Redis health checks. Defaults to 30 seconds.",
     )
+    max_connections: PositiveInt = Field(
+        default=50,
+        description="The maximum number of connections to each Redis node. "
+        "Defaults to 50.",
+    )
+    pool_timeout: PositiveFloat = Field(
+        default=1.0,
+        description="The time in seconds to wait for a free connection once all "
+        "connections to a node are in use. Does not apply to the cluster "
+        "topology, which fails right away. Defaults to 1 second.",
+    )
+    socket_keepalive: bool = Field(
+        default=True,
+        description="Whether to enable TCP keepalive on Redis connections. "
+        "Defaults to True.",
+    )
     client_side_caching: bool = Field(
         default=False,
-        description="Whether to enable client-side caching for Redis. Defaults to False.",
+        description="Whether to serve repeated reads from a client-side cache "
+        "that Redis keeps up to date by tracking the keys read. Replaces the "
+        "in-process cache. Defaults to False.",
+    )
+    client_side_cache_max_entries: PositiveInt = Field(
+        default=10_000,
+        description="The maximum number of replies held by the client-side cache. "
+        "Defaults to 10000.",
+    )
+    circuit_breaker: bool = Field(
+        default=True,
+        description="Whether to skip Redis after consecutive failures until it has "
+        "had time to recover. Defaults to True.",
+    )
+    circuit_breaker_failure_threshold: PositiveInt = Field(
+        default=5,
+        description="The number of consecutive failures after which Redis is "
+        "skipped. Defaults to 5.",
+    )
+    circuit_breaker_reset_timeout: PositiveFloat = Field(
+        default=5.0,
+        description="The time in seconds Redis is skipped before a single call is "
+        "let through to probe it. Defaults to 5 seconds.",
     )
 
+    @model_validator(mode="after")
+    def check_nodes(self) -> Self:
+        """
+        Validate that the node addresses consist of a host and a port.
+
+        :raises ValueError: If an address is malformed.
+        :return: The validated instance.
+        """
+        self.get_node_addresses()
+        return self
+
+    def get_node_addresses(self) -> list[tuple[str, int]]:
+        """
+        Get the addresses of the Redis nodes.
+
+        :return: The host and port of every node, the host and port settings if
+            no nodes are set.
+        :raises ValueError: If an address is malformed.
+        """
+        if not self.nodes:
+            return [(self.host, self.port)]
+
+        addresses: list[tuple[str, int]] = []
+        for node in self.nodes:
+            host, separator, port = node.rpartition(":")
+            if not separator or not host or not port.isdigit():
+                raise ValueError(f"Redis node '{node}' is not a `host:port` address.")
+            addresses.append((host, int(port)))
+        return addresses
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -199,6 +513,6 @@ class ApplicationSettings(BaseModel):
     api: APISettings = Field(default_factory=APISettings)
     postgres: PostgresSettings = Field(default_factory=PostgresSettings)  # pyright: ignore
     cache: CacheSettings = Field(default_factory=CacheSettings)
-    redis: RedisSettings = Field(default_factory=RedisSettings)  # pyright: ignore
+    redis: RedisSettings = Field(default_factory=RedisSettings)
     repository: RepositorySettings = Field(default_factory=RepositorySettings)
     logging: LoggingSettings = Field(default_factory=LoggingSettings)
@@ -3,3 +3,14 @@ from enum import StrEnum, auto
 
 class CacheBackend(StrEnum):
     REDIS = auto()
+    MEMORY = auto()
+    POSTGRES = auto()
+
+
+class RedisTopology(StrEnum):
+    # A single Redis server
+    STANDALONE = auto()
+    # A Redis Cluster, which routes keys to nodes by hash slot
+    CLUSTER = auto()
+    # Independent Redis servers, keys are routed by a consistent-hash ring
+    SHARDED = auto()
@@ -0,0 +1,323 @@
+import hashlib
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime, timezone
+from uuid import UUID
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from repository_infrastructure_example.caching.bus import MessageBus
+
+
+class BloomFilter:
+    """
+    Set of identifiers that may report false positives, but no false negatives.
+
+    Not safe for concurrent additions, callers have to synchronise them.
+    """
+
+    _bits: bytearray
+    _bit_count: int
+    _hash_count: int
+    _capacity: int
+    _error_rate: float
+    _item_count: int
+
+    def __init__(self, *, capacity: int, error_rate: float) -> None:
+        # Optimal number of bits and hashes for the expected number of items
+        self._bit_count = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self._hash_count = max(1, round(self._bit_count / capacity * math.log(2)))
+        self._bits = bytearray(math.ceil(self._bit_count / 8))
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._item_count = 0
+
+    def _get_positions(self, identifier: UUID) -> Iterable[int]:
+        # Double hashing, see Kirsch and Mitzenmacher, "Less Hashing, Same
+        # Performance: Building a Better Bloom Filter"
+        digest = hashlib.blake2b(identifier.bytes, digest_size=16).digest()
+        first = int.from_bytes(digest[:8])
+        second = int.from_bytes(digest[8:]) | 1
+        return (
+            (first + index * second) % self._bit_count
+            for index in range(self._hash_count)
+        )
+
+    def add(self, identifier: UUID) -> None:
+        """
+        Add an identifier to the filter.
+
+        :param identifier: The identifier to add.
+        :return: None
+        """
+        for position in self._get_positions(identifier):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._item_count += 1
+
+    def __contains__(self, identifier: object) -> bool:
+        if not isinstance(identifier, UUID):
+            return False
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._get_positions(identifier)
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Get the number of items the filter was sized for."""
+        return self._capacity
+
+    @property
+    def error_rate(self) -> float:
+        """Get the false positive rate the filter was sized for."""
+        return self._error_rate
+
+    @property
+    def item_count(self) -> int:
+        """Get the number of items added, including duplicates."""
+        return self._item_count
+
+    @property
+    def hash_count(self) -> int:
+        """Get the number of bits set per item."""
+        return self._hash_count
+
+    @property
+    def size_in_bytes(self) -> int:
+        """Get the size of the bit array in bytes."""
+        return len(self._bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Get the expected false positive rate at the current number of items."""
+        return (
+            1 - math.exp(-self._hash_count * self._item_count / self._bit_count)
+        ) ** self._hash_count
+
+
+class IdentifierFilterStatistics(BaseModel):
+    is_ready: bool = Field(
+        description="Whether the filter has been built and reports unknown identifiers."
+    )
+    item_count: int = Field(description="The number of identifiers in the filter.")
+    capacity: int = Field(
+        description="The number of identifiers the filter is sized for."
+    )
+    hash_count: int = Field(description="The number of hash functions per identifier.")
+    size_in_bytes: int = Field(description="The memory used by the bit array in bytes.")
+    target_false_positive_rate: float = Field(
+        description="The false positive rate the filter is sized for."
+    )
+    false_positive_rate: float = Field(
+        description="The expected false positive rate at the current number of "
+        "identifiers."
+    )
+    built_at: datetime | None = Field(
+        description="When the filter was last built, if ever."
+    )
+    build_duration: float | None = Field(
+        description="How long the last build took in seconds, if ever built."
+    )
+
+
+class IdentifierFilter:
+    """
+    In-memory Bloom filter of all identifiers known to the application.
+
+    Answers "unknown" for identifiers that were never created, so that lookups
+    of random identifiers can skip the database. Until the filter has been
+    built, every identifier may be known.
+
+    The filter is rebuilt periodically from the source of truth, which drops
+    deleted identifiers and resizes it to the number of identifiers. Created
+    identifiers are added right away and broadcast to all other processes.
+    A process may not have received the broadcast of an identifier yet, or
+    may have missed it while disconnected from the bus, until its next
+    rebuild. Callers therefore have to confirm negatives before acting on them.
+    """
+
+    _load_identifiers: Callable[[], Iterable[UUID]]
+    _message_bus: MessageBus | None
+    _capacity: int
+    _error_rate: float
+    _rebuild_interval: float
+
+    _filter: BloomFilter | None
+    _added_during_rebuild: list[UUID] | None
+    _built_at: datetime | None
+    _build_duration: float | None
+    _lock: threading.Lock
+    _stopped: threading.Event
+    _thread: threading.Thread | None
+
+    def __init__(
+        self,
+        *,
+        load_identifiers: Callable[[], Iterable[UUID]],
+        message_bus: MessageBus | None,
+        capacity: int,
+        error_rate: float,
+        rebuild_interval: float,
+    ) -> None:
+        self._load_identifiers = load_identifiers
+        self._message_bus = message_bus
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._rebuild_interval = rebuild_interval
+
+        self._filter = None
+        self._added_during_rebuild = None
+        self._built_at = None
+        self._build_duration = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def might_contain(self, identifier: UUID) -> bool:
+        """
+        Check whether an identifier may be known.
+
+        :param identifier: The identifier to check.
+        :return: False if the identifier is unknown to the filter, True otherwise.
+        """
+        bloom_filter = self._filter
+        return bloom_filter is None or identifier in bloom_filter
+
+    def add(self, identifier: UUID) -> None:
+        """
+        Add a created identifier to the filters of all processes.
+
+        Must be called after the identifier has been persisted.
+
+        :param identifier: The identifier to add.
+        :return: None
+        """
+        self._add_locally(identifier)
+
+        if self._message_bus is not None:
+            try:
+                self._message_bus.publish(str(identifier))
+            except Exception as error:
+                logger.error(
+                    f"Failed to broadcast identifier '{identifier}': {str(error)}"
+                )
+
+    def _add_locally(self, identifier: UUID) -> None:
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(identifier)
+            # Keep identifiers created while the next filter is loaded
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(identifier)
+
+    def _on_message(self, message: str) -> None:
+        self._add_locally(UUID(message))
+
+    def rebuild(self) -> None:
+        """
+        Build the filter from all known identifiers and replace the current one.
+
+        :return: None
+        """
+        started = time.perf_counter()
+
+        with self._lock:
+            self._added_during_rebuild = []
+        try:
+            identifiers = list(self._load_identifiers())
+        except Exception:
+            with self._lock:
+                self._added_during_rebuild = None
+            raise
+
+        # Leave room for growth until the next rebuild
+        bloom_filter = BloomFilter(
+            capacity=max(self._capacity, 2 * len(identifiers)),
+            error_rate=self._error_rate,
+        )
+        for identifier in identifiers:
+            bloom_filter.add(identifier)
+
+        with self._lock:
+            for identifier in self._added_during_rebuild or []:
+                bloom_filter.add(identifier)
+            self._added_during_rebuild = None
+            self._filter = bloom_filter
+
+        self._built_at = datetime.now(timezone.utc)
+        self._build_duration = time.perf_counter() - started
+        logger.info(
+            f"Built identifier filter with {len(identifiers)} identifiers in "
+            f"{self._build_duration:.3f}s."
+        )
+
+    def start(self) -> None:
+        """
+        Build the filter in the background and rebuild it periodically.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        if self._message_bus is not None:
+            self._message_bus.subscribe(self._on_message)
+
+        self._thread = threading.Thread(
+            target=self._rebuild_periodically, name="identifier-filter", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop rebuilding the filter.
+
+        :return: None
+        """
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _rebuild_periodically(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.rebuild()
+            except Exception as error:
+                logger.error(f"Failed to build identifier filter: {str(error)}")
+            self._stopped.wait(self._rebuild_interval)
+
+    @property
+    def statistics(self) -> IdentifierFilterStatistics:
+        """Get the size and accuracy of the current filter."""
+        bloom_filter = self._filter
+        if bloom_filter is None:
+            return IdentifierFilterStatistics(
+                is_ready=False,
+                item_count=0,
+                capacity=0,
+                hash_count=0,
+                size_in_bytes=0,
+                target_false_positive_rate=self._error_rate,
+                false_positive_rate=0.0,
+                built_at=None,
+                build_duration=None,
+            )
+
+        return IdentifierFilterStatistics(
+            is_ready=True,
+            item_count=bloom_filter.item_count,
+            capacity=bloom_filter.capacity,
+            hash_count=bloom_filter.hash_count,
+            size_in_bytes=bloom_filter.size_in_bytes,
+            target_false_positive_rate=bloom_filter.error_rate,
+            false_positive_rate=bloom_filter.false_positive_rate,
+            built_at=self._built_at,
+            build_duration=self._build_duration,
+        )
@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+
+class MessageBus(ABC):
+    """Broadcasts messages to every process of the application."""
+
+    @abstractmethod
+    def publish(self, message: str, /) -> None:
+        """
+        Publish a message to all subscribers, including this process.
+
+        :param message: The message to publish.
+        :return: None
+        """
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[str], None], /) -> None:
+        """
+        Call the given callback for every message published on the bus.
+
+        :param callback: The callback receiving the messages.
+        :return: None
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Stop receiving messages and release the resources of the bus.
+
+        :return: None
+        """
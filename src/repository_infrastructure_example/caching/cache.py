@@ -1,10 +1,109 @@
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Set, final
+from collections.abc import Callable, Mapping, Sequence
+from enum import StrEnum, auto
+from typing import Final, NamedTuple, Set, final
 
 from loguru import logger
 
+from repository_infrastructure_example.caching.circuit_breaker import CircuitBreaker
+from repository_infrastructure_example.caching.codecs import Codec, IntegerCodec
+from repository_infrastructure_example.caching.metrics import (
+    CacheMetrics,
+    CacheOutcome,
+    KeyOutcome,
+)
+
+
+# Generation counters are stored as decimal text by all implementations
+_GENERATION_CODEC: Final[IntegerCodec] = IntegerCodec()
+
+
+class SetMembership(StrEnum):
+    """Outcome of checking whether a value is a member of a cached set."""
+
+    MEMBER = auto()
+    NOT_MEMBER = auto()
+    NOT_CACHED = auto()
+
+
+class MembershipCheck(NamedTuple):
+    membership: SetMembership
+    # Seconds until the set expires, None if it does not expire or is not cached
+    ttl: float | None
+
+
+def _get_set_size(value: Set[str], /) -> int:
+    return sum(len(member) for member in value)
+
+
+def _get_lookup_outcome(key: str, data: bytes | None, /) -> KeyOutcome:
+    if data is None:
+        return KeyOutcome(key=key, outcome=CacheOutcome.MISS)
+    return KeyOutcome(key=key, outcome=CacheOutcome.HIT, payload_size=len(data))
+
+
+class DeferredDeletions:
+    """
+    Keys whose deletion failed, e.g. while the circuit of the cache was open.
+
+    Sets of IDs do not expire, so a set that could not be invalidated would
+    be served stale for good once the cache is back. The keys are deleted
+    before the next call that reaches the cache instead. They only live in
+    the memory of the process that failed to delete them.
+    """
+
+    _keys: set[str]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self._keys = set()
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self._keys)
+
+    def add(self, keys: Sequence[str], /) -> None:
+        """
+        Remember keys to delete once the cache can be reached.
+
+        :param keys: The keys that could not be deleted.
+        :return: None
+        """
+        with self._lock:
+            self._keys.update(keys)
+
+    def flush(self, delete_keys: Callable[[Sequence[str]], None], /) -> None:
+        """
+        Delete the remembered keys.
+
+        The keys are only forgotten once deleted, so that concurrent callers
+        wait for the deletion instead of reading the keys in the meantime.
+
+        :param delete_keys: Callable deleting the given keys from the cache.
+        :return: None
+        :raises Exception: If the keys could not be deleted, they are kept.
+        """
+        with self._lock:
+            if not self._keys:
+                return
+
+            keys = sorted(self._keys)
+            delete_keys(keys)
+            self._keys.clear()
+
+        logger.info(f"Deleted {len(keys)} key(s) whose deletion was deferred.")
+
 
 class CacheService(ABC):
+    # Implementations talking to a remote cache set this to skip it while it fails
+    _circuit_breaker: CircuitBreaker | None = None
+    # Implementations that can fail set this to retry the deletions that failed
+    _deferred_deletions: DeferredDeletions | None = None
+    # Implementations set this to record the calls made to them
+    _metrics: CacheMetrics | None = None
+
     @abstractmethod
     def _store_set(self, *, key: str, value: Set[str]) -> None:
         raise NotImplementedError()
@@ -14,22 +113,154 @@ class CacheService(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    def _delete_key(self, key: str, /) -> None:
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _release_lease(self, *, key: str, token: str) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _delete_matching(self, pattern: str, /) -> int:
         raise NotImplementedError()
 
+    @final
+    def _execute[T](
+        self,
+        operation: Callable[[], T],
+        *,
+        operation_name: str,
+        keys: Sequence[str],
+        fallback: T,
+        error_message: str,
+        get_outcomes: Callable[[T], Sequence[KeyOutcome]] | None = None,
+    ) -> T:
+        """
+        Run a cache operation, returning the fallback if it fails.
+
+        Failures are logged instead of raised, as the application has to work
+        without its cache. While the circuit breaker is open, the operation is
+        skipped and the fallback returned right away. Deletions that failed
+        earlier are applied before the operation, so that it never reads an
+        entry that should have been deleted.
+
+        :param operation: The cache operation to run.
+        :param operation_name: The name of the operation to record metrics with.
+        :param keys: The keys the operation is run with.
+        :param fallback: The value to return if the operation fails or is skipped.
+        :param error_message: The message to log if the operation fails.
+        :param get_outcomes: Optional callable returning the outcome for each key
+            given the result of the operation, e.g. whether a lookup was a hit.
+            If None, the operation is recorded as a success for all keys.
+        :return: The result of the operation, or the fallback.
+        """
+        circuit_breaker = self._circuit_breaker
+        if circuit_breaker is not None and not circuit_breaker.allow_request():
+            self._record(operation_name, keys, CacheOutcome.SKIPPED, duration=None)
+            return fallback
+
+        started = time.perf_counter()
+        try:
+            if self._deferred_deletions:
+                self._deferred_deletions.flush(self._delete_keys)
+            result = operation()
+        except Exception as error:
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure()
+            self._record(
+                operation_name,
+                keys,
+                CacheOutcome.ERROR,
+                duration=time.perf_counter() - started,
+            )
+            logger.error(f"{error_message}: {str(error)}")
+            return fallback
+        duration = time.perf_counter() - started
+
+        if circuit_breaker is not None:
+            circuit_breaker.record_success()
+
+        if self._metrics is not None:
+            outcomes = (
+                get_outcomes(result)
+                if get_outcomes is not None
+                else [KeyOutcome(key=key, outcome=CacheOutcome.SUCCESS) for key in keys]
+            )
+            self._metrics.record(
+                operation=operation_name, duration=duration, outcomes=outcomes
+            )
+        return result
+
+    @final
+    def _record(
+        self,
+        operation_name: str,
+        keys: Sequence[str],
+        outcome: CacheOutcome,
+        *,
+        duration: float | None,
+    ) -> None:
+        if self._metrics is not None:
+            self._metrics.record(
+                operation=operation_name,
+                duration=duration,
+                outcomes=[KeyOutcome(key=key, outcome=outcome) for key in keys],
+            )
+
     @final
     def store_set(self, *, key: str, value: Set[str]) -> None:
         """
         Store a set of strings in the cache under the given key.
 
+        Replaces any set stored under the key, atomically with setting its TTL.
+        Empty sets are cached as well.
+
         :param key: The cache key.
         :param value: The set of strings to store.
         :return: None
         """
-        try:
-            self._store_set(key=key, value=value)
-        except Exception as error:
-            logger.error(f"Failed to store set using key '{key}': {str(error)}")
+        self._execute(
+            lambda: self._store_set(key=key, value=value),
+            operation_name="store_set",
+            keys=[key],
+            fallback=None,
+            error_message=f"Failed to store set using key '{key}'",
+            get_outcomes=lambda _: [
+                KeyOutcome(
+                    key=key,
+                    outcome=CacheOutcome.SUCCESS,
+                    payload_size=_get_set_size(value),
+                )
+            ],
+        )
 
     @final
     def get_set(self, key: str, /) -> set[str] | None:
@@ -39,10 +270,254 @@ class CacheService(ABC):
         :param key: The cache key.
         :return: The set of strings if found, otherwise None.
         """
-        try:
-            return self._get_set(key)
-        except Exception as error:
-            logger.error(f"Failed to retrieve set using key '{key}': {str(error)}")
+        return self._execute(
+            lambda: self._get_set(key),
+            operation_name="get_set",
+            keys=[key],
+            fallback=None,
+            error_message=f"Failed to retrieve set using key '{key}'",
+            get_outcomes=lambda members: [
+                KeyOutcome(key=key, outcome=CacheOutcome.MISS)
+                if members is None
+                else KeyOutcome(
+                    key=key,
+                    outcome=CacheOutcome.HIT,
+                    payload_size=_get_set_size(members),
+                )
+            ],
+        )
+
+    @final
+    def add_to_set(self, *, key: str, member: str) -> None:
+        """
+        Add a string to the set stored under the given key.
+
+        Nothing is stored if no set is cached under the key, as a set holding
+        only the new member would be mistaken for the complete set. If the set
+        cannot be updated, the key is deleted instead.
+
+        :param key: The cache key.
+        :param member: The string to add.
+        :return: None
+        """
+
+        def add_to_set() -> bool:
+            self._add_to_set(key=key, member=member)
+            return True
+
+        is_added = self._execute(
+            add_to_set,
+            operation_name="add_to_set",
+            keys=[key],
+            fallback=False,
+            error_message=f"Failed to add to set using key '{key}'",
+        )
+        if not is_added:
+            self.delete_key(key)
+
+    @final
+    def remove_from_set(self, *, key: str, member: str) -> None:
+        """
+        Remove a string from the set stored under the given key.
+
+        If the set cannot be updated, the key is deleted instead.
+
+        :param key: The cache key.
+        :param member: The string to remove.
+        :return: None
+        """
+
+        def remove_from_set() -> bool:
+            self._remove_from_set(key=key, member=member)
+            return True
+
+        is_removed = self._execute(
+            remove_from_set,
+            operation_name="remove_from_set",
+            keys=[key],
+            fallback=False,
+            error_message=f"Failed to remove from set using key '{key}'",
+        )
+        if not is_removed:
+            self.delete_key(key)
+
+    @final
+    def check_member(self, *, key: str, member: str) -> MembershipCheck:
+        """
+        Check whether a string is a member of the set stored under the given key.
+
+        Unlike `get_set`, only the outcome of the check is transferred.
+
+        :param key: The cache key.
+        :param member: The string to look up.
+        :return: Whether the string is a member of the set, or NOT_CACHED if no
+            set is stored under the key or the cache cannot be reached, along
+            with the time until the set expires.
+        """
+        return self._execute(
+            lambda: self._check_member(key=key, member=member),
+            operation_name="check_member",
+            keys=[key],
+            fallback=MembershipCheck(membership=SetMembership.NOT_CACHED, ttl=None),
+            error_message=f"Failed to check set membership using key '{key}'",
+            get_outcomes=lambda check: [
+                KeyOutcome(
+                    key=key,
+                    outcome=CacheOutcome.MISS
+                    if check.membership == SetMembership.NOT_CACHED
+                    else CacheOutcome.HIT,
+                )
+            ],
+        )
+
+    @final
+    def is_member(self, *, key: str, member: str) -> SetMembership:
+        """
+        Check whether a string is a member of the set stored under the given key.
+
+        :param key: The cache key.
+        :param member: The string to look up.
+        :return: Whether the string is a member of the set, or NOT_CACHED if no
+            set is stored under the key or the cache cannot be reached.
+        """
+        return self.check_member(key=key, member=member).membership
+
+    @final
+    def store_value[T](
+        self, *, key: str, value: T, codec: Codec[T], ttl: float | None = None
+    ) -> None:
+        """
+        Store a value in the cache under the given key.
+
+        :param key: The cache key.
+        :param value: The value to store.
+        :param codec: The codec to encode the value with.
+        :param ttl: Optional time in seconds after which the value expires. If
+            None, the TTL of the cache is used. Defaults to None.
+        :return: None
+        """
+        self.store_values(values={key: value}, codec=codec, ttl=ttl)
+
+    @final
+    def get_value[T](self, key: str, /, *, codec: Codec[T]) -> T | None:
+        """
+        Retrieve a value from the cache by the given key.
+
+        :param key: The cache key.
+        :param codec: The codec the value was encoded with.
+        :return: The value if found, otherwise None.
+        """
+        return self.get_values([key], codec=codec).get(key)
+
+    @final
+    def store_values[T](
+        self, *, values: Mapping[str, T], codec: Codec[T], ttl: float | None = None
+    ) -> None:
+        """
+        Store several values in the cache, each under its key.
+
+        :param values: The values to store by their cache keys.
+        :param codec: The codec to encode the values with.
+        :param ttl: Optional time in seconds after which the values expire. If
+            None, the TTL of the cache is used. Defaults to None.
+        :return: None
+        """
+        if not values:
+            return
+
+        keys = list(values)
+        encoded: dict[str, bytes] = {}
+
+        def store_values() -> None:
+            encoded.update({key: codec.encode(value) for key, value in values.items()})
+            self._store_values(values=encoded, ttl=ttl)
+
+        self._execute(
+            store_values,
+            operation_name="store_values",
+            keys=keys,
+            fallback=None,
+            error_message=f"Failed to store values using keys {keys}",
+            get_outcomes=lambda _: [
+                KeyOutcome(
+                    key=key, outcome=CacheOutcome.SUCCESS, payload_size=len(data)
+                )
+                for key, data in encoded.items()
+            ],
+        )
+
+    @final
+    def get_values[T](self, keys: Sequence[str], /, *, codec: Codec[T]) -> dict[str, T]:
+        """
+        Retrieve several values from the cache by their keys.
+
+        :param keys: The cache keys.
+        :param codec: The codec the values were encoded with.
+        :return: The values found, by their cache keys.
+        """
+        if not keys:
+            return {}
+
+        encoded = self._execute(
+            lambda: self._get_values(keys),
+            operation_name="get_values",
+            keys=keys,
+            fallback=[None] * len(keys),
+            error_message=f"Failed to retrieve values using keys {list(keys)}",
+            get_outcomes=lambda results: [
+                _get_lookup_outcome(key, data)
+                for key, data in zip(keys, results, strict=True)
+            ],
+        )
+
+        values: dict[str, T] = {}
+        for key, data in zip(keys, encoded, strict=True):
+            if data is None:
+                continue
+            try:
+                values[key] = codec.decode(data)
+            except ValueError as error:
+                # Treat values that cannot be decoded as missing
+                logger.error(f"Failed to decode value using key '{key}': {str(error)}")
+        return values
+
+    @final
+    def acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        """
+        Acquire the lease stored under the given key, unless another holder has it.
+
+        If the cache cannot be reached, the lease is considered acquired, so
+        that callers do not wait for a holder that does not exist.
+
+        :param key: The key of the lease.
+        :param token: The token identifying the holder.
+        :param ttl: The time in seconds after which the lease expires.
+        :return: True if the lease was acquired, False if another holder has it.
+        """
+        return self._execute(
+            lambda: self._acquire_lease(key=key, token=token, ttl=ttl),
+            operation_name="acquire_lease",
+            keys=[key],
+            fallback=True,
+            error_message=f"Failed to acquire lease using key '{key}'",
+        )
+
+    @final
+    def release_lease(self, *, key: str, token: str) -> None:
+        """
+        Release the lease stored under the given key if the given token holds it.
+
+        :param key: The key of the lease.
+        :param token: The token identifying the holder.
+        :return: None
+        """
+        self._execute(
+            lambda: self._release_lease(key=key, token=token),
+            operation_name="release_lease",
+            keys=[key],
+            fallback=None,
+            error_message=f"Failed to release lease using key '{key}'",
+        )
 
     @final
     def delete_key(self, key: str, /) -> None:
@@ -52,7 +527,85 @@ class CacheService(ABC):
         :param key: The cache key.
         :return: None
         """
-        try:
-            self._delete_key(key)
-        except Exception as error:
-            logger.error(f"Failed to delete key '{key}': {str(error)}")
+        self.delete_keys([key])
+
+    @final
+    def delete_keys(self, keys: Sequence[str], /) -> None:
+        """
+        Delete the cache entries for the given keys.
+
+        If the cache cannot be reached, the keys are deleted before the next
+        call that reaches it.
+
+        :param keys: The cache keys.
+        :return: None
+        """
+        if not keys:
+            return
+
+        def delete_keys() -> bool:
+            self._delete_keys(keys)
+            return True
+
+        is_deleted = self._execute(
+            delete_keys,
+            operation_name="delete_keys",
+            keys=keys,
+            fallback=False,
+            error_message=f"Failed to delete keys {list(keys)}",
+        )
+        if not is_deleted and self._deferred_deletions is not None:
+            self._deferred_deletions.add(keys)
+
+    @final
+    def get_generation(self, key: str, /) -> int | None:
+        """
+        Get the generation counter stored under the given key, without starting it.
+
+        :param key: The key of the generation counter.
+        :return: The current generation, or None if the counter has not been
+            started or the cache cannot be reached.
+        """
+        return self.get_value(key, codec=_GENERATION_CODEC)
+
+    @final
+    def start_generation(self, key: str, /) -> int:
+        """
+        Get the generation counter stored under the given key, starting it if missing.
+
+        Missing counters are started at the current time in nanoseconds, so
+        that a counter that was deleted, evicted or expired never returns to a
+        generation that was used before. Deleting a counter therefore
+        invalidates all keys built with it at once. If the cache cannot be
+        reached, a generation that is not used by any key is returned, so that
+        no stale entry is read.
+
+        :param key: The key of the generation counter.
+        :return: The current generation.
+        """
+        return self._execute(
+            lambda: self._start_generation(key, initial=time.time_ns()),
+            operation_name="start_generation",
+            keys=[key],
+            fallback=time.time_ns(),
+            error_message=f"Failed to start generation using key '{key}'",
+        )
+
+    @final
+    def delete_matching(self, pattern: str, /) -> int:
+        """
+        Delete all cache entries whose keys match the given glob-style pattern.
+
+        Entries are deleted in batches without blocking the cache, which may
+        take a while for large caches.
+
+        :param pattern: The pattern to match keys against.
+        :return: The number of entries deleted.
+        """
+        return self._execute(
+            lambda: self._delete_matching(pattern),
+            operation_name="delete_matching",
+            keys=[pattern],
+            fallback=0,
+            error_message=f"Failed to delete keys matching '{pattern}'",
+        )
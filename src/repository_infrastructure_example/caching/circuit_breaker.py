@@ -0,0 +1,118 @@
+import threading
+import time
+from enum import StrEnum, auto
+
+from loguru import logger
+
+
+class CircuitState(StrEnum):
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency until it has had time to recover.
+
+    The circuit opens after a number of consecutive failures. While open,
+    calls are rejected right away. Once the reset timeout has passed, a single
+    probe call is let through: the circuit closes if it succeeds and opens
+    again if it fails.
+    """
+
+    _name: str
+    _failure_threshold: int
+    _reset_timeout: float
+    _state: CircuitState
+    _failure_count: int
+    _opened_at: float
+    _lock: threading.Lock
+
+    def __init__(
+        self, *, name: str, failure_threshold: int, reset_timeout: float
+    ) -> None:
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._failure_count = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """Get the current state of the circuit."""
+        return self._state
+
+    @property
+    def is_rejecting(self) -> bool:
+        """
+        Get whether calls are currently rejected.
+
+        Unlike `allow_request`, this never lets the probe of a half-open circuit
+        through, so it can be asked without making a call.
+        """
+        if self._state == CircuitState.CLOSED:
+            return False
+        if self._state == CircuitState.HALF_OPEN:
+            return True
+        return time.monotonic() - self._opened_at < self._reset_timeout
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may be made.
+
+        :return: True if the circuit is closed or the call is the probe of a
+            half-open circuit, False otherwise.
+        """
+        if self._state == CircuitState.CLOSED:
+            return True
+
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return True
+            # Only a single probe is let through at a time
+            if self._state == CircuitState.HALF_OPEN:
+                return False
+            if time.monotonic() - self._opened_at < self._reset_timeout:
+                return False
+
+            self._state = CircuitState.HALF_OPEN
+            return True
+
+    def record_success(self) -> None:
+        """
+        Record a successful call, closing the circuit.
+
+        :return: None
+        """
+        if self._state == CircuitState.CLOSED and self._failure_count == 0:
+            return
+
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                logger.info(f"Circuit '{self._name}' closed, calls are resumed.")
+            self._state = CircuitState.CLOSED
+            self._failure_count = 0
+
+    def record_failure(self) -> None:
+        """
+        Record a failed call, opening the circuit if the threshold is reached.
+
+        :return: None
+        """
+        with self._lock:
+            self._failure_count += 1
+            if (
+                self._state == CircuitState.HALF_OPEN
+                or self._failure_count >= self._failure_threshold
+            ):
+                if self._state != CircuitState.OPEN:
+                    logger.warning(
+                        f"Circuit '{self._name}' opened after {self._failure_count} "
+                        f"consecutive failure(s), calls are skipped for "
+                        f"{self._reset_timeout}s."
+                    )
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,183 @@
+import threading
+from collections import OrderedDict
+from typing import override
+
+from pydantic import BaseModel, Field
+from redis.cache import (
+    CacheConfigurationInterface,
+    CacheEntry,
+    CacheEntryStatus,
+    CacheKey,
+    DefaultCache,
+)
+
+
+class ClientSideCacheStatistics(BaseModel):
+    max_entries: int = Field(description="The maximum number of cached replies.")
+    entries: int = Field(description="The number of currently cached replies.")
+    lookups: int = Field(description="The number of cachable commands sent.")
+    hits: int = Field(description="The number of commands served from the cache.")
+    misses: int = Field(description="The number of commands sent to Redis.")
+    hit_ratio: float | None = Field(
+        description="The ratio of hits among lookups, None before the first lookup."
+    )
+    invalidation_messages: int = Field(
+        description="The number of invalidation messages received from Redis."
+    )
+    invalidated_entries: int = Field(
+        description="The number of cached replies dropped by invalidation messages."
+    )
+    flushes: int = Field(
+        description="The number of times the whole cache was dropped, because "
+        "Redis was flushed or a connection was lost."
+    )
+    evictions: int = Field(
+        description="The number of cached replies evicted to stay within bounds."
+    )
+
+
+class ClientSideCache(DefaultCache):
+    """
+    Client-side cache of Redis replies, kept up to date by key tracking.
+
+    Redis remembers the keys read by a connection and sends an invalidation
+    message once one of them is written to, by any client. redis-py processes
+    these messages before the next command on the connection and drops the
+    affected replies. Only cachable commands sent outside of pipelines and
+    scripts are served from this cache.
+
+    Unlike the default cache, replies are indexed by key, so that an
+    invalidation message does not scan the whole cache, and hits, misses and
+    invalidations are counted.
+    """
+
+    _replies_by_key: dict[str, set[CacheKey]]
+    _statistics_lock: threading.Lock
+    _lookups: int
+    _misses: int
+    _invalidation_messages: int
+    _invalidated_entries: int
+    _flushes: int
+    _evictions: int
+
+    def __init__(self, cache_config: CacheConfigurationInterface) -> None:
+        super().__init__(cache_config)
+        self._replies_by_key = {}
+        self._statistics_lock = threading.Lock()
+        self._lookups = 0
+        self._misses = 0
+        self._invalidation_messages = 0
+        self._invalidated_entries = 0
+        self._flushes = 0
+        self._evictions = 0
+
+    @override
+    def is_cachable(self, key: CacheKey) -> bool:
+        is_cachable = self.config.is_allowed_to_cache(key.command)
+        # redis-py asks with the bare command before sending a command. `set`
+        # checks the configuration itself, so that every call is a lookup.
+        if is_cachable:
+            with self._statistics_lock:
+                self._lookups += 1
+        return is_cachable
+
+    @override
+    def set(self, entry: CacheEntry) -> bool:
+        if not self.config.is_allowed_to_cache(entry.cache_key.command):
+            return False
+
+        # Placeholders are stored while a reply is read from Redis
+        if (
+            entry.status == CacheEntryStatus.IN_PROGRESS
+            and entry.cache_key not in self._entries
+        ):
+            with self._statistics_lock:
+                self._misses += 1
+
+        self._entries[entry.cache_key] = entry
+        self.eviction_policy.touch(entry.cache_key)
+        for redis_key in _get_redis_keys(entry.cache_key):
+            self._replies_by_key.setdefault(redis_key, set()).add(entry.cache_key)
+
+        evicted_count = 0
+        while self.config.is_exceeds_max_size(len(self._entries)):
+            self._unindex(self.eviction_policy.evict_next())
+            evicted_count += 1
+
+        if evicted_count:
+            with self._statistics_lock:
+                self._evictions += evicted_count
+        return True
+
+    @override
+    def delete_by_cache_keys(self, cache_keys: list[CacheKey]) -> list[bool]:
+        response: list[bool] = []
+        for cache_key in cache_keys:
+            is_deleted = self._entries.pop(cache_key, None) is not None
+            if is_deleted:
+                self._unindex(cache_key)
+            response.append(is_deleted)
+        return response
+
+    @override
+    def delete_by_redis_keys(self, redis_keys: list[bytes]) -> list[bool]:
+        # Only called with the keys of an invalidation message
+        response: list[bool] = []
+        for redis_key in redis_keys:
+            cache_keys = self._replies_by_key.pop(_decode(redis_key), set())
+            for cache_key in cache_keys:
+                if self._entries.pop(cache_key, None) is not None:
+                    self._unindex(cache_key)
+                    response.append(True)
+
+        with self._statistics_lock:
+            self._invalidation_messages += 1
+            self._invalidated_entries += len(response)
+        return response
+
+    @override
+    def flush(self) -> int:
+        self._replies_by_key.clear()
+        with self._statistics_lock:
+            self._flushes += 1
+        return super().flush()
+
+    @property
+    def _entries(self) -> OrderedDict[CacheKey, CacheEntry]:
+        return self.collection  # pyright: ignore
+
+    def _unindex(self, cache_key: CacheKey) -> None:
+        for redis_key in _get_redis_keys(cache_key):
+            cache_keys = self._replies_by_key.get(redis_key)
+            if cache_keys is None:
+                continue
+            cache_keys.discard(cache_key)
+            if not cache_keys:
+                del self._replies_by_key[redis_key]
+
+    @property
+    def statistics(self) -> ClientSideCacheStatistics:
+        """Get the statistics recorded so far."""
+        with self._statistics_lock:
+            hits = max(self._lookups - self._misses, 0)
+            return ClientSideCacheStatistics(
+                max_entries=self.config.get_max_size(),
+                entries=self.size,
+                lookups=self._lookups,
+                hits=hits,
+                misses=self._misses,
+                hit_ratio=hits / self._lookups if self._lookups else None,
+                invalidation_messages=self._invalidation_messages,
+                invalidated_entries=self._invalidated_entries,
+                flushes=self._flushes,
+                evictions=self._evictions,
+            )
+
+
+def _decode(redis_key: str | bytes, /) -> str:
+    return redis_key.decode() if isinstance(redis_key, bytes) else redis_key
+
+
+def _get_redis_keys(cache_key: CacheKey, /) -> list[str]:
+    redis_keys: tuple[str | bytes, ...] = cache_key.redis_keys  # pyright: ignore
+    return [_decode(redis_key) for redis_key in redis_keys]
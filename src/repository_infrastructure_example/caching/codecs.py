@@ -0,0 +1,111 @@
+import json
+import zlib
+from abc import ABC, abstractmethod
+from typing import Final
+
+from pydantic import BaseModel
+
+# First byte of values encoded by `CompressingCodec`
+_UNCOMPRESSED: Final[bytes] = b"\x00"
+_ZLIB_COMPRESSED: Final[bytes] = b"\x01"
+
+
+class Codec[T](ABC):
+    """Converts values to and from the bytes stored in the cache."""
+
+    @abstractmethod
+    def encode(self, value: T, /) -> bytes:
+        """
+        Encode a value for storage.
+
+        :param value: The value to encode.
+        :return: The encoded value.
+        """
+
+    @abstractmethod
+    def decode(self, data: bytes, /) -> T:
+        """
+        Decode a value encoded with `encode`.
+
+        :param data: The encoded value.
+        :return: The decoded value.
+        :raises ValueError: If the data is not a valid encoding.
+        """
+
+
+class BytesCodec(Codec[bytes]):
+    """Stores bytes as they are, e.g. to copy values between caches."""
+
+    def encode(self, value: bytes, /) -> bytes:
+        return value
+
+    def decode(self, data: bytes, /) -> bytes:
+        return data
+
+
+class IntegerCodec(Codec[int]):
+    """Stores integers as decimal text, like the generation counters."""
+
+    def encode(self, value: int, /) -> bytes:
+        return str(value).encode()
+
+    def decode(self, data: bytes, /) -> int:
+        return int(data)
+
+
+class ModelCodec[ModelT: BaseModel](Codec[ModelT]):
+    """
+    Encodes models compactly.
+
+    Only the field values are stored, as a JSON array in the order the fields
+    are declared. Field names are implied by the model type, which is safe
+    because cache keys are scoped to the application version.
+    """
+
+    _model_type: type[ModelT]
+
+    def __init__(self, model_type: type[ModelT]) -> None:
+        self._model_type = model_type
+
+    def encode(self, value: ModelT, /) -> bytes:
+        values = list(value.model_dump(mode="json").values())
+        return json.dumps(values, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes, /) -> ModelT:
+        values: list[object] = json.loads(data)
+        fields = dict(zip(self._model_type.model_fields, values, strict=True))
+        return self._model_type.model_validate(fields)
+
+
+class CompressingCodec[T](Codec[T]):
+    """
+    Compresses the encodings of another codec that reach a size threshold.
+
+    Encodings are prefixed with a byte telling whether they are compressed, so
+    that the threshold can be changed without invalidating stored values.
+    """
+
+    _codec: Codec[T]
+    _threshold: int
+
+    def __init__(self, codec: Codec[T], *, threshold: int) -> None:
+        self._codec = codec
+        self._threshold = threshold
+
+    def encode(self, value: T, /) -> bytes:
+        data = self._codec.encode(value)
+        if len(data) < self._threshold:
+            return _UNCOMPRESSED + data
+        return _ZLIB_COMPRESSED + zlib.compress(data)
+
+    def decode(self, data: bytes, /) -> T:
+        header, payload = data[:1], data[1:]
+        if header == _UNCOMPRESSED:
+            return self._codec.decode(payload)
+        if header == _ZLIB_COMPRESSED:
+            try:
+                payload = zlib.decompress(payload)
+            except zlib.error as error:
+                raise ValueError(f"Invalid compressed value: {str(error)}") from error
+            return self._codec.decode(payload)
+        raise ValueError(f"Unknown encoding header {header!r}")
@@ -0,0 +1,312 @@
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from uuid import UUID
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from repository_infrastructure_example.caching.bus import MessageBus
+from repository_infrastructure_example.domain.organisation import Organisation
+
+
+class _DirectorySnapshot(NamedTuple):
+    by_id: Mapping[UUID, Organisation]
+    # Version stamp of the organisations the snapshot was loaded from
+    version: int
+    # When the snapshot was last known to be current, in monotonic seconds
+    verified_at: float
+
+
+def _apply_change(
+    by_id: dict[UUID, Organisation],
+    organisation_id: UUID,
+    organisation: Organisation | None,
+) -> None:
+    if organisation is None:
+        by_id.pop(organisation_id, None)
+    else:
+        by_id[organisation_id] = organisation
+
+
+class OrganisationDirectoryStatistics(BaseModel):
+    is_ready: bool = Field(
+        description="Whether the directory has been loaded and answers lookups."
+    )
+    organisation_count: int = Field(
+        description="The number of organisations in the directory."
+    )
+    version: int | None = Field(
+        description="The version of the organisations the directory was loaded "
+        "from, if loaded."
+    )
+    verified_at: datetime | None = Field(
+        description="When the directory was last known to be current, if ever."
+    )
+    staleness: float | None = Field(
+        description="The time in seconds since the directory was last known to be "
+        "current, an upper bound on how long a change made by another process "
+        "may have gone unnoticed, if loaded."
+    )
+    refresh_interval: float = Field(
+        description="The interval in seconds at which the directory is checked "
+        "against the database, bounding its staleness while changes are not "
+        "broadcast."
+    )
+    reload_count: int = Field(
+        description="The number of times the directory was loaded."
+    )
+
+
+class OrganisationDirectory:
+    """
+    Replicated in-process copy of all organisations.
+
+    The organisations are held in an immutable snapshot that is replaced as a
+    whole on every change, so that lookups read a consistent snapshot without
+    locking. Changes made by this process are applied right away and
+    broadcast to all other processes, which reload the directory in the
+    background. The version of the organisations in
+    the database is also checked periodically, so that changes missed by the
+    broadcast, e.g. while disconnected from the bus, are picked up after the
+    refresh interval.
+
+    Until the directory has been loaded, every lookup misses.
+    """
+
+    _load_organisations: Callable[[], Iterable[Organisation]]
+    _get_version: Callable[[], int]
+    _message_bus: MessageBus | None
+    _refresh_interval: float
+
+    _snapshot: _DirectorySnapshot | None
+    # Changes made by this process while the organisations are being loaded,
+    # None if they are not, an organisation ID maps to None once deleted
+    _local_changes: dict[UUID, Organisation | None] | None
+    _reload_count: int
+    _lock: threading.Lock
+    _refresh_lock: threading.Lock
+    _changed: threading.Event
+    _stopped: threading.Event
+    _thread: threading.Thread | None
+
+    def __init__(
+        self,
+        *,
+        load_organisations: Callable[[], Iterable[Organisation]],
+        get_version: Callable[[], int],
+        message_bus: MessageBus | None,
+        refresh_interval: float,
+    ) -> None:
+        self._load_organisations = load_organisations
+        self._get_version = get_version
+        self._message_bus = message_bus
+        self._refresh_interval = refresh_interval
+
+        self._snapshot = None
+        self._local_changes = None
+        self._reload_count = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def get(self, organisation_id: UUID) -> Organisation | None:
+        """
+        Look an organisation up by its ID.
+
+        :param organisation_id: The ID of the organisation.
+        :return: The organisation, or None if it is not in the directory.
+        """
+        snapshot = self._snapshot
+        return snapshot.by_id.get(organisation_id) if snapshot else None
+
+    def get_all(self) -> list[Organisation] | None:
+        """
+        Get all organisations.
+
+        :return: The organisations, or None if the directory is not loaded yet.
+        """
+        snapshot = self._snapshot
+        return list(snapshot.by_id.values()) if snapshot else None
+
+    def put(self, organisation: Organisation) -> None:
+        """
+        Add or replace an organisation written by this process.
+
+        Must be called after the organisation has been persisted.
+
+        :param organisation: The created or updated organisation.
+        :return: None
+        """
+        self._apply_local_change(organisation.id, organisation)
+        self._broadcast(organisation.id)
+
+    def remove(self, organisation_id: UUID) -> None:
+        """
+        Remove an organisation deleted by this process.
+
+        Must be called after the organisation has been deleted.
+
+        :param organisation_id: The ID of the deleted organisation.
+        :return: None
+        """
+        self._apply_local_change(organisation_id, None)
+        self._broadcast(organisation_id)
+
+    def _apply_local_change(
+        self, organisation_id: UUID, organisation: Organisation | None
+    ) -> None:
+        with self._lock:
+            # Applied again once the organisations being loaded replace the
+            # snapshot, since they may have been read before the change
+            if self._local_changes is not None:
+                self._local_changes[organisation_id] = organisation
+
+            snapshot = self._snapshot
+            if snapshot is not None:
+                # Copied, so that readers of the current snapshot are unaffected
+                by_id = dict(snapshot.by_id)
+                _apply_change(by_id, organisation_id, organisation)
+                self._snapshot = snapshot._replace(by_id=by_id)
+
+    def _broadcast(self, organisation_id: UUID) -> None:
+        if self._message_bus is None:
+            return
+
+        try:
+            self._message_bus.publish(str(organisation_id))
+        except Exception as error:
+            logger.error(
+                f"Failed to broadcast the change of organisation "
+                f"'{organisation_id}': {str(error)}"
+            )
+
+    def _on_message(self, message: str) -> None:
+        # Reloaded by the refresher, so that the bus is not blocked
+        self._changed.set()
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """
+        Reload the organisations if they have changed since they were loaded.
+
+        :param force: Whether to reload the organisations even if their version
+            has not changed. Defaults to False.
+        :return: True if the organisations were reloaded, False otherwise.
+        """
+        with self._refresh_lock:
+            return self._refresh(force=force)
+
+    def _refresh(self, *, force: bool) -> bool:
+        # Must be called while holding the refresh lock. The version is read
+        # before the organisations, so that changes made by other processes
+        # while loading them are picked up by the next refresh
+        verified_at = time.monotonic()
+        version = self._get_version()
+
+        with self._lock:
+            snapshot = self._snapshot
+            if not force and snapshot is not None and snapshot.version == version:
+                self._snapshot = snapshot._replace(verified_at=verified_at)
+                return False
+            local_changes: dict[UUID, Organisation | None] = {}
+            self._local_changes = local_changes
+
+        started = time.perf_counter()
+        try:
+            organisations = list(self._load_organisations())
+        except Exception:
+            with self._lock:
+                self._local_changes = None
+            raise
+
+        by_id = {organisation.id: organisation for organisation in organisations}
+        with self._lock:
+            for organisation_id, organisation in local_changes.items():
+                _apply_change(by_id, organisation_id, organisation)
+            self._local_changes = None
+            self._snapshot = _DirectorySnapshot(
+                by_id=by_id, version=version, verified_at=verified_at
+            )
+            self._reload_count += 1
+
+        logger.debug(
+            f"Loaded {len(organisations)} organisations into the directory in "
+            f"{time.perf_counter() - started:.3f}s."
+        )
+        return True
+
+    def start(self) -> None:
+        """
+        Load the directory in the background and keep it up to date.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        if self._message_bus is not None:
+            self._message_bus.subscribe(self._on_message)
+
+        self._thread = threading.Thread(
+            target=self._refresh_periodically,
+            name="organisation-directory",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop keeping the directory up to date.
+
+        :return: None
+        """
+        self._stopped.set()
+        self._changed.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_periodically(self) -> None:
+        is_changed = False
+        while not self._stopped.is_set():
+            try:
+                self.refresh(force=is_changed)
+            except Exception as error:
+                logger.error(
+                    f"Failed to refresh the organisation directory: {str(error)}"
+                )
+
+            # Woken early by changes broadcast by other processes
+            is_changed = self._changed.wait(self._refresh_interval)
+            self._changed.clear()
+
+    @property
+    def statistics(self) -> OrganisationDirectoryStatistics:
+        """Get the size and staleness of the directory."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return OrganisationDirectoryStatistics(
+                is_ready=False,
+                organisation_count=0,
+                version=None,
+                verified_at=None,
+                staleness=None,
+                refresh_interval=self._refresh_interval,
+                reload_count=self._reload_count,
+            )
+
+        staleness = time.monotonic() - snapshot.verified_at
+        return OrganisationDirectoryStatistics(
+            is_ready=True,
+            organisation_count=len(snapshot.by_id),
+            version=snapshot.version,
+            verified_at=datetime.now(timezone.utc) - timedelta(seconds=staleness),
+            staleness=staleness,
+            refresh_interval=self._refresh_interval,
+            reload_count=self._reload_count,
+        )
@@ -0,0 +1,720 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Callable, Mapping, Sequence
+from enum import IntEnum
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Final, NamedTuple, Set, override
+
+from loguru import logger
+
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    MembershipCheck,
+    SetMembership,
+)
+from repository_infrastructure_example.caching.metrics import CacheMetrics
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+_MAGIC: Final[bytes] = b"RIECACHE"
+# Files of another format version are discarded
+_FORMAT_VERSION: Final[int] = 2
+
+# Magic and format version
+_DATA_HEADER: Final[struct.Struct] = struct.Struct("<8sI")
+# Kind, expiry as a Unix timestamp (0 if none), key length and value length
+_RECORD_HEADER: Final[struct.Struct] = struct.Struct("<BdII")
+# Magic, format version and the size of the indexed data file
+_INDEX_HEADER: Final[struct.Struct] = struct.Struct("<8sIQ")
+# Kind, expiry, value offset, value length and key length
+_INDEX_ENTRY: Final[struct.Struct] = struct.Struct("<BdQII")
+# Magic and format version
+_STAMPS_HEADER: Final[struct.Struct] = struct.Struct("<8sI")
+# Version stamp and length of the key family it is for
+_STAMP_ENTRY: Final[struct.Struct] = struct.Struct("<qI")
+
+# Members of a set are stored one per line, identifiers never contain one
+_MEMBER_SEPARATOR: Final[bytes] = b"\n"
+# Share of the maximum size kept when compacting, so that compactions are rare
+_COMPACTED_SIZE_RATIO: Final[float] = 0.5
+
+
+class _RecordKind(IntEnum):
+    VALUE = 0
+    SET = 1
+    # Marks a key as deleted
+    TOMBSTONE = 2
+
+
+class _IndexEntry(NamedTuple):
+    kind: _RecordKind
+    expires_at: float | None
+    # Position and size of the value in the data file
+    offset: int
+    length: int
+    # Size of the whole record in the data file
+    record_size: int
+
+
+def _encode_members(members: Set[str], /) -> bytes:
+    return _MEMBER_SEPARATOR.join(member.encode() for member in members)
+
+
+def _decode_members(data: bytes, /) -> set[str]:
+    if not data:
+        return set()
+    return {member.decode() for member in data.split(_MEMBER_SEPARATOR)}
+
+
+class DiskCacheService(CacheService):
+    """
+    In-process cache persisted to a local file, so that it survives restarts.
+
+    Entries are appended to a data file, which is memory-mapped for reads, and
+    located by an index held in memory. The index is written next to the data
+    file when the cache is closed, so that a restarted process only scans the
+    entries appended since. Once the file exceeds its maximum size, it is
+    compacted: replaced and expired entries are dropped, and the oldest
+    entries evicted. Entries are not synced to the disk, they survive process
+    restarts but not necessarily crashes of the machine.
+
+    Next to the file, the version stamps of the data the entries were read
+    from are recorded per key family. `validate` drops the entries of a
+    family once its stamp has moved on, so that entries from before a change
+    of the data, e.g. written by an earlier process, are never served.
+    Entries never validated are all dropped. A file is locked by the process
+    opening it. TTLs are not renewed on reads.
+    """
+
+    _data_path: Path
+    _index_path: Path
+    _stamps_path: Path
+    _ttl_policy: TtlPolicy
+    _get_key_family: Callable[[str], str]
+    _max_size: int
+    _lock: threading.RLock
+    _lock_fd: int
+    _data_fd: int
+    _map: mmap.mmap
+    _stamps: dict[str, int]
+    _size: int
+    _index: dict[str, _IndexEntry]
+
+    def __init__(
+        self,
+        *,
+        path: Path,
+        ttl_policy: TtlPolicy,
+        get_key_family: Callable[[str], str],
+        max_size: int,
+        metrics: CacheMetrics | None = None,
+    ) -> None:
+        self._data_path = path.with_suffix(".data")
+        self._index_path = path.with_suffix(".index")
+        self._stamps_path = path.with_suffix(".stamps")
+        self._ttl_policy = ttl_policy
+        self._get_key_family = get_key_family
+        self._max_size = max_size
+        self._metrics = metrics
+        self._lock = threading.RLock()
+        self._index = {}
+
+        # Raises BlockingIOError if another process holds the file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = os.open(path.with_suffix(".lock"), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self._lock_fd)
+            raise
+
+        self._data_fd = os.open(self._data_path, os.O_RDWR | os.O_CREAT)
+        self._load()
+
+    @property
+    def stamps(self) -> Mapping[str, int]:
+        """Get the version stamps the entries of each key family are valid for."""
+        return dict(self._stamps)
+
+    def _load(self) -> None:
+        header = os.pread(self._data_fd, _DATA_HEADER.size, 0)
+        if len(header) < _DATA_HEADER.size or _DATA_HEADER.unpack(header)[:2] != (
+            _MAGIC,
+            _FORMAT_VERSION,
+        ):
+            # A new file, or one of another format, which is started over
+            os.ftruncate(self._data_fd, 0)
+            os.pwrite(self._data_fd, _DATA_HEADER.pack(_MAGIC, _FORMAT_VERSION), 0)
+            self._stamps = {}
+        else:
+            self._stamps = self._load_stamps()
+
+        self._size = os.fstat(self._data_fd).st_size
+        self._map = mmap.mmap(self._data_fd, 0, access=mmap.ACCESS_READ)
+        indexed_size = self._load_index()
+        self._scan(indexed_size)
+
+        # The index is written again on close, a stale one must not be loaded
+        # after the file was appended to or compacted
+        self._index_path.unlink(missing_ok=True)
+        logger.info(
+            f"Loaded {len(self._index)} entries from the disk cache "
+            f"'{self._data_path}'."
+        )
+
+    def _load_stamps(self) -> dict[str, int]:
+        try:
+            data = self._stamps_path.read_bytes()
+        except FileNotFoundError:
+            return {}
+
+        if len(data) < _STAMPS_HEADER.size or _STAMPS_HEADER.unpack_from(data) != (
+            _MAGIC,
+            _FORMAT_VERSION,
+        ):
+            return {}
+
+        stamps: dict[str, int] = {}
+        position = _STAMPS_HEADER.size
+        while position + _STAMP_ENTRY.size <= len(data):
+            stamp, family_length = _STAMP_ENTRY.unpack_from(data, position)
+            position += _STAMP_ENTRY.size
+            stamps[data[position : position + family_length].decode()] = stamp
+            position += family_length
+        return stamps
+
+    def _write_stamps(self) -> None:
+        parts = [_STAMPS_HEADER.pack(_MAGIC, _FORMAT_VERSION)]
+        for family, stamp in self._stamps.items():
+            encoded_family = family.encode()
+            parts.append(_STAMP_ENTRY.pack(stamp, len(encoded_family)))
+            parts.append(encoded_family)
+
+        # Replaced atomically, after the dropped entries have been written
+        temporary_path = self._stamps_path.with_suffix(".stamps.tmp")
+        temporary_path.write_bytes(b"".join(parts))
+        temporary_path.replace(self._stamps_path)
+
+    def _load_index(self) -> int:
+        """
+        Load the index written when the file was last closed.
+
+        :return: The size of the data file covered by the index, the size of the
+            header if there is no valid index.
+        """
+        try:
+            data = self._index_path.read_bytes()
+        except FileNotFoundError:
+            return _DATA_HEADER.size
+
+        if len(data) < _INDEX_HEADER.size:
+            return _DATA_HEADER.size
+        magic, format_version, indexed_size = _INDEX_HEADER.unpack_from(data)
+        if (
+            magic != _MAGIC
+            or format_version != _FORMAT_VERSION
+            or indexed_size > self._size
+        ):
+            return _DATA_HEADER.size
+
+        position = _INDEX_HEADER.size
+        while position + _INDEX_ENTRY.size <= len(data):
+            kind, expires_at, offset, length, key_length = _INDEX_ENTRY.unpack_from(
+                data, position
+            )
+            position += _INDEX_ENTRY.size
+            key = data[position : position + key_length].decode()
+            position += key_length
+            self._index[key] = _IndexEntry(
+                kind=_RecordKind(kind),
+                expires_at=expires_at or None,
+                offset=offset,
+                length=length,
+                record_size=_RECORD_HEADER.size + key_length + length,
+            )
+        return indexed_size
+
+    def _scan(self, position: int, /) -> None:
+        """
+        Index the records of the data file from the given position on.
+
+        A record cut off by a crash while appending it is truncated.
+
+        :param position: The position of the first record to index.
+        :return: None
+        """
+        while position + _RECORD_HEADER.size <= self._size:
+            kind, expires_at, key_length, length = _RECORD_HEADER.unpack_from(
+                self._map, position
+            )
+            key_offset = position + _RECORD_HEADER.size
+            record_size = _RECORD_HEADER.size + key_length + length
+            if position + record_size > self._size:
+                break
+
+            key = self._map[key_offset : key_offset + key_length].decode()
+            self._index.pop(key, None)
+            if kind != _RecordKind.TOMBSTONE:
+                self._index[key] = _IndexEntry(
+                    kind=_RecordKind(kind),
+                    expires_at=expires_at or None,
+                    offset=key_offset + key_length,
+                    length=length,
+                    record_size=record_size,
+                )
+            position += record_size
+
+        if position < self._size:
+            os.ftruncate(self._data_fd, position)
+            self._size = position
+            self._remap()
+
+    def _write_index(self) -> None:
+        parts = [_INDEX_HEADER.pack(_MAGIC, _FORMAT_VERSION, self._size)]
+        for key, entry in self._index.items():
+            encoded_key = key.encode()
+            parts.append(
+                _INDEX_ENTRY.pack(
+                    entry.kind,
+                    entry.expires_at or 0,
+                    entry.offset,
+                    entry.length,
+                    len(encoded_key),
+                )
+            )
+            parts.append(encoded_key)
+
+        # Replaced atomically, so that a crash never leaves half an index
+        temporary_path = self._index_path.with_suffix(".index.tmp")
+        temporary_path.write_bytes(b"".join(parts))
+        temporary_path.replace(self._index_path)
+
+    def _remap(self) -> None:
+        self._map.close()
+        self._map = mmap.mmap(self._data_fd, 0, access=mmap.ACCESS_READ)
+
+    def _get_map(self) -> mmap.mmap:
+        # Appended records are only visible once the file is mapped again
+        if len(self._map) < self._size:
+            self._remap()
+        return self._map
+
+    def _reset(self) -> None:
+        os.ftruncate(self._data_fd, 0)
+        os.pwrite(self._data_fd, _DATA_HEADER.pack(_MAGIC, _FORMAT_VERSION), 0)
+        self._size = _DATA_HEADER.size
+        self._index.clear()
+        self._remap()
+
+    def _append(
+        self,
+        kind: _RecordKind,
+        key: str,
+        value: bytes = b"",
+        *,
+        expires_at: float | None = None,
+    ) -> None:
+        # Must be called while holding the lock
+        encoded_key = key.encode()
+        record = b"".join(
+            (
+                _RECORD_HEADER.pack(
+                    kind, expires_at or 0, len(encoded_key), len(value)
+                ),
+                encoded_key,
+                value,
+            )
+        )
+        os.pwrite(self._data_fd, record, self._size)
+
+        self._index.pop(key, None)
+        if kind != _RecordKind.TOMBSTONE:
+            self._index[key] = _IndexEntry(
+                kind=kind,
+                expires_at=expires_at,
+                offset=self._size + _RECORD_HEADER.size + len(encoded_key),
+                length=len(value),
+                record_size=len(record),
+            )
+        self._size += len(record)
+
+        if self._size > self._max_size:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Rewrite the data file with the live entries only, evicting the oldest.
+
+        :return: None
+        """
+        now = time.time()
+        entries = [
+            (key, entry)
+            for key, entry in self._index.items()
+            if entry.expires_at is None or entry.expires_at > now
+        ]
+
+        # Entries are indexed in the order they were written, oldest first
+        target_size = int(self._max_size * _COMPACTED_SIZE_RATIO)
+        live_size = _DATA_HEADER.size + sum(entry.record_size for _, entry in entries)
+        evicted_count = 0
+        while evicted_count < len(entries) and live_size > target_size:
+            live_size -= entries[evicted_count][1].record_size
+            evicted_count += 1
+        entries = entries[evicted_count:]
+
+        data = self._get_map()
+        parts = [_DATA_HEADER.pack(_MAGIC, _FORMAT_VERSION)]
+        index: dict[str, _IndexEntry] = {}
+        size = _DATA_HEADER.size
+        for key, entry in entries:
+            end = entry.offset + entry.length
+            parts.append(data[end - entry.record_size : end])
+            index[key] = entry._replace(offset=size + entry.record_size - entry.length)
+            size += entry.record_size
+
+        # The file is replaced atomically, the lock is held on a separate file
+        temporary_path = self._data_path.with_suffix(".data.tmp")
+        temporary_path.write_bytes(b"".join(parts))
+        temporary_path.replace(self._data_path)
+
+        os.close(self._data_fd)
+        self._data_fd = os.open(self._data_path, os.O_RDWR)
+        self._index = index
+        self._size = size
+        self._remap()
+        logger.debug(
+            f"Compacted the disk cache '{self._data_path}' to {len(index)} "
+            f"entries, evicted {evicted_count}."
+        )
+
+    def _read(self, entry: _IndexEntry, /) -> bytes:
+        return self._get_map()[entry.offset : entry.offset + entry.length]
+
+    def _get_entry(self, key: str, /) -> _IndexEntry | None:
+        # Must be called while holding the lock
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at is not None and entry.expires_at <= time.time():
+            # The record stays in the file until the next compaction
+            del self._index[key]
+            return None
+        return entry
+
+    def _get_expires_at(self, key: str, ttl: float | None = None) -> float | None:
+        ttl = ttl if ttl is not None else self._ttl_policy.get_ttl(key)
+        return time.time() + ttl if ttl is not None else None
+
+    def _contains(self, entry: _IndexEntry, member: str) -> bool:
+        # Searches the mapped set in place instead of decoding it
+        needle = member.encode()
+        data = self._get_map()
+        start, end = entry.offset, entry.offset + entry.length
+        position = data.find(needle, start, end)
+        while position != -1:
+            after = position + len(needle)
+            if (position == start or data[position - 1] == ord("\n")) and (
+                after == end or data[after] == ord("\n")
+            ):
+                return True
+            position = data.find(needle, position + 1, end)
+        return False
+
+    def _update_set(self, key: str, update: Callable[[set[str]], None]) -> None:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None or entry.kind != _RecordKind.SET:
+                return
+
+            members = _decode_members(self._read(entry))
+            update(members)
+            self._append(
+                _RecordKind.SET,
+                key,
+                _encode_members(members),
+                expires_at=entry.expires_at,
+            )
+
+    def validate(self, stamps: Mapping[str, int], /) -> bool:
+        """
+        Check that the entries are valid for the current version of the data.
+
+        The entries of the key families whose data has changed since they
+        were validated last are dropped, and the cache is then valid for the
+        given stamps.
+
+        :param stamps: The current version stamp of the data of each key family.
+        :return: True if the entries were valid, False if some were dropped.
+        """
+        with self._lock:
+            changed_families = {
+                family
+                for family, stamp in stamps.items()
+                if self._stamps.get(family) != stamp
+            }
+            if not changed_families:
+                return True
+
+            if self._stamps:
+                dropped_keys = [
+                    key
+                    for key in self._index
+                    if self._get_key_family(key) in changed_families
+                ]
+                for key in dropped_keys:
+                    self._append(_RecordKind.TOMBSTONE, key)
+                dropped_count = len(dropped_keys)
+            else:
+                dropped_count = len(self._index)
+                self._reset()
+
+            if dropped_count:
+                logger.info(
+                    f"Dropping {dropped_count} entries of the disk cache "
+                    f"'{self._data_path}', the data of "
+                    f"{', '.join(sorted(changed_families))} has changed."
+                )
+            self._stamps = dict(stamps)
+            self._write_stamps()
+            return False
+
+    def close(self) -> None:
+        """
+        Write the index and release the file.
+
+        :return: None
+        """
+        with self._lock:
+            try:
+                self._write_index()
+            except OSError as error:
+                logger.error(f"Failed to write the disk cache index: {str(error)}")
+            self._map.close()
+            os.close(self._data_fd)
+            # Closing the file releases the lock
+            os.close(self._lock_fd)
+
+    @override
+    def _store_set(self, *, key: str, value: Set[str]) -> None:
+        with self._lock:
+            self._append(
+                _RecordKind.SET,
+                key,
+                _encode_members(value),
+                expires_at=self._get_expires_at(key),
+            )
+
+    @override
+    def _get_set(self, key: str, /) -> set[str] | None:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None or entry.kind != _RecordKind.SET:
+                return None
+            return _decode_members(self._read(entry))
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._update_set(key, lambda members: members.add(member))
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        self._update_set(key, lambda members: members.discard(member))
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None or entry.kind != _RecordKind.SET:
+                return MembershipCheck(membership=SetMembership.NOT_CACHED, ttl=None)
+
+            ttl = (
+                entry.expires_at - time.time() if entry.expires_at is not None else None
+            )
+            if self._contains(entry, member):
+                return MembershipCheck(membership=SetMembership.MEMBER, ttl=ttl)
+            return MembershipCheck(membership=SetMembership.NOT_MEMBER, ttl=ttl)
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._append(
+                    _RecordKind.VALUE,
+                    key,
+                    value,
+                    expires_at=self._get_expires_at(key, ttl),
+                )
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        values: list[bytes | None] = []
+        with self._lock:
+            for key in keys:
+                entry = self._get_entry(key)
+                if entry is None or entry.kind != _RecordKind.VALUE:
+                    values.append(None)
+                else:
+                    values.append(self._read(entry))
+        return values
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        with self._lock:
+            if self._get_entry(key) is not None:
+                return False
+
+            self._append(
+                _RecordKind.VALUE,
+                key,
+                token.encode(),
+                expires_at=time.time() + ttl,
+            )
+            return True
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is not None and self._read(entry) == token.encode():
+                self._append(_RecordKind.TOMBSTONE, key)
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        with self._lock:
+            for key in keys:
+                if key in self._index:
+                    self._append(_RecordKind.TOMBSTONE, key)
+
+    def _get_counter(self, key: str, /) -> int | None:
+        entry = self._get_entry(key)
+        if entry is None or entry.kind != _RecordKind.VALUE:
+            return None
+        return int(self._read(entry))
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        with self._lock:
+            generation = self._get_counter(key)
+            if generation is None:
+                generation = initial
+                self._append(
+                    _RecordKind.VALUE,
+                    key,
+                    str(generation).encode(),
+                    expires_at=self._get_expires_at(key),
+                )
+            return generation
+
+    @override
+    def _delete_matching(self, pattern: str, /) -> int:
+        with self._lock:
+            keys = [key for key in self._index if fnmatchcase(key, pattern)]
+            for key in keys:
+                self._append(_RecordKind.TOMBSTONE, key)
+            return len(keys)
+
+
+def open_disk_cache(
+    directory: Path,
+    *,
+    slots: int,
+    ttl_policy: TtlPolicy,
+    get_key_family: Callable[[str], str],
+    max_size: int,
+    metrics: CacheMetrics | None = None,
+) -> DiskCacheService | None:
+    """
+    Open the first disk cache file not held by another process.
+
+    Every process holds a file of its own, e.g. each API worker. Restarted
+    processes pick up the files released by the processes they replace.
+
+    :param directory: The directory holding the files.
+    :param slots: The number of files, i.e. the number of processes that can
+        use a disk cache at the same time.
+    :param ttl_policy: The policy deciding the TTL of the entries.
+    :param get_key_family: Get the family of a key, whose entries are
+        validated together.
+    :param max_size: The size in bytes from which a file is compacted.
+    :param metrics: Optional metrics to record the calls with. Defaults to None.
+    :return: The disk cache, or None if all files are held by other processes.
+    """
+    for slot in range(slots):
+        try:
+            return DiskCacheService(
+                path=directory / f"cache-{slot}",
+                ttl_policy=ttl_policy,
+                get_key_family=get_key_family,
+                max_size=max_size,
+                metrics=metrics,
+            )
+        except BlockingIOError:
+            continue
+
+    logger.warning(
+        f"All {slots} disk cache files in '{directory}' are held by other "
+        f"processes, running without a disk cache."
+    )
+    return None
+
+
+class DiskCacheValidator:
+    """Validates the entries of a disk cache periodically."""
+
+    _cache_service: DiskCacheService
+    _get_stamps: Callable[[], Mapping[str, int]]
+    _interval: float
+    _stopped: threading.Event
+    _thread: threading.Thread | None
+
+    def __init__(
+        self,
+        *,
+        cache_service: DiskCacheService,
+        get_stamps: Callable[[], Mapping[str, int]],
+        interval: float,
+    ) -> None:
+        self._cache_service = cache_service
+        self._get_stamps = get_stamps
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start validating in the background.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(
+            target=self._validate_periodically, name="disk-cache-validator", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop validating.
+
+        :return: None
+        """
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _validate_periodically(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                self._cache_service.validate(self._get_stamps())
+            except Exception as error:
+                logger.error(f"Failed to validate the disk cache: {str(error)}")
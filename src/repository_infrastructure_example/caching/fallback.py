@@ -0,0 +1,138 @@
+from collections.abc import Callable, Mapping, Sequence
+from typing import Final, Set, override
+
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    MembershipCheck,
+)
+from repository_infrastructure_example.caching.circuit_breaker import CircuitBreaker
+from repository_infrastructure_example.caching.codecs import BytesCodec
+
+# Values are passed on to the caches as they are stored
+_BYTES_CODEC: Final[BytesCodec] = BytesCodec()
+
+
+class FallbackCacheService(CacheService):
+    """
+    Cache served by a fallback cache while the circuit of the primary is open.
+
+    Calls go to the primary cache unless its circuit breaker rejects calls,
+    e.g. because Redis is down, in which case they go to the fallback cache.
+    Once the circuit lets a probe through again, calls go back to the primary.
+
+    The caches are kept from serving each other's outdated entries without
+    ever being cleared. Every key written to the fallback is deleted from the
+    primary, which defers the deletion until it is reachable again. Every key
+    invalidated in the primary is deleted from the fallback, so that the
+    fallback holds no entry changed since it was written when the next
+    outage begins.
+    """
+
+    _primary: CacheService
+    _fallback: CacheService
+    _primary_circuit_breaker: CircuitBreaker
+
+    def __init__(
+        self,
+        *,
+        primary: CacheService,
+        fallback: CacheService,
+        primary_circuit_breaker: CircuitBreaker,
+    ) -> None:
+        self._primary = primary
+        self._fallback = fallback
+        self._primary_circuit_breaker = primary_circuit_breaker
+
+    def _get_cache(self) -> CacheService:
+        if self._primary_circuit_breaker.is_rejecting:
+            return self._fallback
+        return self._primary
+
+    def _write(
+        self, keys: Sequence[str], write: Callable[[CacheService], None]
+    ) -> CacheService:
+        """
+        Write to the serving cache and delete the keys from the other cache.
+
+        :param keys: The keys written.
+        :param write: Callable writing to the given cache.
+        :return: The cache that served the write.
+        """
+        cache = self._get_cache()
+        write(cache)
+        if cache is self._fallback:
+            # Skipped while the circuit is open and applied once it closes
+            self._primary.delete_keys(keys)
+        return cache
+
+    def _invalidate(
+        self, keys: Sequence[str], invalidate: Callable[[CacheService], None]
+    ) -> None:
+        """
+        Invalidate keys in the serving cache and delete them from the other cache.
+
+        :param keys: The keys invalidated.
+        :param invalidate: Callable invalidating the keys in the given cache.
+        :return: None
+        """
+        cache = self._write(keys, invalidate)
+        if cache is self._primary:
+            self._fallback.delete_keys(keys)
+
+    @override
+    def _store_set(self, *, key: str, value: Set[str]) -> None:
+        self._write([key], lambda cache: cache.store_set(key=key, value=value))
+
+    @override
+    def _get_set(self, key: str, /) -> set[str] | None:
+        return self._get_cache().get_set(key)
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._invalidate([key], lambda cache: cache.add_to_set(key=key, member=member))
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        self._invalidate(
+            [key], lambda cache: cache.remove_from_set(key=key, member=member)
+        )
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        return self._get_cache().check_member(key=key, member=member)
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        self._write(
+            list(values),
+            lambda cache: cache.store_values(
+                values=values, codec=_BYTES_CODEC, ttl=ttl
+            ),
+        )
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        values = self._get_cache().get_values(keys, codec=_BYTES_CODEC)
+        return [values.get(key) for key in keys]
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        return self._get_cache().acquire_lease(key=key, token=token, ttl=ttl)
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        self._get_cache().release_lease(key=key, token=token)
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        self._invalidate(keys, lambda cache: cache.delete_keys(keys))
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        # The cache starts missing counters on its own. Each cache keeps its own
+        # counter, keys built with either are only stored in the same cache.
+        return self._get_cache().start_generation(key)
+
+    @override
+    def _delete_matching(self, pattern: str, /) -> int:
+        return self._get_cache().delete_matching(pattern)
@@ -1,3 +1,4 @@
+from enum import StrEnum, auto
 from typing import Final
 from uuid import UUID
 
@@ -6,6 +7,21 @@ from repository_infrastructure_example import __appname__, __version__
 _PREFIX: Final[str] = f"{__appname__}__{__version__}"
 
 
+class CacheKeyFamily(StrEnum):
+    # Families of the keys holding cached data, see `get_key_family`
+    ORGANISATION_IDS = auto()
+    USER_IDS = auto()
+    ORGANISATION = auto()
+    USER = auto()
+
+
+def _hash_tag(organisation_id: UUID, /) -> str:
+    # Redis Cluster and the sharded cache only hash the part of a key within
+    # braces, so that all keys of an organisation end up on the same node and
+    # multi-key operations on them stay on a single node
+    return f"{{{organisation_id}}}"
+
+
 class CacheKeyManager:
     _prefix: str
 
@@ -15,9 +31,71 @@ class CacheKeyManager:
     def _construct_key(self, name: str, /) -> str:
         return f"{self._prefix}__{name}"
 
+    @property
+    def invalidation_channel(self) -> str:
+        return self._construct_key("invalidations")
+
+    @property
+    def identifier_channel(self) -> str:
+        return self._construct_key("identifiers")
+
+    @property
+    def shared_index_channel(self) -> str:
+        return self._construct_key("shared_index")
+
+    @property
+    def organisation_directory_channel(self) -> str:
+        return self._construct_key("organisation_directory")
+
     @property
     def organisation_ids_key(self) -> str:
         return self._construct_key("organisation_ids")
 
-    def get_user_ids_key(self, organisation_id: UUID) -> str:
-        return self._construct_key(f"organisation_id__{organisation_id}__user_ids")
+    def _construct_organisation_key(
+        self, organisation_id: UUID, generation: int, name: str, /
+    ) -> str:
+        # Keys of an organisation embed its generation, so that restarting the
+        # generation invalidates all of them at once
+        return self._construct_key(
+            f"organisation_id__{_hash_tag(organisation_id)}__generation__"
+            f"{generation}__{name}"
+        )
+
+    def get_organisation_generation_key(self, organisation_id: UUID) -> str:
+        return self._construct_key(
+            f"organisation_id__{_hash_tag(organisation_id)}__generation"
+        )
+
+    def get_organisation_keys_pattern(
+        self, organisation_id: UUID, *, generation: int
+    ) -> str:
+        return self._construct_organisation_key(organisation_id, generation, "*")
+
+    def get_organisation_key(self, organisation_id: UUID, *, generation: int) -> str:
+        return self._construct_organisation_key(
+            organisation_id, generation, "organisation"
+        )
+
+    def get_user_ids_key(self, organisation_id: UUID, *, generation: int) -> str:
+        return self._construct_organisation_key(organisation_id, generation, "user_ids")
+
+    def get_user_key(
+        self, *, organisation_id: UUID, generation: int, user_id: UUID
+    ) -> str:
+        return self._construct_organisation_key(
+            organisation_id, generation, f"user_id__{user_id}__user"
+        )
+
+    def get_absent_user_key(
+        self, *, organisation_id: UUID, generation: int, user_id: UUID
+    ) -> str:
+        return self._construct_organisation_key(
+            organisation_id, generation, f"user_id__{user_id}__absent_user"
+        )
+
+    def get_lease_key(self, key: str, /) -> str:
+        return f"{key}__lease"
+
+    def get_key_family(self, key: str, /) -> str:
+        # The last segment names what a key stores, e.g. `user_ids`
+        return key.rsplit("__", maxsplit=1)[-1]
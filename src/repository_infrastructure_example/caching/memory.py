@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping, Sequence
+from fnmatch import fnmatchcase
+from typing import NamedTuple, override
+
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    MembershipCheck,
+    SetMembership,
+)
+from repository_infrastructure_example.caching.metrics import CacheMetrics
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+
+class _CacheEntry(NamedTuple):
+    value: frozenset[str] | bytes
+    size: int
+    expires_at: float | None
+
+
+def _estimate_size(value: frozenset[str] | bytes, /) -> int:
+    """
+    Estimate the payload size of a cached value.
+
+    :param value: The cached value.
+    :return: The number of bytes or characters held by the value.
+    """
+    if isinstance(value, bytes):
+        return len(value)
+    return sum(len(member) for member in value)
+
+
+class MemoryCacheService(CacheService):
+    """
+    Thread-safe in-process cache.
+
+    Bounded by the number of entries and by the summed size of their payloads.
+    Expired entries are dropped on access; when a bound is exceeded, the least
+    recently used entries are evicted first.
+    """
+
+    _entries: OrderedDict[str, _CacheEntry]
+    _lock: threading.RLock
+    _ttl_policy: TtlPolicy
+    _max_entries: int
+    _max_size: int
+    _size: int
+
+    def __init__(
+        self,
+        *,
+        ttl_policy: TtlPolicy,
+        max_entries: int,
+        max_size: int,
+        metrics: CacheMetrics | None = None,
+    ) -> None:
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._ttl_policy = ttl_policy
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._size = 0
+        self._metrics = metrics
+
+    def _get_entry(self, key: str, /) -> _CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove_entry(key)
+                return None
+
+            if entry.expires_at is not None and self._ttl_policy.is_sliding(key):
+                ttl = self._ttl_policy.get_ttl(key)
+                if ttl is not None:
+                    entry = entry._replace(expires_at=time.monotonic() + ttl)
+                    self._entries[key] = entry
+
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put_entry(
+        self, key: str, value: frozenset[str] | bytes, ttl: float | None = None
+    ) -> None:
+        size = _estimate_size(value)
+        ttl = ttl if ttl is not None else self._ttl_policy.get_ttl(key)
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            self._remove_entry(key)
+
+            # Values larger than the whole cache are not worth evicting for
+            if size > self._max_size:
+                return
+
+            self._entries[key] = _CacheEntry(
+                value=value, size=size, expires_at=expires_at
+            )
+            self._size += size
+
+            while len(self._entries) > self._max_entries or self._size > self._max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def _update_set(
+        self, key: str, update: Callable[[frozenset[str]], frozenset[str]]
+    ) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or isinstance(entry.value, bytes):
+                return
+
+            value = update(entry.value)
+            size = _estimate_size(value)
+            self._entries[key] = entry._replace(value=value, size=size)
+            self._size += size - entry.size
+
+    def _remove_entry(self, key: str, /) -> None:
+        # Must be called while holding the lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    @override
+    def _store_set(self, *, key: str, value: set[str]) -> None:
+        self._put_entry(key, frozenset(value))
+
+    @override
+    def _get_set(self, key: str, /) -> set[str] | None:
+        entry = self._get_entry(key)
+        if entry is None or isinstance(entry.value, bytes):
+            return None
+        return set(entry.value)
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._update_set(key, lambda members: members | {member})
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        self._update_set(key, lambda members: members - {member})
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        entry = self._get_entry(key)
+        if entry is None or isinstance(entry.value, bytes):
+            return MembershipCheck(membership=SetMembership.NOT_CACHED, ttl=None)
+
+        ttl = (
+            entry.expires_at - time.monotonic()
+            if entry.expires_at is not None
+            else None
+        )
+        if member in entry.value:
+            return MembershipCheck(membership=SetMembership.MEMBER, ttl=ttl)
+        return MembershipCheck(membership=SetMembership.NOT_MEMBER, ttl=ttl)
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        for key, value in values.items():
+            self._put_entry(key, value, ttl)
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        values: list[bytes | None] = []
+        for key in keys:
+            entry = self._get_entry(key)
+            if entry is None or not isinstance(entry.value, bytes):
+                values.append(None)
+            else:
+                values.append(entry.value)
+        return values
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry.expires_at is None or entry.expires_at > time.monotonic()
+            ):
+                return False
+
+            self._remove_entry(key)
+            value = token.encode()
+            self._entries[key] = _CacheEntry(
+                value=value, size=len(value), expires_at=time.monotonic() + ttl
+            )
+            self._size += len(value)
+            return True
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.value == token.encode():
+                self._remove_entry(key)
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove_entry(key)
+
+    def _get_counter(self, key: str, /) -> int | None:
+        entry = self._get_entry(key)
+        if entry is None or not isinstance(entry.value, bytes):
+            return None
+        return int(entry.value)
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        with self._lock:
+            generation = self._get_counter(key)
+            if generation is None:
+                generation = initial
+                self._put_entry(key, str(generation).encode())
+            return generation
+
+    @override
+    def _delete_matching(self, pattern: str, /) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if fnmatchcase(key, pattern)]
+            for key in keys:
+                self._remove_entry(key)
+            return len(keys)
@@ -0,0 +1,207 @@
+import math
+import threading
+from collections.abc import Sequence
+from enum import StrEnum, auto
+from typing import Final, NamedTuple
+
+from pydantic import BaseModel, Field
+
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+
+# Upper bounds in seconds of the latency histogram buckets, Prometheus style
+_LATENCY_BUCKETS: Final[tuple[float, ...]] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    math.inf,
+)
+
+
+class CacheOutcome(StrEnum):
+    HIT = auto()
+    MISS = auto()
+    SUCCESS = auto()
+    ERROR = auto()
+    # Not attempted because the circuit breaker was open
+    SKIPPED = auto()
+
+
+class KeyOutcome(NamedTuple):
+    key: str
+    outcome: CacheOutcome
+    # Size of the payload read or written for the key, if any
+    payload_size: int | None = None
+
+
+class LatencyBucket(BaseModel):
+    upper_bound: float | None = Field(
+        description="The upper bound of the bucket in seconds, None for infinity."
+    )
+    count: int = Field(
+        description="The number of calls that took at most the upper bound."
+    )
+
+
+class CacheOperationStatistics(BaseModel):
+    family: str = Field(description="The key family.", examples=["user_ids"])
+    operation: str = Field(description="The cache operation.", examples=["get_set"])
+    outcomes: dict[CacheOutcome, int] = Field(
+        description="The number of calls per outcome."
+    )
+    hit_ratio: float | None = Field(
+        description="The ratio of hits among hits and misses, None for operations "
+        "that do not look anything up."
+    )
+    latency_sum: float = Field(
+        description="The summed duration of all attempted calls in seconds."
+    )
+    latency_buckets: list[LatencyBucket] = Field(
+        description="The cumulative latency histogram of all attempted calls."
+    )
+    payload_count: int = Field(
+        description="The number of payloads read from or written to the cache."
+    )
+    payload_size_sum: int = Field(description="The summed size of all payloads.")
+    payload_size_max: int = Field(description="The size of the largest payload.")
+
+
+class CacheTierStatistics(BaseModel):
+    tier: str = Field(description="The name of the cache tier.", examples=["redis"])
+    operations: list[CacheOperationStatistics] = Field(
+        description="The statistics per key family and operation."
+    )
+
+
+class _OperationRecord:
+    outcomes: dict[CacheOutcome, int]
+    latency_sum: float
+    latency_counts: list[int]
+    payload_count: int
+    payload_size_sum: int
+    payload_size_max: int
+
+    def __init__(self) -> None:
+        self.outcomes = dict.fromkeys(CacheOutcome, 0)
+        self.latency_sum = 0.0
+        self.latency_counts = [0] * len(_LATENCY_BUCKETS)
+        self.payload_count = 0
+        self.payload_size_sum = 0
+        self.payload_size_max = 0
+
+
+class CacheMetrics:
+    """
+    Records the hits, misses, errors, latencies and payload sizes of a cache tier.
+
+    Calls are grouped by the family of their key and by operation.
+    """
+
+    _tier: str
+    _cache_key_manager: CacheKeyManager
+    _records: dict[tuple[str, str], _OperationRecord]
+    _lock: threading.Lock
+
+    def __init__(self, *, tier: str, cache_key_manager: CacheKeyManager) -> None:
+        self._tier = tier
+        self._cache_key_manager = cache_key_manager
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        *,
+        operation: str,
+        duration: float | None,
+        outcomes: Sequence[KeyOutcome],
+    ) -> None:
+        """
+        Record a call to the cache.
+
+        :param operation: The cache operation.
+        :param duration: The duration of the call in seconds, None if it was
+            not attempted. Recorded once per key family the call touched.
+        :param outcomes: The outcome of the call for each key it was made with.
+        :return: None
+        """
+        with self._lock:
+            timed_families: set[str] = set()
+
+            for key, outcome, payload_size in outcomes:
+                family = self._cache_key_manager.get_key_family(key)
+                record = self._get_record(family, operation)
+                record.outcomes[outcome] += 1
+
+                if duration is not None and family not in timed_families:
+                    timed_families.add(family)
+                    record.latency_sum += duration
+                    for index, upper_bound in enumerate(_LATENCY_BUCKETS):
+                        if duration <= upper_bound:
+                            record.latency_counts[index] += 1
+                            break
+
+                if payload_size is not None:
+                    record.payload_count += 1
+                    record.payload_size_sum += payload_size
+                    record.payload_size_max = max(record.payload_size_max, payload_size)
+
+    def _get_record(self, family: str, operation: str) -> _OperationRecord:
+        # Must be called while holding the lock
+        record = self._records.get((family, operation))
+        if record is None:
+            record = self._records[(family, operation)] = _OperationRecord()
+        return record
+
+    @property
+    def statistics(self) -> CacheTierStatistics:
+        """Get the statistics recorded so far."""
+        operations: list[CacheOperationStatistics] = []
+
+        with self._lock:
+            for (family, operation), record in sorted(self._records.items()):
+                lookups = (
+                    record.outcomes[CacheOutcome.HIT]
+                    + record.outcomes[CacheOutcome.MISS]
+                )
+
+                cumulative_count = 0
+                latency_buckets: list[LatencyBucket] = []
+                for upper_bound, count in zip(
+                    _LATENCY_BUCKETS, record.latency_counts, strict=True
+                ):
+                    cumulative_count += count
+                    latency_buckets.append(
+                        LatencyBucket(
+                            upper_bound=upper_bound
+                            if math.isfinite(upper_bound)
+                            else None,
+                            count=cumulative_count,
+                        )
+                    )
+
+                operations.append(
+                    CacheOperationStatistics(
+                        family=family,
+                        operation=operation,
+                        outcomes=dict(record.outcomes),
+                        hit_ratio=(
+                            record.outcomes[CacheOutcome.HIT] / lookups
+                            if lookups
+                            else None
+                        ),
+                        latency_sum=record.latency_sum,
+                        latency_buckets=latency_buckets,
+                        payload_count=record.payload_count,
+                        payload_size_sum=record.payload_size_sum,
+                        payload_size_max=record.payload_size_max,
+                    )
+                )
+
+        return CacheTierStatistics(tier=self._tier, operations=operations)
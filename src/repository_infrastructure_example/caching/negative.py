@@ -0,0 +1,56 @@
+from collections.abc import Callable, Sequence
+from typing import Final
+
+from repository_infrastructure_example.caching.cache import CacheService
+from repository_infrastructure_example.caching.codecs import BytesCodec
+
+# Negative entries only record that a key was absent, they hold no payload
+_ABSENT: Final[bytes] = b""
+_CODEC: Final[BytesCodec] = BytesCodec()
+
+
+class NegativeCache:
+    """
+    Remembers for a short time that lookups found nothing.
+
+    Repeated lookups of something that does not exist, e.g. by retrying
+    clients, are answered from the cache instead of the repository. Entries
+    must be forgotten when a matching entity is created. Hits are recorded by
+    the cache metrics under the family of the negative keys, e.g.
+    `absent_user`. Only read paths may use it, checks guarding writes, e.g.
+    of uniqueness, must not trust an entry that may be stale.
+    """
+
+    _cache_service: CacheService
+    _ttl: float
+
+    def __init__(self, *, cache_service: CacheService, ttl: float) -> None:
+        self._cache_service = cache_service
+        self._ttl = ttl
+
+    def lookup[T](self, key: str, load: Callable[[], T | None]) -> T | None:
+        """
+        Look something up, unless it was recently found to be absent.
+
+        :param key: The negative cache key of the lookup.
+        :param load: Callable looking it up in the repository.
+        :return: The result of the lookup, or None if it is absent.
+        """
+        if self._cache_service.get_value(key, codec=_CODEC) is not None:
+            return None
+
+        result = load()
+        if result is None:
+            self._cache_service.store_value(
+                key=key, value=_ABSENT, codec=_CODEC, ttl=self._ttl
+            )
+        return result
+
+    def forget(self, keys: Sequence[str], /) -> None:
+        """
+        Forget that lookups found nothing, e.g. because a matching entity was created.
+
+        :param keys: The negative cache keys of the lookups.
+        :return: None
+        """
+        self._cache_service.delete_keys(keys)
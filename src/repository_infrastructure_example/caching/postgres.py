@@ -0,0 +1,372 @@
+import threading
+from collections.abc import Callable, Mapping, Sequence
+from contextlib import AbstractContextManager
+from typing import Any, Final, Set, override
+
+from loguru import logger
+from sqlalchemy import Row, text
+from sqlmodel import Session
+
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    DeferredDeletions,
+    MembershipCheck,
+    SetMembership,
+)
+from repository_infrastructure_example.caching.circuit_breaker import CircuitBreaker
+from repository_infrastructure_example.caching.metrics import CacheMetrics
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+# Entries without an expiry, or whose expiry lies ahead. Expired entries are
+# only deleted by the sweeper, reads have to skip them.
+_IS_ALIVE: Final[str] = "(expires_at IS NULL OR expires_at > now())"
+# Expiry of an entry stored with the TTL in seconds given as `:ttl`, NULL for
+# entries that do not expire
+_EXPIRES_AT: Final[str] = "now() + make_interval(secs => CAST(:ttl AS float8))"
+
+_STORE_SET_ENTRY: Final[str] = f"""
+INSERT INTO cache_entries (key, value, expires_at)
+VALUES (:key, NULL, {_EXPIRES_AT})
+ON CONFLICT (key) DO UPDATE
+SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+"""
+_DELETE_SET_MEMBERS: Final[str] = "DELETE FROM cache_set_members WHERE key = :key"
+_INSERT_SET_MEMBER: Final[str] = """
+INSERT INTO cache_set_members (key, member) VALUES (:key, :member)
+"""
+_GET_SET: Final[str] = f"""
+SELECT members.member
+FROM cache_entries AS entries
+LEFT JOIN cache_set_members AS members ON members.key = entries.key
+WHERE entries.key = :key AND entries.value IS NULL AND {_IS_ALIVE}
+"""
+# Adds a member only to sets that are cached, see `CacheService.add_to_set`
+_ADD_TO_CACHED_SET: Final[str] = f"""
+INSERT INTO cache_set_members (key, member)
+SELECT key, :member FROM cache_entries
+WHERE key = :key AND value IS NULL AND {_IS_ALIVE}
+ON CONFLICT DO NOTHING
+"""
+_REMOVE_FROM_SET: Final[str] = """
+DELETE FROM cache_set_members WHERE key = :key AND member = :member
+"""
+_CHECK_MEMBER: Final[str] = f"""
+SELECT
+    EXISTS (
+        SELECT FROM cache_set_members AS members
+        WHERE members.key = entries.key AND members.member = :member
+    ) AS is_member,
+    EXTRACT(EPOCH FROM expires_at - now()) AS ttl
+FROM cache_entries AS entries
+WHERE key = :key AND value IS NULL AND {_IS_ALIVE}
+"""
+_STORE_VALUE: Final[str] = f"""
+INSERT INTO cache_entries (key, value, expires_at)
+VALUES (:key, :value, {_EXPIRES_AT})
+ON CONFLICT (key) DO UPDATE
+SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+"""
+_GET_VALUES: Final[str] = f"""
+SELECT key, value FROM cache_entries
+WHERE key = ANY(:keys) AND value IS NOT NULL AND {_IS_ALIVE}
+"""
+# Renews the expiry of an entry of a sliding family, unless it has expired
+_RENEW_TTL: Final[str] = f"""
+UPDATE cache_entries SET expires_at = {_EXPIRES_AT}
+WHERE key = :key AND expires_at IS NOT NULL AND expires_at > now()
+"""
+# Takes over leases that expired, but were not swept yet
+_ACQUIRE_LEASE: Final[str] = f"""
+INSERT INTO cache_entries (key, value, expires_at)
+VALUES (:key, :token, {_EXPIRES_AT})
+ON CONFLICT (key) DO UPDATE
+SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+WHERE cache_entries.expires_at <= now()
+RETURNING key
+"""
+_RELEASE_LEASE: Final[str] = """
+DELETE FROM cache_entries WHERE key = :key AND value = :token
+"""
+_DELETE_KEYS: Final[str] = "DELETE FROM cache_entries WHERE key = ANY(:keys)"
+_GET_VALUE: Final[str] = "SELECT value FROM cache_entries WHERE key = :key"
+# Generation counters are stored as decimal text like in the other backends.
+# The no-op update returns the counter stored by a concurrent caller.
+_START_GENERATION: Final[str] = """
+INSERT INTO cache_entries (key, value, expires_at)
+VALUES (:key, convert_to(:initial, 'UTF8'), NULL)
+ON CONFLICT (key) DO UPDATE SET value = cache_entries.value
+RETURNING value
+"""
+_DELETE_MATCHING: Final[str] = r"""
+DELETE FROM cache_entries WHERE key LIKE :pattern ESCAPE '\'
+"""
+# Deletes a batch of expired entries, skipping entries locked by writers
+_SWEEP: Final[str] = """
+DELETE FROM cache_entries
+WHERE key IN (
+    SELECT key FROM cache_entries
+    WHERE expires_at <= now()
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+)
+"""
+
+_SessionFactory = Callable[[], AbstractContextManager[Session]]
+
+
+def _glob_to_like(pattern: str, /) -> str:
+    """
+    Translate a glob-style pattern to a pattern of the LIKE operator.
+
+    :param pattern: The glob-style pattern, supporting `*` and `?`.
+    :return: The LIKE pattern, escaping its wildcards with a backslash.
+    """
+    like_pattern: list[str] = []
+    for character in pattern:
+        if character == "*":
+            like_pattern.append("%")
+        elif character == "?":
+            like_pattern.append("_")
+        elif character in ("%", "_", "\\"):
+            like_pattern.append(f"\\{character}")
+        else:
+            like_pattern.append(character)
+    return "".join(like_pattern)
+
+
+class PostgresCacheService(CacheService):
+    """
+    Cache stored in UNLOGGED tables of the application database.
+
+    UNLOGGED tables skip the write-ahead log, which makes writes considerably
+    cheaper, at the price of being emptied after a crash of the database and
+    not being replicated. Both are fine for a cache. Values and sets are kept
+    in `cache_entries`, the members of sets in `cache_set_members`.
+
+    Expired entries are skipped by reads and deleted by `sweep`, which has to
+    be called periodically, see `PostgresCacheSweeper`. Reads of keys of a
+    sliding family renew their TTLs, which turns every such read into a write.
+    Glob patterns only support the `*` and `?` wildcards.
+    """
+
+    _session_factory: _SessionFactory
+    _ttl_policy: TtlPolicy
+
+    def __init__(
+        self,
+        *,
+        session_factory: _SessionFactory,
+        ttl_policy: TtlPolicy,
+        circuit_breaker: CircuitBreaker | None = None,
+        metrics: CacheMetrics | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl_policy = ttl_policy
+        self._circuit_breaker = circuit_breaker
+        self._deferred_deletions = DeferredDeletions()
+        self._metrics = metrics
+
+    def _query(self, statement: str, parameters: Mapping[str, Any]) -> list[Row[Any]]:
+        with self._session_factory() as session:
+            result = session.connection().execute(text(statement), parameters)
+            return list(result.all())
+
+    def _modify(
+        self,
+        statement: str,
+        parameters: Mapping[str, Any] | Sequence[Mapping[str, Any]],
+    ) -> int:
+        with self._session_factory() as session:
+            result = session.connection().execute(text(statement), parameters)
+            return result.rowcount
+
+    def _renew_ttls(self, keys: Sequence[str], /) -> None:
+        parameters: list[dict[str, Any]] = []
+        for key in keys:
+            if not self._ttl_policy.is_sliding(key):
+                continue
+            ttl = self._ttl_policy.get_ttl(key)
+            if ttl is not None:
+                parameters.append({"key": key, "ttl": ttl})
+
+        if parameters:
+            self._modify(_RENEW_TTL, parameters)
+
+    @override
+    def _store_set(self, *, key: str, value: Set[str]) -> None:
+        # Replaced within a single transaction, so that readers never see a
+        # partially stored set
+        with self._session_factory() as session:
+            connection = session.connection()
+            connection.execute(
+                text(_STORE_SET_ENTRY),
+                {"key": key, "ttl": self._ttl_policy.get_ttl(key)},
+            )
+            connection.execute(text(_DELETE_SET_MEMBERS), {"key": key})
+            if value:
+                connection.execute(
+                    text(_INSERT_SET_MEMBER),
+                    [{"key": key, "member": member} for member in value],
+                )
+
+    @override
+    def _get_set(self, key: str, /) -> set[str] | None:
+        rows = self._query(_GET_SET, {"key": key})
+        if not rows:
+            return None
+
+        self._renew_ttls([key])
+        # The entry of an empty set is joined with no member
+        return {member for (member,) in rows if member is not None}
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._modify(_ADD_TO_CACHED_SET, {"key": key, "member": member})
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        self._modify(_REMOVE_FROM_SET, {"key": key, "member": member})
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        # Renewed before reading the TTL, so that the key is not refreshed
+        self._renew_ttls([key])
+        rows = self._query(_CHECK_MEMBER, {"key": key, "member": member})
+        if not rows:
+            return MembershipCheck(membership=SetMembership.NOT_CACHED, ttl=None)
+
+        is_member, ttl = rows[0]
+        ttl = float(ttl) if ttl is not None else None
+        if is_member:
+            return MembershipCheck(membership=SetMembership.MEMBER, ttl=ttl)
+        return MembershipCheck(membership=SetMembership.NOT_MEMBER, ttl=ttl)
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        self._modify(
+            _STORE_VALUE,
+            [
+                {
+                    "key": key,
+                    "value": value,
+                    "ttl": ttl if ttl is not None else self._ttl_policy.get_ttl(key),
+                }
+                for key, value in values.items()
+            ],
+        )
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        rows = self._query(_GET_VALUES, {"keys": list(keys)})
+        values: dict[str, bytes] = {key: bytes(value) for key, value in rows}
+
+        self._renew_ttls(list(values))
+        return [values.get(key) for key in keys]
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        rows = self._query(
+            _ACQUIRE_LEASE, {"key": key, "token": token.encode(), "ttl": ttl}
+        )
+        return bool(rows)
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        self._modify(_RELEASE_LEASE, {"key": key, "token": token.encode()})
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        # Members of deleted sets are deleted by the foreign key
+        self._modify(_DELETE_KEYS, {"keys": list(keys)})
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        # Counters are read far more often than they are started
+        rows = self._query(_GET_VALUE, {"key": key})
+        if not rows:
+            rows = self._query(_START_GENERATION, {"key": key, "initial": str(initial)})
+        (generation,) = rows[0]
+        return int(bytes(generation))
+
+    @override
+    def _delete_matching(self, pattern: str, /) -> int:
+        return self._modify(_DELETE_MATCHING, {"pattern": _glob_to_like(pattern)})
+
+    def sweep(self, *, batch_size: int) -> int:
+        """
+        Delete the expired entries.
+
+        Entries are deleted in batches, each in its own transaction, so that
+        the sweep neither holds locks for long nor blocks writers.
+
+        :param batch_size: The number of entries deleted per batch.
+        :return: The number of entries deleted.
+        """
+        deleted_count = 0
+        while True:
+            batch_count = self._modify(_SWEEP, {"batch_size": batch_size})
+            deleted_count += batch_count
+            if batch_count < batch_size:
+                return deleted_count
+
+
+class PostgresCacheSweeper:
+    """Deletes the expired entries of the Postgres cache periodically."""
+
+    _cache_service: PostgresCacheService
+    _interval: float
+    _batch_size: int
+    _stopped: threading.Event
+    _thread: threading.Thread | None
+
+    def __init__(
+        self,
+        *,
+        cache_service: PostgresCacheService,
+        interval: float,
+        batch_size: int,
+    ) -> None:
+        self._cache_service = cache_service
+        self._interval = interval
+        self._batch_size = batch_size
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start sweeping in the background.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(
+            target=self._sweep_periodically, name="postgres-cache-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop sweeping.
+
+        :return: None
+        """
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sweep_periodically(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                deleted_count = self._cache_service.sweep(batch_size=self._batch_size)
+            except Exception as error:
+                logger.error(f"Failed to sweep the Postgres cache: {str(error)}")
+                continue
+
+            if deleted_count:
+                logger.debug(
+                    f"Swept {deleted_count} expired entries from the Postgres cache."
+                )
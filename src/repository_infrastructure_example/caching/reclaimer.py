@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from repository_infrastructure_example.caching.cache import CacheService
+
+
+class KeyReclaimer:
+    """
+    Deletes orphaned cache keys in the background.
+
+    Keys that can no longer be read, e.g. because their generation was
+    deleted, expire on their own only if the cache has a TTL. They are deleted
+    one pattern at a time, so that callers do not wait for the cache to be
+    scanned.
+    """
+
+    _cache_service: CacheService
+    _executor: ThreadPoolExecutor
+
+    def __init__(self, *, cache_service: CacheService) -> None:
+        self._cache_service = cache_service
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="cache-reclaim"
+        )
+
+    def reclaim(self, pattern: str, /) -> None:
+        """
+        Delete the keys matching the given glob-style pattern in the background.
+
+        :param pattern: The pattern to match keys against.
+        :return: None
+        """
+        self._executor.submit(self._reclaim, pattern)
+
+    def _reclaim(self, pattern: str, /) -> None:
+        deleted_count = self._cache_service.delete_matching(pattern)
+        logger.debug(f"Reclaimed {deleted_count} key(s) matching '{pattern}'.")
+
+    def close(self) -> None:
+        """
+        Wait for the pending deletions to finish.
+
+        :return: None
+        """
+        self._executor.shutdown(wait=True)
@@ -1,32 +1,338 @@
-from typing import Set, override
+import threading
+from collections.abc import Callable, Mapping, Sequence
+from itertools import batched
+from typing import Final, Set, override
 
-from redis import Redis
+from loguru import logger
+from redis import Redis, RedisCluster
+from redis.commands.core import Script
+from redis.exceptions import RedisError
 
-from repository_infrastructure_example.caching.cache import CacheService
+from repository_infrastructure_example.caching.bus import MessageBus
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    DeferredDeletions,
+    MembershipCheck,
+    SetMembership,
+)
+from repository_infrastructure_example.caching.circuit_breaker import CircuitBreaker
+from repository_infrastructure_example.caching.metrics import CacheMetrics
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+# Member added to every stored set, so that empty sets can be cached as well
+# (Redis deletes sets without members). Never a valid identifier.
+_SET_MARKER: Final[str] = ""
+
+# Adds a member only to sets that are cached, see `CacheService.add_to_set`
+_ADD_TO_CACHED_SET_SCRIPT: Final[str] = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return redis.call("SADD", KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+# Deletes a lease only if it is still held by the given token
+_RELEASE_LEASE_SCRIPT: Final[str] = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+# Number of keys scanned and unlinked per round trip when deleting by pattern
+_SCAN_BATCH_SIZE: Final[int] = 500
+
+# Seconds to wait for a message before checking whether the bus was closed
+_BUS_POLL_INTERVAL: Final[float] = 1.0
+# Seconds to wait before resubscribing after the connection was lost
+_BUS_RECONNECT_DELAY: Final[float] = 1.0
 
 
 class RedisCacheService(CacheService):
-    _client: Redis
-    _ttl: int | None
+    _client: Redis | RedisCluster
+    _ttl_policy: TtlPolicy
+    _is_client_side_cached: bool
+    _add_to_cached_set: Script
+    _release_lease_script: Script
 
-    def __init__(self, redis_client: Redis, keys_ttl: int | None) -> None:
+    def __init__(
+        self,
+        redis_client: Redis | RedisCluster,
+        ttl_policy: TtlPolicy,
+        circuit_breaker: CircuitBreaker | None = None,
+        metrics: CacheMetrics | None = None,
+        is_client_side_cached: bool = False,
+    ) -> None:
         self._client = redis_client
-        self._ttl = keys_ttl
+        self._ttl_policy = ttl_policy
+        self._is_client_side_cached = is_client_side_cached
+        self._circuit_breaker = circuit_breaker
+        self._deferred_deletions = DeferredDeletions()
+        self._metrics = metrics
+        # Scripts are routed by their keys on a cluster as well
+        self._add_to_cached_set = redis_client.register_script(  # pyright: ignore
+            _ADD_TO_CACHED_SET_SCRIPT
+        )
+        self._release_lease_script = redis_client.register_script(  # pyright: ignore
+            _RELEASE_LEASE_SCRIPT
+        )
 
     @override
     def _store_set(self, *, key: str, value: Set[str]) -> None:
-        if not value:
-            return
+        with self._client.pipeline(transaction=True) as pipeline:  # pyright: ignore
+            pipeline.delete(key)  # pyright: ignore
+            pipeline.sadd(key, _SET_MARKER, *value)
+            ttl = self._ttl_policy.get_ttl(key)
+            if ttl is not None:
+                pipeline.pexpire(key, int(ttl * 1000))
+            pipeline.execute()
+
+    def _get_sliding_ttl(self, key: str, /) -> int | None:
+        """
+        Get the TTL to renew a key with when it is read.
 
-        self._client.sadd(key, *value)
+        :param key: The cache key.
+        :return: The TTL in milliseconds, or None if the key is not renewed.
+        """
+        # Renewing the TTL modifies the key, which would invalidate the replies
+        # cached on the client side
+        if self._is_client_side_cached or not self._ttl_policy.is_sliding(key):
+            return None
 
-        if self._ttl:
-            self._client.expire(name=key, time=self._ttl)
+        ttl = self._ttl_policy.get_ttl(key)
+        return int(ttl * 1000) if ttl is not None else None
 
     @override
     def _get_set(self, key: str, /) -> set[str] | None:
-        return self._client.smembers(key) or None  # pyright: ignore
+        sliding_ttl = self._get_sliding_ttl(key)
+        if sliding_ttl is None:
+            encoded_members: set[bytes] = self._client.smembers(key)  # pyright: ignore
+        else:
+            with self._client.pipeline(transaction=False) as pipeline:  # pyright: ignore
+                pipeline.smembers(key)  # pyright: ignore
+                pipeline.pexpire(key, sliding_ttl)
+                encoded_members, _ = pipeline.execute()
+
+        if not encoded_members:
+            return None
+
+        members = {member.decode() for member in encoded_members}
+        members.discard(_SET_MARKER)
+        return members
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._add_to_cached_set(keys=[key], args=[member])
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        # Removing the last member keeps the marker, so the set stays cached
+        self._client.srem(key, member)
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        if self._is_client_side_cached:
+            return self._check_member_client_side(key=key, member=member)
+
+        sliding_ttl = self._get_sliding_ttl(key)
+        # Run atomically, so that the key cannot be stored or expire between
+        # the commands and the TTL always belongs to the set that was checked
+        with self._client.pipeline(transaction=True) as pipeline:  # pyright: ignore
+            pipeline.sismember(key, member)
+            # Renewed before reading the TTL, so that the key is not refreshed
+            if sliding_ttl is not None:
+                pipeline.pexpire(key, sliding_ttl)
+            pipeline.pttl(key)
+            results = pipeline.execute()
+        is_member, ttl_in_milliseconds = results[0], results[-1]
+
+        # -2 if the key does not exist, -1 if it does not expire
+        if ttl_in_milliseconds == -2:
+            return MembershipCheck(membership=SetMembership.NOT_CACHED, ttl=None)
+
+        ttl = ttl_in_milliseconds / 1000 if ttl_in_milliseconds >= 0 else None
+        if is_member:
+            return MembershipCheck(membership=SetMembership.MEMBER, ttl=ttl)
+        return MembershipCheck(membership=SetMembership.NOT_MEMBER, ttl=ttl)
+
+    def _check_member_client_side(self, *, key: str, member: str) -> MembershipCheck:
+        # Pipelined commands and PTTL are never served from the client-side
+        # cache, send the cachable commands on their own instead. Without the
+        # TTL, sets are not refreshed ahead, they are populated again once
+        # Redis expires them.
+        if self._client.sismember(key, member):
+            return MembershipCheck(membership=SetMembership.MEMBER, ttl=None)
+        if not self._client.exists(key):
+            return MembershipCheck(membership=SetMembership.NOT_CACHED, ttl=None)
+        # The set may have been stored between the two commands, since a
+        # missing set has no members, checked again before denying membership
+        if self._client.sismember(key, member):
+            return MembershipCheck(membership=SetMembership.MEMBER, ttl=None)
+        return MembershipCheck(membership=SetMembership.NOT_MEMBER, ttl=None)
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        # MSET cannot set a TTL, pipeline the SETs into a single round trip
+        with self._client.pipeline(transaction=False) as pipeline:  # pyright: ignore
+            for key, value in values.items():
+                key_ttl = ttl if ttl is not None else self._ttl_policy.get_ttl(key)
+                if key_ttl is not None:
+                    pipeline.set(name=key, value=value, px=int(key_ttl * 1000))
+                else:
+                    pipeline.set(name=key, value=value)
+            pipeline.execute()
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        values: list[bytes | None]
+        if isinstance(self._client, RedisCluster):
+            # The keys may hash to different slots, read them slot by slot
+            values = self._client.mget_nonatomic(keys)
+        else:
+            values = self._client.mget(keys)  # pyright: ignore
+
+        self._renew_ttls([key for key, value in zip(keys, values) if value is not None])
+        return values
+
+    def _renew_ttls(self, keys: Sequence[str], /) -> None:
+        sliding_ttls = {key: self._get_sliding_ttl(key) for key in keys}
+        if not any(ttl is not None for ttl in sliding_ttls.values()):
+            return
+
+        with self._client.pipeline(transaction=False) as pipeline:  # pyright: ignore
+            for key, sliding_ttl in sliding_ttls.items():
+                if sliding_ttl is not None:
+                    pipeline.pexpire(key, sliding_ttl)
+            pipeline.execute()
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        is_acquired = self._client.set(
+            name=key, value=token, px=int(ttl * 1000), nx=True
+        )
+        return bool(is_acquired)
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        self._release_lease_script(keys=[key], args=[token])
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        self._client.delete(*keys)
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        # A plain GET can be served from the client-side cache
+        generation: bytes | None = self._client.get(key)  # pyright: ignore
+        if generation is not None:
+            return int(generation)
+
+        with self._client.pipeline(transaction=False) as pipeline:  # pyright: ignore
+            pipeline.set(name=key, value=initial, nx=True)
+            pipeline.get(key)
+            _, stored_generation = pipeline.execute()
+        return int(stored_generation)
 
     @override
-    def _delete_key(self, key: str, /) -> None:
-        self._client.delete(key)
+    def _delete_matching(self, pattern: str, /) -> int:
+        # SCAN and UNLINK do not block Redis, unlike KEYS and DEL. On a cluster,
+        # every node is scanned and keys are unlinked slot by slot.
+        deleted_count = 0
+        keys = self._client.scan_iter(match=pattern, count=_SCAN_BATCH_SIZE)  # pyright: ignore
+        for batch in batched(keys, _SCAN_BATCH_SIZE):  # pyright: ignore
+            unlinked_count: int = self._client.unlink(*batch)  # pyright: ignore
+            deleted_count += unlinked_count
+        return deleted_count
+
+
+class RedisMessageBus(MessageBus):
+    """
+    Message bus on top of Redis Pub/Sub.
+
+    Messages are received on a daemon thread, which resubscribes on its own
+    when the connection to Redis is lost. Messages published while a process
+    is disconnected are not delivered to it.
+    """
+
+    _client: Redis | RedisCluster
+    _channel: str
+    _circuit_breaker: CircuitBreaker | None
+    _callbacks: list[Callable[[str], None]]
+    _stopped: threading.Event
+    _thread: threading.Thread | None
+
+    def __init__(
+        self,
+        redis_client: Redis | RedisCluster,
+        channel: str,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self._client = redis_client
+        self._channel = channel
+        self._circuit_breaker = circuit_breaker
+        self._callbacks = []
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @override
+    def publish(self, message: str, /) -> None:
+        circuit_breaker = self._circuit_breaker
+        if circuit_breaker is None:
+            self._client.publish(self._channel, message)  # pyright: ignore
+            return
+
+        # Messages are best effort, drop them while Redis is failing
+        if not circuit_breaker.allow_request():
+            return
+        try:
+            self._client.publish(self._channel, message)  # pyright: ignore
+        except RedisError:
+            circuit_breaker.record_failure()
+            raise
+        circuit_breaker.record_success()
+
+    @override
+    def subscribe(self, callback: Callable[[str], None], /) -> None:
+        self._callbacks.append(callback)
+
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._listen, name=f"bus:{self._channel}", daemon=True
+            )
+            self._thread.start()
+
+    @override
+    def close(self) -> None:
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)  # pyright: ignore
+            try:
+                pubsub.subscribe(self._channel)  # pyright: ignore
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=_BUS_POLL_INTERVAL)  # pyright: ignore
+                    if message is not None:
+                        self._dispatch(message["data"])  # pyright: ignore
+            except RedisError as error:
+                logger.warning(
+                    f"Lost subscription to channel '{self._channel}', "
+                    f"resubscribing: {str(error)}"
+                )
+                self._stopped.wait(_BUS_RECONNECT_DELAY)
+            finally:
+                pubsub.close()
+
+    def _dispatch(self, data: bytes) -> None:
+        message = data.decode()
+        for callback in self._callbacks:
+            try:
+                callback(message)
+            except Exception as error:
+                logger.error(
+                    f"Failed to handle message on channel '{self._channel}': "
+                    f"{str(error)}"
+                )
@@ -0,0 +1,148 @@
+import bisect
+import hashlib
+from collections.abc import Mapping, Sequence
+from typing import Final, Set, override
+
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    MembershipCheck,
+)
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.metrics import CacheMetrics
+
+# Values are passed on to the shards as they are stored
+_BYTES_CODEC: Final[BytesCodec] = BytesCodec()
+
+# Points per shard on the ring, more points spread the keys more evenly
+_VIRTUAL_NODES: Final[int] = 160
+
+
+def _get_hash_tag(key: str, /) -> str:
+    """
+    Get the part of a key that decides its shard, following Redis Cluster.
+
+    :param key: The cache key.
+    :return: The non-empty content of the first pair of braces, the whole key
+        if there is none.
+    """
+    start = key.find("{")
+    if start == -1:
+        return key
+
+    end = key.find("}", start + 1)
+    if end <= start + 1:
+        return key
+    return key[start + 1 : end]
+
+
+def _hash(value: str, /) -> int:
+    # Stable across processes, unlike the built-in hash
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest)
+
+
+class ShardedCacheService(CacheService):
+    """
+    Cache spread over several independent shards by a consistent-hash ring.
+
+    Keys are routed by their hash tag, so that keys sharing one are stored on
+    the same shard. Adding or removing a shard only moves the keys of the ring
+    segments it takes over or gives up. Operations on several keys are split
+    into one call per shard, and pattern deletions are run on every shard.
+
+    Shards are placed on the ring by name, so all processes must name them
+    alike, e.g. by the address of their node.
+    """
+
+    _shards: dict[str, CacheService]
+    _ring_hashes: list[int]
+    _ring_shards: list[CacheService]
+
+    def __init__(
+        self,
+        *,
+        shards: Mapping[str, CacheService],
+        metrics: CacheMetrics | None = None,
+    ) -> None:
+        if not shards:
+            raise ValueError("A sharded cache needs at least one shard.")
+
+        self._shards = dict(shards)
+        self._metrics = metrics
+
+        points = sorted(
+            (_hash(f"{name}#{index}"), name)
+            for name in self._shards
+            for index in range(_VIRTUAL_NODES)
+        )
+        self._ring_hashes = [point for point, _ in points]
+        self._ring_shards = [self._shards[name] for _, name in points]
+
+    def _get_shard(self, key: str, /) -> CacheService:
+        index = bisect.bisect(self._ring_hashes, _hash(_get_hash_tag(key)))
+        return self._ring_shards[index % len(self._ring_shards)]
+
+    def _group_by_shard(self, keys: Sequence[str], /) -> dict[CacheService, list[str]]:
+        keys_by_shard: dict[CacheService, list[str]] = {}
+        for key in keys:
+            keys_by_shard.setdefault(self._get_shard(key), []).append(key)
+        return keys_by_shard
+
+    @override
+    def _store_set(self, *, key: str, value: Set[str]) -> None:
+        self._get_shard(key).store_set(key=key, value=value)
+
+    @override
+    def _get_set(self, key: str, /) -> set[str] | None:
+        return self._get_shard(key).get_set(key)
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._get_shard(key).add_to_set(key=key, member=member)
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        self._get_shard(key).remove_from_set(key=key, member=member)
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        return self._get_shard(key).check_member(key=key, member=member)
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        for shard, keys in self._group_by_shard(list(values)).items():
+            shard.store_values(
+                values={key: values[key] for key in keys},
+                codec=_BYTES_CODEC,
+                ttl=ttl,
+            )
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        values: dict[str, bytes] = {}
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            values.update(shard.get_values(shard_keys, codec=_BYTES_CODEC))
+        return [values.get(key) for key in keys]
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        return self._get_shard(key).acquire_lease(key=key, token=token, ttl=ttl)
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        self._get_shard(key).release_lease(key=key, token=token)
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            shard.delete_keys(shard_keys)
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        # The shard starts missing counters on its own
+        return self._get_shard(key).start_generation(key)
+
+    @override
+    def _delete_matching(self, pattern: str, /) -> int:
+        # A pattern may match keys of any hash tag
+        return sum(shard.delete_matching(pattern) for shard in self._shards.values())
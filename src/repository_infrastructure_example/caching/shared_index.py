@@ -0,0 +1,525 @@
+import bisect
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from collections.abc import Set as AbstractSet
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Final
+from uuid import UUID, uuid4
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from repository_infrastructure_example.caching.bus import MessageBus
+
+_MAGIC: Final[bytes] = b"RIEINDEX"
+_FORMAT_VERSION: Final[int] = 1
+_IDENTIFIER_SIZE: Final[int] = 16
+
+# Magic, format version, version stamp of the data, invalidation count, sequence,
+# build time as a Unix timestamp, number of organisations and of users
+_SNAPSHOT_HEADER: Final[struct.Struct] = struct.Struct("<8sIqQQdQQ")
+# Index of the first user of an organisation, and one past the last
+_USER_START: Final[struct.Struct] = struct.Struct("<Q")
+# The control file holds the number of invalidations and the sequence of the
+# latest snapshot, written separately by their single writers, followed by the
+# ID of the host, which tells its deletions apart from those of other hosts
+_COUNTER: Final[struct.Struct] = struct.Struct("<Q")
+_INVALIDATION_COUNT_OFFSET: Final[int] = 0
+_SEQUENCE_OFFSET: Final[int] = _COUNTER.size
+_HOST_ID_OFFSET: Final[int] = 2 * _COUNTER.size
+_CONTROL_SIZE: Final[int] = _HOST_ID_OFFSET + _IDENTIFIER_SIZE
+
+_SNAPSHOT_FILE_NAME: Final[str] = "snapshot"
+_CONTROL_FILE_NAME: Final[str] = "control"
+_LOCK_FILE_NAME: Final[str] = "refresher.lock"
+
+
+class _Snapshot:
+    """
+    Read-only view of a snapshot file mapped into memory.
+
+    Organisation IDs are stored as a sorted array of packed 128-bit IDs,
+    followed by the offsets of the users of every organisation in the user ID
+    array, in which the IDs of each organisation are sorted as well. Lookups
+    are binary searches over the mapped file, which is never copied.
+    """
+
+    _map: mmap.mmap
+    stamp: int
+    invalidation_count: int
+    sequence: int
+    built_at: datetime
+    organisation_count: int
+    user_count: int
+    _user_starts_offset: int
+    _users_offset: int
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as file:
+            # The mapping stays valid once the file is replaced or closed
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            format_version,
+            self.stamp,
+            self.invalidation_count,
+            self.sequence,
+            built_at,
+            self.organisation_count,
+            self.user_count,
+        ) = _SNAPSHOT_HEADER.unpack_from(self._map)
+        if magic != _MAGIC or format_version != _FORMAT_VERSION:
+            raise ValueError(f"'{path}' is not a snapshot of this format.")
+
+        self.built_at = datetime.fromtimestamp(built_at, timezone.utc)
+        self._user_starts_offset = (
+            _SNAPSHOT_HEADER.size + self.organisation_count * _IDENTIFIER_SIZE
+        )
+        self._users_offset = (
+            self._user_starts_offset + (self.organisation_count + 1) * _USER_START.size
+        )
+
+    @property
+    def size_in_bytes(self) -> int:
+        return len(self._map)
+
+    def _find(self, identifier: UUID, *, offset: int, start: int, end: int) -> int:
+        """
+        Find an identifier in a sorted range of packed identifiers.
+
+        :param identifier: The identifier to find.
+        :param offset: The position of the array in the file.
+        :param start: The index of the first identifier of the range.
+        :param end: The index one past the last identifier of the range.
+        :return: The index of the identifier, or -1 if it is not in the range.
+        """
+        data = self._map
+        target = identifier.bytes
+
+        def read(index: int) -> bytes:
+            position = offset + index * _IDENTIFIER_SIZE
+            return data[position : position + _IDENTIFIER_SIZE]
+
+        index = bisect.bisect_left(range(end), target, start, end, key=read)
+        if index < end and read(index) == target:
+            return index
+        return -1
+
+    def find_organisation(self, organisation_id: UUID) -> int:
+        return self._find(
+            organisation_id,
+            offset=_SNAPSHOT_HEADER.size,
+            start=0,
+            end=self.organisation_count,
+        )
+
+    def contains_user(self, *, organisation_index: int, user_id: UUID) -> bool:
+        (start,) = _USER_START.unpack_from(
+            self._map, self._user_starts_offset + organisation_index * _USER_START.size
+        )
+        (end,) = _USER_START.unpack_from(
+            self._map,
+            self._user_starts_offset + (organisation_index + 1) * _USER_START.size,
+        )
+        return (
+            self._find(user_id, offset=self._users_offset, start=start, end=end) != -1
+        )
+
+
+def _pack_snapshot(
+    *,
+    organisation_ids: Iterable[UUID],
+    user_ids: Mapping[UUID, AbstractSet[UUID]],
+    stamp: int,
+    invalidation_count: int,
+    sequence: int,
+) -> bytes:
+    # Sorting the packed bytes matches the comparisons of the lookups
+    organisations = sorted(
+        organisation_id.bytes for organisation_id in set(organisation_ids)
+    )
+
+    user_starts = [0]
+    users: list[bytes] = []
+    for organisation in organisations:
+        users.extend(
+            sorted(
+                user_id.bytes
+                for user_id in user_ids.get(UUID(bytes=organisation), set())
+            )
+        )
+        user_starts.append(len(users))
+
+    return b"".join(
+        (
+            _SNAPSHOT_HEADER.pack(
+                _MAGIC,
+                _FORMAT_VERSION,
+                stamp,
+                invalidation_count,
+                sequence,
+                time.time(),
+                len(organisations),
+                len(users),
+            ),
+            *organisations,
+            *(_USER_START.pack(user_start) for user_start in user_starts),
+            *users,
+        )
+    )
+
+
+class SharedIdentifierIndexStatistics(BaseModel):
+    is_ready: bool = Field(description="Whether a snapshot of the IDs is available.")
+    is_current: bool = Field(
+        description="Whether the snapshot answers lookups, i.e. no organisation or "
+        "user was deleted since it was built."
+    )
+    is_refresher: bool = Field(
+        description="Whether this process is the one refreshing the snapshot."
+    )
+    organisation_count: int = Field(
+        description="The number of organisation IDs in the snapshot."
+    )
+    user_count: int = Field(description="The number of user IDs in the snapshot.")
+    size_in_bytes: int = Field(description="The size of the snapshot in bytes.")
+    built_at: datetime | None = Field(
+        description="When the snapshot was built, if ever."
+    )
+
+
+class SharedIdentifierIndex:
+    """
+    Index of all organisation and user IDs shared by the processes of a host.
+
+    One process, the one holding the lock of the directory, refreshes the
+    index: whenever the version of the data in the database has changed, it
+    writes a snapshot of all IDs to a file, which every process maps into its
+    memory. All processes thus share one copy of the IDs, and look them up
+    without a network hop. Since every snapshot loads all IDs, snapshots are
+    written at most once per rebuild interval, however often the data
+    changes. The refresher is taken over by another process once it exits.
+
+    Only IDs found in the index are answered by it, unknown IDs are looked up
+    as before, since they may have been created since the snapshot was built.
+    Deletions bump a counter shared by all processes, and a snapshot built
+    before the latest deletion answers nothing until it is replaced. Deletions
+    are broadcast to the other hosts, which bump their counters as well; a
+    broadcast that is lost leaves the deleted IDs found there until the next
+    refresh.
+    """
+
+    _directory: Path
+    _load_organisation_ids: Callable[[], Iterable[UUID]]
+    _load_user_ids: Callable[[], Mapping[UUID, AbstractSet[UUID]]]
+    _get_stamp: Callable[[], int]
+    _message_bus: MessageBus | None
+    _refresh_interval: float
+    _rebuild_interval: float
+
+    _control: mmap.mmap
+    _host_id: UUID
+    _snapshot: _Snapshot | None
+    _lock_fd: int | None
+    _lock: threading.Lock
+    _stopped: threading.Event
+    _thread: threading.Thread | None
+
+    def __init__(
+        self,
+        *,
+        directory: Path,
+        load_organisation_ids: Callable[[], Iterable[UUID]],
+        load_user_ids: Callable[[], Mapping[UUID, AbstractSet[UUID]]],
+        get_stamp: Callable[[], int],
+        message_bus: MessageBus | None,
+        refresh_interval: float,
+        rebuild_interval: float,
+    ) -> None:
+        self._directory = directory
+        self._load_organisation_ids = load_organisation_ids
+        self._load_user_ids = load_user_ids
+        self._get_stamp = get_stamp
+        self._message_bus = message_bus
+        self._refresh_interval = refresh_interval
+        self._rebuild_interval = rebuild_interval
+
+        directory.mkdir(parents=True, exist_ok=True)
+        control_fd = os.open(directory / _CONTROL_FILE_NAME, os.O_RDWR | os.O_CREAT)
+        try:
+            # Locked, so that the processes starting together agree on the ID
+            # of the host. Growing the file fills it with zeros, an existing
+            # one is kept
+            fcntl.flock(control_fd, fcntl.LOCK_EX)
+            if os.fstat(control_fd).st_size < _CONTROL_SIZE:
+                os.ftruncate(control_fd, _CONTROL_SIZE)
+            self._control = mmap.mmap(control_fd, _CONTROL_SIZE)
+
+            host_id = self._control[_HOST_ID_OFFSET:_CONTROL_SIZE]
+            if host_id == bytes(_IDENTIFIER_SIZE):
+                host_id = uuid4().bytes
+                self._control[_HOST_ID_OFFSET:_CONTROL_SIZE] = host_id
+            self._host_id = UUID(bytes=host_id)
+        finally:
+            # Released explicitly, the mapping keeps a duplicate of the
+            # descriptor and with it the lock
+            fcntl.flock(control_fd, fcntl.LOCK_UN)
+            os.close(control_fd)
+
+        self._snapshot = None
+        self._lock_fd = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _read_control(self) -> tuple[int, int]:
+        (invalidation_count,) = _COUNTER.unpack_from(
+            self._control, _INVALIDATION_COUNT_OFFSET
+        )
+        (sequence,) = _COUNTER.unpack_from(self._control, _SEQUENCE_OFFSET)
+        return invalidation_count, sequence
+
+    def _get_current_snapshot(self) -> _Snapshot | None:
+        """
+        Get the latest snapshot, unless an ID was deleted since it was built.
+
+        :return: The snapshot, or None if there is no snapshot to answer from.
+        """
+        invalidation_count, sequence = self._read_control()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.sequence < sequence:
+            snapshot = self._map_snapshot()
+
+        if snapshot is None or snapshot.invalidation_count != invalidation_count:
+            return None
+        return snapshot
+
+    def _map_snapshot(self) -> _Snapshot | None:
+        with self._lock:
+            try:
+                snapshot = _Snapshot(self._directory / _SNAPSHOT_FILE_NAME)
+            except FileNotFoundError:
+                return None
+            except ValueError as error:
+                logger.error(f"Failed to map the shared ID index: {str(error)}")
+                return None
+
+            # Lookups still using the previous snapshot keep it mapped
+            self._snapshot = snapshot
+            return snapshot
+
+    def contains_organisation(self, organisation_id: UUID) -> bool:
+        """
+        Check whether an organisation is known to exist.
+
+        :param organisation_id: The ID of the organisation.
+        :return: True if the organisation exists, False if it is unknown to the
+            index, in which case it may still exist.
+        """
+        snapshot = self._get_current_snapshot()
+        return (
+            snapshot is not None and snapshot.find_organisation(organisation_id) != -1
+        )
+
+    def contains_user(self, *, organisation_id: UUID, user_id: UUID) -> bool:
+        """
+        Check whether a user of an organisation is known to exist.
+
+        :param organisation_id: The ID of the organisation.
+        :param user_id: The ID of the user.
+        :return: True if the user exists, False if it is unknown to the index, in
+            which case it may still exist.
+        """
+        snapshot = self._get_current_snapshot()
+        if snapshot is None:
+            return False
+
+        organisation_index = snapshot.find_organisation(organisation_id)
+        return organisation_index != -1 and snapshot.contains_user(
+            organisation_index=organisation_index, user_id=user_id
+        )
+
+    def invalidate(self) -> None:
+        """
+        Stop answering from the current snapshot until it is refreshed.
+
+        Must be called after an organisation or user was deleted, the other
+        hosts are told to do the same.
+
+        :return: None
+        """
+        self._count_invalidation()
+
+        if self._message_bus is None:
+            return
+
+        try:
+            self._message_bus.publish(str(self._host_id))
+        except Exception as error:
+            logger.error(f"Failed to broadcast the invalidation: {str(error)}")
+
+    def _count_invalidation(self) -> None:
+        # Counted under a lock on the control file, a lost count could match a
+        # snapshot built before the deletion. The lock is taken on a descriptor
+        # of its own, since threads sharing one would not exclude each other
+        control_fd = os.open(self._directory / _CONTROL_FILE_NAME, os.O_RDWR)
+        try:
+            fcntl.flock(control_fd, fcntl.LOCK_EX)
+            invalidation_count, _ = self._read_control()
+            _COUNTER.pack_into(
+                self._control, _INVALIDATION_COUNT_OFFSET, invalidation_count + 1
+            )
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(control_fd)
+
+    def refresh(self) -> bool:
+        """
+        Write a new snapshot if the data has changed since the current one.
+
+        Must only be called by the process holding the refresher lock.
+
+        :return: True if a new snapshot was written, False if it was current or
+            the previous one was written less than the rebuild interval ago.
+        """
+        # Read before the IDs, so that changes made while loading them are
+        # picked up by the next refresh
+        invalidation_count, sequence = self._read_control()
+        stamp = self._get_stamp()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.sequence < sequence:
+            snapshot = self._map_snapshot()
+        if (
+            snapshot is not None
+            and snapshot.stamp == stamp
+            and snapshot.invalidation_count == invalidation_count
+        ):
+            return False
+        # Rebuilt once the interval has passed, the current snapshot still
+        # answers for the IDs it holds unless one was deleted
+        if (
+            snapshot is not None
+            and time.time() - snapshot.built_at.timestamp() < self._rebuild_interval
+        ):
+            return False
+
+        started = time.perf_counter()
+        sequence = max(sequence, snapshot.sequence if snapshot else 0) + 1
+        data = _pack_snapshot(
+            organisation_ids=self._load_organisation_ids(),
+            user_ids=self._load_user_ids(),
+            stamp=stamp,
+            invalidation_count=invalidation_count,
+            sequence=sequence,
+        )
+
+        # Replaced atomically, processes still mapping the old file keep it
+        temporary_path = self._directory / f"{_SNAPSHOT_FILE_NAME}.tmp"
+        temporary_path.write_bytes(data)
+        temporary_path.replace(self._directory / _SNAPSHOT_FILE_NAME)
+
+        _COUNTER.pack_into(self._control, _SEQUENCE_OFFSET, sequence)
+
+        snapshot = self._map_snapshot()
+        if snapshot is not None:
+            logger.info(
+                f"Refreshed the shared ID index with {snapshot.organisation_count} "
+                f"organisations and {snapshot.user_count} users in "
+                f"{time.perf_counter() - started:.3f}s."
+            )
+        return True
+
+    def _on_message(self, message: str) -> None:
+        # Invalidations of this host were counted before they were broadcast
+        if message != str(self._host_id):
+            self._count_invalidation()
+
+    def _try_to_become_refresher(self) -> bool:
+        if self._lock_fd is not None:
+            return True
+
+        lock_fd = os.open(self._directory / _LOCK_FILE_NAME, os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            return False
+
+        logger.info("This process refreshes the shared ID index.")
+        self._lock_fd = lock_fd
+        return True
+
+    def start(self) -> None:
+        """
+        Refresh the index in the background, if no other process does.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        if self._message_bus is not None:
+            self._message_bus.subscribe(self._on_message)
+
+        self._thread = threading.Thread(
+            target=self._refresh_periodically, name="shared-index", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop refreshing the index, letting another process take over.
+
+        :return: None
+        """
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _refresh_periodically(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if self._try_to_become_refresher():
+                    self.refresh()
+            except Exception as error:
+                logger.error(f"Failed to refresh the shared ID index: {str(error)}")
+            self._stopped.wait(self._refresh_interval)
+
+    @property
+    def statistics(self) -> SharedIdentifierIndexStatistics:
+        """Get the size and freshness of the current snapshot."""
+        current_snapshot = self._get_current_snapshot()
+        snapshot = self._snapshot
+        if snapshot is None:
+            return SharedIdentifierIndexStatistics(
+                is_ready=False,
+                is_current=False,
+                is_refresher=self._lock_fd is not None,
+                organisation_count=0,
+                user_count=0,
+                size_in_bytes=0,
+                built_at=None,
+            )
+
+        return SharedIdentifierIndexStatistics(
+            is_ready=True,
+            is_current=current_snapshot is not None,
+            is_refresher=self._lock_fd is not None,
+            organisation_count=snapshot.organisation_count,
+            user_count=snapshot.user_count,
+            size_in_bytes=snapshot.size_in_bytes,
+            built_at=snapshot.built_at,
+        )
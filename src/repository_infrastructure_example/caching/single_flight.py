@@ -0,0 +1,174 @@
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Final, NamedTuple
+from uuid import uuid4
+
+from loguru import logger
+
+from repository_infrastructure_example.caching.cache import CacheService
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+
+# Seconds between cache reads while waiting for another process to populate a key
+_POLL_INTERVAL: Final[float] = 0.05
+# Number of keys refreshed in the background at the same time
+_REFRESH_WORKERS: Final[int] = 2
+
+
+class CachedValue[T](NamedTuple):
+    value: T
+    # Seconds until the key expires, None if it does not expire
+    ttl: float | None
+
+
+class SingleFlight:
+    """
+    Lets only one caller at a time populate a cache key.
+
+    Callers within a process serialise on a lock per key, callers across
+    processes on a lease stored in the cache. Callers that do not get the
+    lease wait for the holder to populate the key. If it does not within the
+    wait timeout, for example because the holder died, they populate the key
+    themselves.
+
+    Keys are stored for a stale window beyond their TTL. Keys read within the
+    refresh-ahead period before their TTL ends, or within the stale window
+    after it, are served as they are and populated again in the background.
+    """
+
+    _cache_service: CacheService
+    _cache_key_manager: CacheKeyManager
+    _lease_ttl: float
+    _wait_timeout: float
+    _refresh_threshold: float | None
+    _locks: weakref.WeakValueDictionary[str, threading.Lock]
+    _locks_lock: threading.Lock
+    _refreshing: set[str]
+    _executor: ThreadPoolExecutor
+
+    def __init__(
+        self,
+        *,
+        cache_service: CacheService,
+        cache_key_manager: CacheKeyManager,
+        lease_ttl: float,
+        wait_timeout: float,
+        stale_window: float,
+        refresh_ahead: float,
+    ) -> None:
+        self._cache_service = cache_service
+        self._cache_key_manager = cache_key_manager
+        self._lease_ttl = lease_ttl
+        self._wait_timeout = wait_timeout
+        self._refresh_threshold = stale_window + refresh_ahead or None
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=_REFRESH_WORKERS, thread_name_prefix="cache-refresh"
+        )
+
+    def _get_lock(self, key: str, /) -> threading.Lock:
+        # Locks are dropped once no caller holds a reference to them anymore
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[key] = lock
+            return lock
+
+    def run[T](
+        self,
+        key: str,
+        *,
+        read: Callable[[], CachedValue[T] | None],
+        populate: Callable[[], T],
+    ) -> T:
+        """
+        Read a cache key, populating it if it is missing.
+
+        :param key: The cache key.
+        :param read: Reads the value from the cache, returns None if missing.
+        :param populate: Loads the value from the source of truth, stores it in
+            the cache and returns it.
+        :return: The value read from the cache or populated.
+        """
+        cached = read()
+        if cached is not None:
+            if self._is_due_for_refresh(cached.ttl):
+                self._refresh_in_background(key, populate)
+            return cached.value
+
+        with self._get_lock(key):
+            # Another thread may have populated the key while we waited
+            cached = read()
+            if cached is not None:
+                return cached.value
+
+            lease_key = self._cache_key_manager.get_lease_key(key)
+            token = uuid4().hex
+            if self._cache_service.acquire_lease(
+                key=lease_key, token=token, ttl=self._lease_ttl
+            ):
+                try:
+                    return populate()
+                finally:
+                    self._cache_service.release_lease(key=lease_key, token=token)
+
+            # Another process populates the key, wait for it
+            deadline = time.monotonic() + self._wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(_POLL_INTERVAL)
+                cached = read()
+                if cached is not None:
+                    return cached.value
+
+            return populate()
+
+    def _is_due_for_refresh(self, ttl: float | None) -> bool:
+        if ttl is None or self._refresh_threshold is None:
+            return False
+        return ttl <= self._refresh_threshold
+
+    def _refresh_in_background(self, key: str, populate: Callable[[], object]) -> None:
+        with self._locks_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        try:
+            self._executor.submit(self._refresh, key, populate)
+        except RuntimeError:
+            # The executor has been shut down
+            with self._locks_lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: str, populate: Callable[[], object]) -> None:
+        lease_key = self._cache_key_manager.get_lease_key(key)
+        token = uuid4().hex
+        try:
+            # Another process refreshes the key already
+            if not self._cache_service.acquire_lease(
+                key=lease_key, token=token, ttl=self._lease_ttl
+            ):
+                return
+
+            try:
+                populate()
+            finally:
+                self._cache_service.release_lease(key=lease_key, token=token)
+        except Exception as error:
+            logger.error(f"Failed to refresh key '{key}': {str(error)}")
+        finally:
+            with self._locks_lock:
+                self._refreshing.discard(key)
+
+    def close(self) -> None:
+        """
+        Stop refreshing keys in the background.
+
+        :return: None
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
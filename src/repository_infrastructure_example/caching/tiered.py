@@ -0,0 +1,214 @@
+from collections.abc import Mapping, Sequence
+from typing import Final, override
+
+from repository_infrastructure_example.caching.bus import MessageBus
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    MembershipCheck,
+    SetMembership,
+)
+from repository_infrastructure_example.caching.codecs import BytesCodec
+
+# Values are copied between the tiers as they are stored
+_BYTES_CODEC: Final[BytesCodec] = BytesCodec()
+# Invalidation messages carry a key, or a pattern when prefixed with this
+_PATTERN_MESSAGE_PREFIX: Final[str] = "pattern:"
+# Members and non-members in the local results of membership checks
+_MEMBER_PREFIX: Final[str] = "+"
+_NON_MEMBER_PREFIX: Final[str] = "-"
+
+
+def _get_member_checks_key(key: str, /) -> str:
+    """
+    Get the local key of the membership checks answered for a set.
+
+    The key keeps the family of the set, see `CacheKeyManager.get_key_family`,
+    and is matched by the same patterns, so that the results are dropped along
+    with the set.
+
+    :param key: The key of the set.
+    :return: The key of the set of checked members.
+    """
+    head, separator, family = key.rpartition("__")
+    return f"{head}{separator}member_checks__{family}"
+
+
+def subscribe_to_invalidations(
+    invalidation_bus: MessageBus, cache_service: CacheService, /
+) -> None:
+    """
+    Drop the keys and patterns broadcast on the invalidation bus from a cache.
+
+    :param invalidation_bus: The bus the invalidations are broadcast on.
+    :param cache_service: The local cache to drop the keys from.
+    :return: None
+    """
+
+    def invalidate(message: str) -> None:
+        if message.startswith(_PATTERN_MESSAGE_PREFIX):
+            cache_service.delete_matching(message.removeprefix(_PATTERN_MESSAGE_PREFIX))
+        else:
+            cache_service.delete_keys([message, _get_member_checks_key(message)])
+
+    invalidation_bus.subscribe(invalidate)
+
+
+class TieredCacheService(CacheService):
+    """
+    Two-tier cache with a local cache in front of a shared cache.
+
+    Reads are served from the local cache when possible and fill it from the
+    shared cache otherwise. Membership checks of sets not cached locally are
+    answered by the shared cache and their results kept locally, so that the
+    whole set is not transferred. Writes go to both tiers. Deleted keys are
+    broadcast on the invalidation bus, so that the local caches of all other
+    processes drop them as well.
+    """
+
+    _local: CacheService
+    _shared: CacheService
+    _invalidation_bus: MessageBus | None
+
+    def __init__(
+        self,
+        *,
+        local: CacheService,
+        shared: CacheService,
+        invalidation_bus: MessageBus | None,
+    ) -> None:
+        self._local = local
+        self._shared = shared
+        self._invalidation_bus = invalidation_bus
+
+        if invalidation_bus is not None:
+            subscribe_to_invalidations(invalidation_bus, local)
+
+    @override
+    def _store_set(self, *, key: str, value: set[str]) -> None:
+        self._shared.store_set(key=key, value=value)
+        self._local.store_set(key=key, value=value)
+        self._local.delete_key(_get_member_checks_key(key))
+
+    @override
+    def _get_set(self, key: str, /) -> set[str] | None:
+        value = self._local.get_set(key)
+        if value is not None:
+            return value
+
+        value = self._shared.get_set(key)
+        if value is not None:
+            self._local.store_set(key=key, value=value)
+        return value
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._shared.add_to_set(key=key, member=member)
+        self._local.add_to_set(key=key, member=member)
+        self._local.delete_key(_get_member_checks_key(key))
+        self._invalidate_other_processes(key)
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        self._shared.remove_from_set(key=key, member=member)
+        self._local.remove_from_set(key=key, member=member)
+        self._local.delete_key(_get_member_checks_key(key))
+        self._invalidate_other_processes(key)
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        membership = self._local.is_member(key=key, member=member)
+        if membership != SetMembership.NOT_CACHED:
+            # The expiry of the local copy says nothing about the shared one
+            return MembershipCheck(membership=membership, ttl=None)
+
+        checks_key = _get_member_checks_key(key)
+        checked_membership = self._local.is_member(
+            key=checks_key, member=f"{_MEMBER_PREFIX}{member}"
+        )
+        if checked_membership == SetMembership.MEMBER:
+            return MembershipCheck(membership=SetMembership.MEMBER, ttl=None)
+        if checked_membership == SetMembership.NOT_MEMBER and (
+            self._local.is_member(
+                key=checks_key, member=f"{_NON_MEMBER_PREFIX}{member}"
+            )
+            == SetMembership.MEMBER
+        ):
+            return MembershipCheck(membership=SetMembership.NOT_MEMBER, ttl=None)
+
+        # Only the result is kept locally, filling the local cache with the set
+        # would mean transferring the whole set
+        check = self._shared.check_member(key=key, member=member)
+        if check.membership == SetMembership.NOT_CACHED:
+            return check
+
+        result = (
+            f"{_MEMBER_PREFIX}{member}"
+            if check.membership == SetMembership.MEMBER
+            else f"{_NON_MEMBER_PREFIX}{member}"
+        )
+        if checked_membership == SetMembership.NOT_CACHED:
+            # Concurrent checks may replace each other's results, which only
+            # costs another check
+            self._local.store_set(key=checks_key, value={result})
+        else:
+            self._local.add_to_set(key=checks_key, member=result)
+        return check
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        self._shared.store_values(values=values, codec=_BYTES_CODEC, ttl=ttl)
+        self._local.store_values(values=values, codec=_BYTES_CODEC, ttl=ttl)
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        values = self._local.get_values(keys, codec=_BYTES_CODEC)
+
+        missing_keys = [key for key in keys if key not in values]
+        if missing_keys:
+            shared_values = self._shared.get_values(missing_keys, codec=_BYTES_CODEC)
+            self._local.store_values(values=shared_values, codec=_BYTES_CODEC)
+            values.update(shared_values)
+
+        return [values.get(key) for key in keys]
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        # Leases coordinate processes, so they only live in the shared cache
+        return self._shared.acquire_lease(key=key, token=token, ttl=ttl)
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        self._shared.release_lease(key=key, token=token)
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        self._shared.delete_keys(keys)
+        self._local.delete_keys([*keys, *(_get_member_checks_key(key) for key in keys)])
+        for key in keys:
+            self._invalidate_other_processes(key)
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        local_generation = self._local.get_generation(key)
+        if local_generation is not None:
+            return local_generation
+
+        # The shared cache starts missing counters on its own
+        generation = self._shared.start_generation(key)
+        self._local.store_value(
+            key=key, value=str(generation).encode(), codec=_BYTES_CODEC
+        )
+        return generation
+
+    @override
+    def _delete_matching(self, pattern: str, /) -> int:
+        deleted_count = self._shared.delete_matching(pattern)
+        self._local.delete_matching(pattern)
+        self._invalidate_other_processes(f"{_PATTERN_MESSAGE_PREFIX}{pattern}")
+        return deleted_count
+
+    def _invalidate_other_processes(self, message: str, /) -> None:
+        # Other processes reload the keys from the shared cache on next access.
+        # The message also reaches this process, which does no harm.
+        if self._invalidation_bus is not None:
+            self._invalidation_bus.publish(message)
@@ -0,0 +1,79 @@
+import random
+from collections.abc import Mapping, Set
+
+from repository_infrastructure_example.caching.key_manager import (
+    CacheKeyFamily,
+    CacheKeyManager,
+)
+
+
+class TtlPolicy:
+    """
+    Decides the time-to-live (TTL) of cache keys by their family.
+
+    Keys written at the same time, e.g. while warming up the cache, would
+    otherwise expire at the same time and be populated again all at once. The
+    jitter shortens the TTL of every key by a random fraction of up to its
+    value, which spreads their expiry, while the configured TTL stays an upper
+    bound.
+
+    Keys of sliding families get their TTL renewed whenever they are read, so
+    that hot keys are not populated again. They are only refreshed once they
+    are not read for a whole TTL, so only families kept up to date on writes
+    should slide.
+    """
+
+    _default_ttl: float | None
+    _family_ttls: dict[str, float]
+    _jitter: float
+    _extension: float
+    _sliding_families: frozenset[str]
+    _cache_key_manager: CacheKeyManager
+
+    def __init__(
+        self,
+        *,
+        default_ttl: float | None = None,
+        family_ttls: Mapping[CacheKeyFamily, float] | None = None,
+        jitter: float = 0.0,
+        extension: float = 0.0,
+        sliding_families: Set[CacheKeyFamily] = frozenset(),
+    ) -> None:
+        if not 0 <= jitter < 1:
+            raise ValueError("The jitter must be at least 0 and less than 1.")
+
+        self._default_ttl = default_ttl
+        # Looked up by the family of a key, which is a plain string
+        self._family_ttls = {
+            str(family): ttl for family, ttl in (family_ttls or {}).items()
+        }
+        self._jitter = jitter
+        self._extension = extension
+        self._sliding_families = frozenset(str(family) for family in sliding_families)
+        self._cache_key_manager = CacheKeyManager()
+
+    def get_ttl(self, key: str, /) -> float | None:
+        """
+        Get the TTL to store a key with.
+
+        :param key: The cache key.
+        :return: The TTL in seconds, including the jitter and the extension, or
+            None if the key does not expire.
+        """
+        family = self._cache_key_manager.get_key_family(key)
+        ttl = self._family_ttls.get(family, self._default_ttl)
+        if ttl is None:
+            return None
+
+        if self._jitter:
+            ttl *= 1 - random.uniform(0, self._jitter)
+        return ttl + self._extension
+
+    def is_sliding(self, key: str, /) -> bool:
+        """
+        Check whether reading a key renews its TTL.
+
+        :param key: The cache key.
+        :return: Whether the key belongs to a sliding family.
+        """
+        return self._cache_key_manager.get_key_family(key) in self._sliding_families
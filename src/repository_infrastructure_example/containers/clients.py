@@ -1,6 +1,13 @@
+from collections.abc import Mapping
+
 from redis import Redis
 
+from repository_infrastructure_example.caching.client_side import ClientSideCache
 from repository_infrastructure_example.infrastructure.postgres import PostgresClient
+from repository_infrastructure_example.infrastructure.redis import RedisClient
+from repository_infrastructure_example.infrastructure.redis_pool import (
+    RedisPoolMetrics,
+)
 
 
 class Clients:
@@ -9,10 +16,18 @@ class Clients:
     def __init__(
         self,
         postgres_client: PostgresClient,
-        redis_client: Redis,
+        redis_client: RedisClient,
+        redis_shard_clients: Mapping[str, Redis] | None = None,
+        redis_client_side_cache: ClientSideCache | None = None,
+        redis_pool_metrics: RedisPoolMetrics | None = None,
     ) -> None:
         self._postgres: PostgresClient = postgres_client
-        self._redis: Redis = redis_client
+        self._redis: RedisClient = redis_client
+        self._redis_shards: dict[str, Redis] = dict(redis_shard_clients or {})
+        self._redis_client_side_cache: ClientSideCache | None = redis_client_side_cache
+        self._redis_pool_metrics: RedisPoolMetrics = (
+            redis_pool_metrics or RedisPoolMetrics()
+        )
 
     @property
     def postgres(self) -> PostgresClient:
@@ -20,6 +35,21 @@ class Clients:
         return self._postgres
 
     @property
-    def redis(self) -> Redis:
+    def redis(self) -> RedisClient:
         """Get the Redis client."""
         return self._redis
+
+    @property
+    def redis_shards(self) -> dict[str, Redis]:
+        """Get the Redis clients by node address, empty unless the cache is sharded."""
+        return self._redis_shards
+
+    @property
+    def redis_client_side_cache(self) -> ClientSideCache | None:
+        """Get the client-side cache shared by the Redis clients, if enabled."""
+        return self._redis_client_side_cache
+
+    @property
+    def redis_pool_metrics(self) -> RedisPoolMetrics:
+        """Get the usage of the Redis connection pools."""
+        return self._redis_pool_metrics
@@ -1,4 +1,8 @@
-from typing import assert_never
+from collections.abc import Iterator, Mapping
+from contextlib import ExitStack
+from functools import cached_property, partial
+from typing import Final, assert_never
+from uuid import UUID
 
 from redis import Redis
 
@@ -7,51 +11,449 @@ from repository_infrastructure_example.application.settings import (
     RedisSettings,
 )
 from repository_infrastructure_example.caching.backend import CacheBackend
+from repository_infrastructure_example.caching.bloom import IdentifierFilter
+from repository_infrastructure_example.caching.bus import MessageBus
 from repository_infrastructure_example.caching.cache import CacheService
-from repository_infrastructure_example.caching.key_manager import CacheKeyManager
-from repository_infrastructure_example.caching.redis import RedisCacheService
+from repository_infrastructure_example.caching.circuit_breaker import CircuitBreaker
+from repository_infrastructure_example.caching.client_side import ClientSideCache
+from repository_infrastructure_example.caching.codecs import (
+    Codec,
+    CompressingCodec,
+    ModelCodec,
+)
+from repository_infrastructure_example.caching.directory import OrganisationDirectory
+from repository_infrastructure_example.caching.disk import (
+    DiskCacheService,
+    DiskCacheValidator,
+    open_disk_cache,
+)
+from repository_infrastructure_example.caching.fallback import FallbackCacheService
+from repository_infrastructure_example.caching.key_manager import (
+    CacheKeyFamily,
+    CacheKeyManager,
+)
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from repository_infrastructure_example.caching.metrics import CacheMetrics
+from repository_infrastructure_example.caching.negative import NegativeCache
+from repository_infrastructure_example.caching.postgres import (
+    PostgresCacheService,
+    PostgresCacheSweeper,
+)
+from repository_infrastructure_example.caching.reclaimer import KeyReclaimer
+from repository_infrastructure_example.caching.redis import (
+    RedisCacheService,
+    RedisMessageBus,
+)
+from repository_infrastructure_example.caching.sharded import ShardedCacheService
+from repository_infrastructure_example.caching.shared_index import (
+    SharedIdentifierIndex,
+)
+from repository_infrastructure_example.caching.single_flight import SingleFlight
+from repository_infrastructure_example.caching.tiered import (
+    TieredCacheService,
+    subscribe_to_invalidations,
+)
+from repository_infrastructure_example.caching.ttl import TtlPolicy
 from repository_infrastructure_example.containers.repositories import Repositories
+from repository_infrastructure_example.domain.organisation import Organisation
+from repository_infrastructure_example.domain.user import User
+from repository_infrastructure_example.infrastructure.postgres import PostgresClient
+from repository_infrastructure_example.infrastructure.redis import RedisClient
 from repository_infrastructure_example.services.organisation import OrganisationService
 from repository_infrastructure_example.services.user import UserService
+from repository_infrastructure_example.services.warm_up import CacheWarmUpService
+
+# Tables the data of each key family in the disk cache is read from, so that a
+# write only drops the entries read from the table written to
+_DISK_CACHE_FAMILY_TABLES: Final[Mapping[str, str]] = {
+    CacheKeyFamily.ORGANISATION_IDS: "organisations",
+    CacheKeyFamily.ORGANISATION: "organisations",
+    # Generations are restarted when their organisation is deleted
+    "generation": "organisations",
+    CacheKeyFamily.USER_IDS: "users",
+    CacheKeyFamily.USER: "users",
+    "absent_user": "users",
+}
 
 
 class Services:
     _repositories: Repositories
-    _redis_client: Redis
+    _postgres_client: PostgresClient
+    _redis_client: RedisClient
+    _redis_shard_clients: Mapping[str, Redis]
+    _client_side_cache: ClientSideCache | None
     _cache_settings: CacheSettings
     _redis_settings: RedisSettings
+    _exit_stack: ExitStack
 
     def __init__(
         self,
         *,
         repositories: Repositories,
-        redis_client: Redis,
+        postgres_client: PostgresClient,
+        redis_client: RedisClient,
+        redis_shard_clients: Mapping[str, Redis],
+        client_side_cache: ClientSideCache | None,
         cache_settings: CacheSettings,
         redis_cache_settings: RedisSettings,
     ) -> None:
         self._repositories = repositories
+        self._postgres_client = postgres_client
         self._redis_client = redis_client
+        self._redis_shard_clients = redis_shard_clients
+        self._client_side_cache = client_side_cache
         self._cache_settings = cache_settings
         self._redis_settings = redis_cache_settings
+        self._exit_stack = ExitStack()
+
+    def _create_redis_circuit_breaker(self, name: str) -> CircuitBreaker | None:
+        if not self._redis_settings.circuit_breaker:
+            return None
+
+        return CircuitBreaker(
+            name=name,
+            failure_threshold=self._redis_settings.circuit_breaker_failure_threshold,
+            reset_timeout=self._redis_settings.circuit_breaker_reset_timeout,
+        )
+
+    @cached_property
+    def redis_circuit_breaker(self) -> CircuitBreaker | None:
+        return self._create_redis_circuit_breaker("redis")
+
+    @cached_property
+    def shared_cache_metrics(self) -> CacheMetrics:
+        return CacheMetrics(
+            tier=self._cache_settings.backend, cache_key_manager=self.cache_key_manager
+        )
+
+    @cached_property
+    def local_cache_metrics(self) -> CacheMetrics:
+        return CacheMetrics(tier="local", cache_key_manager=self.cache_key_manager)
+
+    @cached_property
+    def disk_cache_metrics(self) -> CacheMetrics:
+        return CacheMetrics(tier="disk", cache_key_manager=self.cache_key_manager)
+
+    @cached_property
+    def fallback_cache_metrics(self) -> CacheMetrics:
+        return CacheMetrics(tier="fallback", cache_key_manager=self.cache_key_manager)
 
     @property
-    def cache_service(self) -> CacheService:
+    def client_side_cache(self) -> ClientSideCache | None:
+        if self._cache_settings.backend != CacheBackend.REDIS:
+            return None
+        return self._client_side_cache
+
+    @property
+    def _uses_local_cache(self) -> bool:
+        # The memory backend already lives in-process, and the client-side cache
+        # of Redis is invalidated by Redis itself instead of after a TTL
+        return (
+            self._cache_settings.local_cache
+            and self._cache_settings.backend != CacheBackend.MEMORY
+            and self.client_side_cache is None
+        )
+
+    @property
+    def _uses_disk_cache(self) -> bool:
+        # The memory backend does not outlive the process either
+        return (
+            self._cache_settings.disk_cache
+            and self._cache_settings.backend != CacheBackend.MEMORY
+        )
+
+    @property
+    def _uses_postgres_fallback(self) -> bool:
+        # Calls fall back while the circuit of Redis is open
+        return (
+            self._cache_settings.postgres_fallback
+            and self._cache_settings.backend == CacheBackend.REDIS
+            and self._redis_settings.circuit_breaker
+        )
+
+    @property
+    def cache_metrics(self) -> list[CacheMetrics]:
+        cache_metrics = [self.shared_cache_metrics]
+        if self._uses_disk_cache:
+            cache_metrics.insert(0, self.disk_cache_metrics)
+        if self._uses_local_cache:
+            cache_metrics.insert(0, self.local_cache_metrics)
+        if self._uses_postgres_fallback:
+            cache_metrics.append(self.fallback_cache_metrics)
+        return cache_metrics
+
+    def _create_message_bus(self, channel: str) -> MessageBus | None:
+        # Processes only share state through Redis, the memory backend serves a
+        # single process
+        if self._cache_settings.backend == CacheBackend.MEMORY:
+            return None
+
+        message_bus = RedisMessageBus(
+            redis_client=self._redis_client,
+            channel=channel,
+            circuit_breaker=self.redis_circuit_breaker,
+        )
+        self._exit_stack.callback(message_bus.close)
+        return message_bus
+
+    @cached_property
+    def ttl_policy(self) -> TtlPolicy:
+        return TtlPolicy(
+            default_ttl=self._cache_settings.keys_ttl,
+            family_ttls=self._cache_settings.family_ttls,
+            jitter=self._cache_settings.ttl_jitter,
+            # Keep keys for the stale window, so that they can be served while
+            # they are refreshed
+            extension=self._cache_settings.stale_window,
+            sliding_families=self._cache_settings.sliding_families,
+        )
+
+    @property
+    def _uses_postgres_cache(self) -> bool:
+        return (
+            self._cache_settings.backend == CacheBackend.POSTGRES
+            or self._uses_postgres_fallback
+        )
+
+    @cached_property
+    def postgres_cache_service(self) -> PostgresCacheService:
+        # Serves as the backend itself, or as the fallback of Redis
+        return PostgresCacheService(
+            session_factory=self._postgres_client.session,
+            ttl_policy=self.ttl_policy,
+            metrics=self.shared_cache_metrics
+            if self._cache_settings.backend == CacheBackend.POSTGRES
+            else self.fallback_cache_metrics,
+        )
+
+    def _create_redis_cache_service(
+        self,
+        redis_client: RedisClient,
+        *,
+        circuit_breaker: CircuitBreaker | None,
+        metrics: CacheMetrics | None,
+    ) -> CacheService:
+        redis_cache_service = RedisCacheService(
+            redis_client=redis_client,
+            ttl_policy=self.ttl_policy,
+            circuit_breaker=circuit_breaker,
+            metrics=metrics,
+            is_client_side_cached=self.client_side_cache is not None,
+        )
+
+        if circuit_breaker is None or not self._uses_postgres_fallback:
+            return redis_cache_service
+        return FallbackCacheService(
+            primary=redis_cache_service,
+            fallback=self.postgres_cache_service,
+            primary_circuit_breaker=circuit_breaker,
+        )
+
+    def _get_backend_cache_service(self) -> CacheService:
         if self._cache_settings.backend == CacheBackend.REDIS:
-            return RedisCacheService(
-                redis_client=self._redis_client, keys_ttl=self._cache_settings.keys_ttl
+            if self._redis_shard_clients:
+                # Every node fails on its own, so each gets its own breaker
+                return ShardedCacheService(
+                    shards={
+                        address: self._create_redis_cache_service(
+                            redis_client,
+                            circuit_breaker=self._create_redis_circuit_breaker(
+                                f"redis:{address}"
+                            ),
+                            metrics=None,
+                        )
+                        for address, redis_client in self._redis_shard_clients.items()
+                    },
+                    metrics=self.shared_cache_metrics,
+                )
+
+            return self._create_redis_cache_service(
+                self._redis_client,
+                circuit_breaker=self.redis_circuit_breaker,
+                metrics=self.shared_cache_metrics,
+            )
+        if self._cache_settings.backend == CacheBackend.MEMORY:
+            return MemoryCacheService(
+                ttl_policy=self.ttl_policy,
+                max_entries=self._cache_settings.memory_max_entries,
+                max_size=self._cache_settings.memory_max_size,
+                metrics=self.shared_cache_metrics,
             )
+        if self._cache_settings.backend == CacheBackend.POSTGRES:
+            return self.postgres_cache_service
         assert_never(self._cache_settings.backend)
 
+    @cached_property
+    def disk_cache_service(self) -> DiskCacheService | None:
+        if not self._uses_disk_cache:
+            return None
+
+        disk_cache_service = open_disk_cache(
+            self._cache_settings.disk_cache_directory,
+            slots=self._cache_settings.disk_cache_slots,
+            ttl_policy=self.ttl_policy,
+            get_key_family=self.cache_key_manager.get_key_family,
+            max_size=self._cache_settings.disk_cache_max_size,
+            metrics=self.disk_cache_metrics,
+        )
+        if disk_cache_service is None:
+            return None
+
+        self._exit_stack.callback(disk_cache_service.close)
+        # Entries left by an earlier process are only served if the data has not
+        # changed since they were validated last
+        disk_cache_service.validate(self._get_disk_cache_stamps())
+        return disk_cache_service
+
+    def _get_disk_cache_stamps(self) -> dict[str, int]:
+        versions = self._postgres_client.get_data_versions(
+            *set(_DISK_CACHE_FAMILY_TABLES.values())
+        )
+        return {
+            family: versions.get(table_name, 0)
+            for family, table_name in _DISK_CACHE_FAMILY_TABLES.items()
+        }
+
+    @cached_property
+    def cache_service(self) -> CacheService:
+        cache_service = self._get_backend_cache_service()
+        disk_cache_service = self.disk_cache_service
+        if disk_cache_service is None and not self._uses_local_cache:
+            return cache_service
+
+        invalidation_bus = self._create_message_bus(
+            self.cache_key_manager.invalidation_channel
+        )
+        if disk_cache_service is not None:
+            # With a local cache in front, the outer tier broadcasts deletions
+            # and the disk cache only listens, so that they are sent once
+            cache_service = TieredCacheService(
+                local=disk_cache_service,
+                shared=cache_service,
+                invalidation_bus=None if self._uses_local_cache else invalidation_bus,
+            )
+            if self._uses_local_cache and invalidation_bus is not None:
+                subscribe_to_invalidations(invalidation_bus, disk_cache_service)
+
+        if self._uses_local_cache:
+            cache_service = TieredCacheService(
+                local=MemoryCacheService(
+                    ttl_policy=TtlPolicy(default_ttl=self._cache_settings.local_ttl),
+                    max_entries=self._cache_settings.local_max_entries,
+                    max_size=self._cache_settings.local_max_size,
+                    metrics=self.local_cache_metrics,
+                ),
+                shared=cache_service,
+                invalidation_bus=invalidation_bus,
+            )
+        return cache_service
+
     @property
     def cache_key_manager(self) -> CacheKeyManager:
         return CacheKeyManager()
 
+    @cached_property
+    def organisation_codec(self) -> Codec[Organisation]:
+        return CompressingCodec(
+            ModelCodec(Organisation),
+            threshold=self._cache_settings.compression_threshold,
+        )
+
+    @cached_property
+    def user_codec(self) -> Codec[User]:
+        return CompressingCodec(
+            ModelCodec(User), threshold=self._cache_settings.compression_threshold
+        )
+
+    @cached_property
+    def single_flight(self) -> SingleFlight:
+        single_flight = SingleFlight(
+            cache_service=self.cache_service,
+            cache_key_manager=self.cache_key_manager,
+            lease_ttl=self._cache_settings.populate_lease_ttl,
+            wait_timeout=self._cache_settings.populate_wait_timeout,
+            stale_window=self._cache_settings.stale_window,
+            refresh_ahead=self._cache_settings.refresh_ahead,
+        )
+        self._exit_stack.callback(single_flight.close)
+        return single_flight
+
+    @cached_property
+    def negative_cache(self) -> NegativeCache:
+        return NegativeCache(
+            cache_service=self.cache_service, ttl=self._cache_settings.negative_ttl
+        )
+
+    @cached_property
+    def key_reclaimer(self) -> KeyReclaimer:
+        key_reclaimer = KeyReclaimer(cache_service=self.cache_service)
+        self._exit_stack.callback(key_reclaimer.close)
+        return key_reclaimer
+
+    def _load_known_identifiers(self) -> Iterator[UUID]:
+        yield from self._repositories.organisation.get_organisation_ids()
+        yield from self._repositories.user.get_all_user_ids()
+
+    @cached_property
+    def identifier_filter(self) -> IdentifierFilter | None:
+        if not self._cache_settings.identifier_filter:
+            return None
+
+        return IdentifierFilter(
+            load_identifiers=self._load_known_identifiers,
+            message_bus=self._create_message_bus(
+                self.cache_key_manager.identifier_channel
+            ),
+            capacity=self._cache_settings.identifier_filter_capacity,
+            error_rate=self._cache_settings.identifier_filter_error_rate,
+            rebuild_interval=self._cache_settings.identifier_filter_rebuild_interval,
+        )
+
+    @cached_property
+    def shared_index(self) -> SharedIdentifierIndex | None:
+        if not self._cache_settings.shared_index:
+            return None
+
+        return SharedIdentifierIndex(
+            directory=self._cache_settings.shared_index_directory,
+            load_organisation_ids=self._repositories.organisation.get_organisation_ids,
+            load_user_ids=self._repositories.user.get_user_ids_by_organisation,
+            get_stamp=self._postgres_client.get_data_version,
+            message_bus=self._create_message_bus(
+                self.cache_key_manager.shared_index_channel
+            ),
+            refresh_interval=self._cache_settings.shared_index_refresh_interval,
+            rebuild_interval=self._cache_settings.shared_index_rebuild_interval,
+        )
+
+    @cached_property
+    def organisation_directory(self) -> OrganisationDirectory | None:
+        if not self._cache_settings.organisation_directory:
+            return None
+
+        return OrganisationDirectory(
+            load_organisations=self._repositories.organisation.get_organisations,
+            get_version=partial(
+                self._postgres_client.get_data_version, "organisations"
+            ),
+            message_bus=self._create_message_bus(
+                self.cache_key_manager.organisation_directory_channel
+            ),
+            refresh_interval=self._cache_settings.organisation_directory_refresh_interval,
+        )
+
     @property
     def organisation(self) -> OrganisationService:
         return OrganisationService(
             repository=self._repositories.organisation,
             cache_service=self.cache_service,
             cache_key_manager=self.cache_key_manager,
+            organisation_codec=self.organisation_codec,
+            single_flight=self.single_flight,
+            key_reclaimer=self.key_reclaimer,
+            identifier_filter=self.identifier_filter,
+            shared_index=self.shared_index,
+            directory=self.organisation_directory,
         )
 
     @property
@@ -61,4 +463,68 @@ class Services:
             user_repository=self._repositories.user,
             cache_service=self.cache_service,
             cache_key_manager=self.cache_key_manager,
+            user_codec=self.user_codec,
+            single_flight=self.single_flight,
+            negative_cache=self.negative_cache,
+            identifier_filter=self.identifier_filter,
+            shared_index=self.shared_index,
+        )
+
+    @property
+    def cache_warm_up(self) -> CacheWarmUpService:
+        return CacheWarmUpService(
+            organisation_service=self.organisation,
+            user_service=self.user,
+            organisation_repository=self._repositories.organisation,
         )
+
+    def start_background_tasks(self) -> None:
+        """
+        Start the background tasks of the services.
+
+        Only long-running processes start them, short-lived ones such as the
+        CLI do without.
+
+        :return: None
+        """
+        identifier_filter = self.identifier_filter
+        if identifier_filter is not None:
+            identifier_filter.start()
+            self._exit_stack.callback(identifier_filter.close)
+
+        shared_index = self.shared_index
+        if shared_index is not None:
+            shared_index.start()
+            self._exit_stack.callback(shared_index.close)
+
+        organisation_directory = self.organisation_directory
+        if organisation_directory is not None:
+            organisation_directory.start()
+            self._exit_stack.callback(organisation_directory.close)
+
+        if self._uses_postgres_cache:
+            sweeper = PostgresCacheSweeper(
+                cache_service=self.postgres_cache_service,
+                interval=self._cache_settings.postgres_sweep_interval,
+                batch_size=self._cache_settings.postgres_sweep_batch_size,
+            )
+            sweeper.start()
+            self._exit_stack.callback(sweeper.close)
+
+        disk_cache_service = self.disk_cache_service
+        if disk_cache_service is not None:
+            validator = DiskCacheValidator(
+                cache_service=disk_cache_service,
+                get_stamps=self._get_disk_cache_stamps,
+                interval=self._cache_settings.disk_cache_validation_interval,
+            )
+            validator.start()
+            self._exit_stack.callback(validator.close)
+
+    def close(self) -> None:
+        """
+        Release the resources held by the services.
+
+        :return: None
+        """
+        self._exit_stack.close()
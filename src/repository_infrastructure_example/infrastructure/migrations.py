@@ -0,0 +1,235 @@
+"""
+Helpers for running Alembic migrations against a live database.
+
+Migrations are applied one transaction per revision with a session-wide
+``lock_timeout``, so a revision that cannot get its locks fails fast instead of
+queueing every other query on the table behind it. Failed revisions are retried
+with exponential backoff, and the time each revision spent waiting on locks is
+reported once it has been applied.
+"""
+
+import time
+from collections.abc import Callable, Collection, Mapping, Sequence
+from typing import Any, Final
+
+from alembic.runtime.migration import MigrationContext, MigrationInfo
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.exc import OperationalError
+
+from alembic import op
+
+# SQLSTATE raised by Postgres when `lock_timeout` expires
+_LOCK_NOT_AVAILABLE: Final[str] = "55P03"
+
+OnVersionApply = Callable[
+    [MigrationContext, MigrationInfo, Collection[Any], Mapping[str, Any]], None
+]
+
+
+class MigrationStepTiming(BaseModel):
+    revision: str = Field(description="The revision that was applied.")
+    description: str = Field(description="The message of the revision.")
+    duration: float = Field(
+        description="Seconds the successful attempt of this revision took."
+    )
+    lock_wait: float = Field(
+        description="Seconds spent in attempts that gave up waiting for locks."
+    )
+    attempts: int = Field(description="Number of attempts needed to apply.")
+
+
+def is_lock_timeout(error: OperationalError) -> bool:
+    """
+    Check whether a database error was caused by an expired `lock_timeout`.
+
+    :param error: The error raised by SQLAlchemy.
+    :return: True if the statement gave up waiting for a lock, False otherwise.
+    """
+    return getattr(error.orig, "pgcode", None) == _LOCK_NOT_AVAILABLE
+
+
+class MigrationRunner:
+    """Applies migrations with a lock timeout and retries revisions that time out."""
+
+    _lock_timeout: float
+    _max_attempts: int
+    _retry_backoff: float
+
+    def __init__(
+        self, *, lock_timeout: float, max_attempts: int, retry_backoff: float
+    ) -> None:
+        self._lock_timeout = lock_timeout
+        self._max_attempts = max_attempts
+        self._retry_backoff = retry_backoff
+
+    def _set_lock_timeout(self, connection: Connection) -> None:
+        """
+        Set the lock timeout for the whole session of the given connection.
+
+        The statement is committed right away so that Alembic starts its own
+        per-revision transactions on a clean connection.
+
+        :param connection: The connection to configure.
+        :return: None
+        """
+        timeout_in_milliseconds = int(self._lock_timeout * 1000)
+        connection.exec_driver_sql(f"SET lock_timeout = {timeout_in_milliseconds}")
+        connection.commit()
+
+    def run(
+        self,
+        engine: Engine,
+        migrate: Callable[[Connection, OnVersionApply], None],
+    ) -> list[MigrationStepTiming]:
+        """
+        Run the migrations, retrying revisions that could not acquire their locks.
+
+        Alembic must be configured with ``transaction_per_migration=True`` inside
+        ``migrate``, so that revisions applied before a lock timeout stay
+        committed and a retry resumes at the revision that timed out.
+
+        :param engine: The engine to open connections from.
+        :param migrate: Callable configuring Alembic on the given connection and
+            running the migrations. It must register the given callback as
+            ``on_version_apply``.
+        :return: The timings of all revisions applied by this run.
+        :raises OperationalError: If a revision still times out after the last
+            attempt, or fails for any other reason.
+        """
+        timings: list[MigrationStepTiming] = []
+        attempt = 1
+        lock_wait = 0.0
+        step_started = time.perf_counter()
+
+        def on_version_apply(
+            ctx: MigrationContext,
+            step: MigrationInfo,
+            heads: Collection[Any],
+            run_args: Mapping[str, Any],
+        ) -> None:
+            nonlocal attempt, lock_wait, step_started
+
+            finished = time.perf_counter()
+            # Scripts carry the revision message, plain revisions do not
+            description: str = getattr(step.up_revision, "doc", None) or ""
+            timing = MigrationStepTiming(
+                revision=step.up_revision_id or "base",
+                description=description,
+                duration=finished - step_started,
+                lock_wait=lock_wait,
+                attempts=attempt,
+            )
+            timings.append(timing)
+            logger.info(
+                f"Applied revision '{timing.revision}' ({timing.description}) in "
+                f"{timing.duration:.3f}s after {timing.attempts} attempt(s), "
+                f"{timing.lock_wait:.3f}s spent waiting for locks."
+            )
+
+            # The next revision starts from scratch
+            attempt, lock_wait, step_started = 1, 0.0, finished
+
+        while True:
+            step_started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    self._set_lock_timeout(connection)
+                    migrate(connection, on_version_apply)
+                return timings
+            except OperationalError as error:
+                if not is_lock_timeout(error) or attempt >= self._max_attempts:
+                    raise
+
+                lock_wait += time.perf_counter() - step_started
+                backoff = self._retry_backoff * 2 ** (attempt - 1)
+                logger.warning(
+                    f"Migration attempt {attempt}/{self._max_attempts} could not "
+                    f"acquire its locks within {self._lock_timeout}s, "
+                    f"retrying in {backoff:.1f}s."
+                )
+                time.sleep(backoff)
+                attempt += 1
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    *,
+    unique: bool = False,
+) -> None:
+    """
+    Create an index without blocking writes to the table.
+
+    Must be called from within a migration script. ``CREATE INDEX CONCURRENTLY``
+    cannot run inside a transaction, so the statement runs in an autocommit
+    block. A build that failed earlier leaves an invalid index behind, which is
+    dropped before the index is built again. A valid index left behind by an
+    attempt that failed after building it is kept as is.
+
+    :param index_name: The name of the index.
+    :param table_name: The name of the table to index.
+    :param columns: The columns to index.
+    :param unique: Whether the index is unique. Defaults to False.
+    :return: None
+    """
+    context = op.get_context()
+    with context.autocommit_block():
+        # The catalog cannot be queried when generating SQL scripts
+        is_valid = None if context.as_sql else _get_index_validity(index_name)
+        if is_valid:
+            return
+
+        if is_valid is not None:
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            index_name,
+            table_name,
+            list(columns),
+            unique=unique,
+            postgresql_concurrently=True,
+        )
+
+
+def _get_index_validity(index_name: str) -> bool | None:
+    """
+    Check whether an index exists and is valid, i.e. was built successfully.
+
+    :param index_name: The name of the index.
+    :return: Whether the index is valid, or None if it does not exist.
+    """
+    return (
+        op.get_bind()
+        .execute(
+            text(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+            ),
+            {"name": index_name},
+        )
+        .scalar_one_or_none()
+    )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """
+    Drop an index without blocking writes to the table.
+
+    Must be called from within a migration script.
+
+    :param index_name: The name of the index.
+    :param table_name: The name of the indexed table.
+    :return: None
+    """
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
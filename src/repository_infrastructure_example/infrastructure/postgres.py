@@ -1,15 +1,24 @@
 import subprocess
+import zlib
 from collections.abc import Generator
 from contextlib import contextmanager
 from typing import Final
 
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from loguru import logger
-from sqlalchemy import Engine
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.orm.scoping import scoped_session
 from sqlalchemy.orm.session import sessionmaker
 from sqlmodel import Session, create_engine
 
+from repository_infrastructure_example.infrastructure.migrations import (
+    is_lock_timeout,
+)
+from repository_infrastructure_example.utilities.timing import PhaseTimer
+
 # Database Configuration
 _DATABASE_ECHO: Final[bool] = False
 _DATABASE_POOL_PRE_PING: Final[bool] = True
@@ -17,11 +26,23 @@ _DATABASE_POOL_RECYCLE: Final[int] = -1
 _DATABASE_POOL_TIMEOUT: Final[int] = 30
 _DATABASE_EXPIRE_ON_COMMIT: Final[bool] = False
 
+# Migration Configuration (resolved relative to the working directory, like the
+# `alembic` command itself)
+_ALEMBIC_CONFIG_PATH: Final[str] = "alembic.ini"
+# Key of the advisory lock serialising migrations across application instances
+_MIGRATION_LOCK_KEY: Final[int] = zlib.crc32(b"repository_infrastructure_example")
+# Seconds to wait for another instance to finish migrating
+_MIGRATION_LOCK_WAIT_TIMEOUT: Final[float] = 300.0
+
 
 class PostgresConnectionError(ConnectionError):
     """Raised when there is an error in establishing a connection to Postgres."""
 
 
+class MigrationLockTimeoutError(TimeoutError):
+    """Raised when the migration lock cannot be acquired in time."""
+
+
 class PostgresClient:
     _engine: Engine
     _session_factory: scoped_session[Session]
@@ -92,16 +113,188 @@ class PostgresClient:
         finally:
             session.close()
 
+    def get_schema_revisions(self) -> set[str]:
+        """
+        Get the revisions the database schema is currently stamped with.
+
+        :return: The revisions stored in the `alembic_version` table, empty if
+            no migration has been applied yet.
+        """
+        with self._engine.connect() as connection:
+            migration_context = MigrationContext.configure(connection)
+            return set(migration_context.get_current_heads())
+
     @staticmethod
-    def run_migrations(disable_logging: bool = False) -> None:
+    def get_head_revisions() -> set[str]:
+        """
+        Get the head revisions of the migration scripts.
+
+        :return: The head revisions of the Alembic script directory.
+        """
+        script_directory = ScriptDirectory.from_config(Config(_ALEMBIC_CONFIG_PATH))
+        return set(script_directory.get_heads())
+
+    def schema_is_up_to_date(self) -> bool:
+        """
+        Check whether the database schema is at the head of the migration scripts.
+
+        :return: True if no migration is pending, False otherwise.
+        """
+        return self.get_schema_revisions() == self.get_head_revisions()
+
+    def get_data_versions(self, *table_names: str) -> dict[str, int]:
+        """
+        Get the version stamps of the tables, which change with every write to them.
+
+        The versions of the tables are advanced by triggers within the writing
+        transactions, so a stamp read before the data never belongs to data
+        older than it. Each version is spread over several rows, which are
+        summed up.
+
+        :param table_names: The tables to get the versions of, all if none.
+        :return: The version of each table.
+        """
+        statement = "SELECT table_name, sum(version) FROM data_versions"
+        parameters: dict[str, list[str]] = {}
+        if table_names:
+            statement += " WHERE table_name = ANY(:table_names)"
+            parameters["table_names"] = list(table_names)
+        statement += " GROUP BY table_name"
+
+        with self._engine.connect() as connection:
+            rows = connection.execute(text(statement), parameters).all()
+        return {table_name: int(version) for table_name, version in rows}
+
+    def get_data_version(self, *table_names: str) -> int:
+        """
+        Get the version stamp of the data, which changes with every write to it.
+
+        :param table_names: The tables to get the version of, all if none.
+        :return: The sum of the versions of the tables.
+        """
+        return sum(self.get_data_versions(*table_names).values())
+
+    @contextmanager
+    def _migration_lock(
+        self, *, disable_logging: bool, timer: PhaseTimer, wait_timeout: float
+    ) -> Generator[None, None, None]:
+        """
+        Hold the advisory lock that serialises migrations across instances.
+
+        Blocks until the lock is available or the wait timeout has passed. The
+        lock is bound to the database session, so it is also released if the
+        process dies while holding it.
+
+        :param disable_logging: Whether to disable logging while waiting.
+        :param timer: The timer to record the time spent waiting with.
+        :param wait_timeout: The time in seconds to wait for the lock.
+        :yield: None
+        :raises MigrationLockTimeoutError: If the lock was not acquired in time.
+        """
+        parameters = {"key": _MIGRATION_LOCK_KEY}
+
+        with self._engine.connect() as connection:
+            with timer.measure("migration_lock_wait"):
+                is_acquired = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), parameters
+                ).scalar_one()
+
+                if not is_acquired:
+                    if not disable_logging:
+                        logger.info(
+                            "Waiting for another instance to finish migrations..."
+                        )
+                    # Only applies to the transaction, which ends once the
+                    # lock is acquired, so the pooled connection is not left
+                    # with the timeout
+                    timeout_in_milliseconds = int(wait_timeout * 1000)
+                    connection.exec_driver_sql(
+                        f"SET LOCAL lock_timeout = {timeout_in_milliseconds}"
+                    )
+                    try:
+                        connection.execute(
+                            text("SELECT pg_advisory_lock(:key)"), parameters
+                        )
+                    except OperationalError as error:
+                        if not is_lock_timeout(error):
+                            raise
+                        raise MigrationLockTimeoutError(
+                            f"Another instance still held the migration lock "
+                            f"after {wait_timeout}s."
+                        ) from error
+
+            # The lock is held by the session, end the transaction so that the
+            # connection does not sit idle in a transaction while migrating
+            connection.commit()
+
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), parameters)
+                connection.commit()
+
+    def run_migrations(
+        self,
+        disable_logging: bool = False,
+        timer: PhaseTimer | None = None,
+        lock_wait_timeout: float = _MIGRATION_LOCK_WAIT_TIMEOUT,
+    ) -> None:
         """
         Run database migrations using Alembic.
 
+        The schema revision is compared against the script head in-process first,
+        so that Alembic is only started when there is something to migrate.
+        Instances starting at the same time serialise on an advisory lock: one
+        instance migrates, the others wait for it and then find the schema up to
+        date.
+
+        :param disable_logging: Whether to disable logging during migration.
+            Defaults to False.
+        :param timer: Optional timer to record the durations of the migration
+            phases with. Defaults to None.
+        :param lock_wait_timeout: The time in seconds to wait for another
+            instance to finish migrating. Defaults to 300 seconds.
+        :return: None
+        :raises RuntimeError: If the migration process fails.
+        :raises MigrationLockTimeoutError: If another instance held the
+            migration lock for longer than the wait timeout.
+        """
+        timer = timer or PhaseTimer()
+
+        with timer.measure("schema_check"):
+            is_up_to_date = self.schema_is_up_to_date()
+
+        if is_up_to_date:
+            if not disable_logging:
+                logger.info("Database schema is up to date, skipping migrations.")
+            return
+
+        with self._migration_lock(
+            disable_logging=disable_logging,
+            timer=timer,
+            wait_timeout=lock_wait_timeout,
+        ):
+            # Another instance may have migrated while we waited for the lock
+            with timer.measure("schema_recheck"):
+                is_up_to_date = self.schema_is_up_to_date()
+
+            if is_up_to_date:
+                if not disable_logging:
+                    logger.info("Database schema was migrated by another instance.")
+                return
+
+            with timer.measure("migration"):
+                self._upgrade_to_head(disable_logging)
+
+    @staticmethod
+    def _upgrade_to_head(disable_logging: bool) -> None:
+        """
+        Upgrade the database schema to the head revision using Alembic.
+
         Note: This method runs Alembic in a subprocess to avoid interfering with
         existing loggers in the current process.
 
         :param disable_logging: Whether to disable logging during migration.
-            Defaults to False.
         :return: None
         :raises RuntimeError: If the migration process fails.
         """
@@ -1,28 +1,138 @@
-from redis import Redis
+from typing import Any
+
+from redis import Redis, RedisCluster
 from redis.cache import CacheConfig
+from redis.cluster import ClusterNode
 
 from repository_infrastructure_example.application.settings import RedisSettings
+from repository_infrastructure_example.caching.backend import RedisTopology
+from repository_infrastructure_example.caching.client_side import ClientSideCache
+from repository_infrastructure_example.infrastructure.redis_pool import (
+    InstrumentedConnectionPool,
+    RedisPoolMetrics,
+)
+
+RedisClient = Redis | RedisCluster
 
 
-def get_redis_client(settings: RedisSettings) -> Redis:
+def get_client_side_cache(settings: RedisSettings) -> ClientSideCache | None:
     """
-    Creates and returns a Redis client based on the provided settings.
+    Creates the client-side cache shared by all Redis clients, if enabled.
 
     :param settings: The Redis settings.
-    :return: A Redis client instance.
+    :return: The client-side cache, or None if client-side caching is disabled.
     """
+    if not settings.client_side_caching:
+        return None
+    return ClientSideCache(CacheConfig(max_size=settings.client_side_cache_max_entries))
+
+
+def _get_connection_options(
+    settings: RedisSettings, client_side_cache: ClientSideCache | None
+) -> dict[str, Any]:
     password = (
         settings.password.get_secret_value() if settings.password is not None else None
     )
-    return Redis(
-        host=settings.host,
-        port=settings.port,
-        password=password,
-        socket_timeout=settings.timeout,
-        socket_connect_timeout=settings.timeout,
-        health_check_interval=settings.health_check_interval,
-        protocol=3 if settings.client_side_caching else 2,
-        cache_config=CacheConfig() if settings.client_side_caching else None,
-        socket_keepalive=True,
-        decode_responses=True,
+    return {
+        "password": password,
+        "socket_timeout": settings.timeout,
+        "socket_connect_timeout": settings.timeout,
+        "health_check_interval": settings.health_check_interval,
+        "protocol": 3 if client_side_cache is not None else 2,
+        "cache": client_side_cache,
+        "socket_keepalive": settings.socket_keepalive,
+        # Cached values are encoded by codecs and may not be valid UTF-8
+        "decode_responses": False,
+    }
+
+
+def _create_node_client(
+    settings: RedisSettings,
+    *,
+    host: str,
+    port: int,
+    client_side_cache: ClientSideCache | None,
+    pool_metrics: RedisPoolMetrics,
+) -> Redis:
+    connection_pool = InstrumentedConnectionPool(
+        metrics=pool_metrics,
+        max_connections=settings.max_connections,
+        timeout=settings.pool_timeout,
+        host=host,
+        port=port,
+        **_get_connection_options(settings, client_side_cache),
     )
+    return Redis(connection_pool=connection_pool)
+
+
+def get_redis_client(
+    settings: RedisSettings,
+    *,
+    client_side_cache: ClientSideCache | None = None,
+    pool_metrics: RedisPoolMetrics | None = None,
+) -> RedisClient:
+    """
+    Creates and returns a Redis client based on the provided settings.
+
+    For the sharded topology, the client connects to the first node, which
+    carries the Pub/Sub traffic of all processes. Use `get_redis_shard_clients`
+    for the cache itself.
+
+    :param settings: The Redis settings.
+    :param client_side_cache: Optional client-side cache to serve repeated reads
+        from. Defaults to None.
+    :param pool_metrics: Optional metrics to record the usage of the connection
+        pool with. Not recorded for the cluster topology, whose clients manage
+        their pools themselves. Defaults to None.
+    :return: A Redis client instance.
+    """
+    node_addresses = settings.get_node_addresses()
+
+    if settings.topology == RedisTopology.CLUSTER:
+        return RedisCluster(
+            startup_nodes=[ClusterNode(host, port) for host, port in node_addresses],
+            max_connections=settings.max_connections,
+            **_get_connection_options(settings, client_side_cache),
+        )
+
+    host, port = node_addresses[0]
+    return _create_node_client(
+        settings,
+        host=host,
+        port=port,
+        client_side_cache=client_side_cache,
+        pool_metrics=pool_metrics or RedisPoolMetrics(),
+    )
+
+
+def get_redis_shard_clients(
+    settings: RedisSettings,
+    *,
+    client_side_cache: ClientSideCache | None = None,
+    pool_metrics: RedisPoolMetrics | None = None,
+) -> dict[str, Redis]:
+    """
+    Creates a Redis client for every node of the sharded topology.
+
+    :param settings: The Redis settings.
+    :param client_side_cache: Optional client-side cache to serve repeated reads
+        from. Defaults to None.
+    :param pool_metrics: Optional metrics to record the usage of the connection
+        pools with. Defaults to None.
+    :return: The clients by `host:port` address of their node, empty unless the
+        topology is sharded.
+    """
+    if settings.topology != RedisTopology.SHARDED:
+        return {}
+
+    pool_metrics = pool_metrics or RedisPoolMetrics()
+    return {
+        f"{host}:{port}": _create_node_client(
+            settings,
+            host=host,
+            port=port,
+            client_side_cache=client_side_cache,
+            pool_metrics=pool_metrics,
+        )
+        for host, port in settings.get_node_addresses()
+    }
@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import Any, override
+
+from pydantic import BaseModel, Field
+from redis import BlockingConnectionPool
+from redis.connection import CacheProxyConnection, Connection
+
+# Connections are wrapped in a proxy when client-side caching is enabled
+_PooledConnection = Connection | CacheProxyConnection
+
+
+class RedisPoolStatistics(BaseModel):
+    pools: int = Field(description="The number of connection pools, one per node.")
+    max_connections: int = Field(
+        description="The maximum number of connections of all pools."
+    )
+    in_use: int = Field(description="The number of connections currently handed out.")
+    waiting: int = Field(
+        description="The number of callers currently waiting for a connection."
+    )
+    created: int = Field(description="The number of connections opened so far.")
+    acquired: int = Field(description="The number of connections handed out so far.")
+    errors: int = Field(
+        description="The number of callers that got no connection, because none "
+        "became available in time or connecting failed."
+    )
+    wait_time_sum: float = Field(
+        description="The summed time in seconds callers waited for a connection."
+    )
+    wait_time_max: float = Field(
+        description="The longest time in seconds a caller waited for a connection."
+    )
+
+
+class RedisPoolMetrics:
+    """Records the usage of the Redis connection pools of a process."""
+
+    _lock: threading.Lock
+    _pools: list["InstrumentedConnectionPool"]
+    _waiting: int
+    _created: int
+    _acquired: int
+    _errors: int
+    _wait_time_sum: float
+    _wait_time_max: float
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pools = []
+        self._waiting = 0
+        self._created = 0
+        self._acquired = 0
+        self._errors = 0
+        self._wait_time_sum = 0.0
+        self._wait_time_max = 0.0
+
+    def record_pool(self, pool: "InstrumentedConnectionPool", /) -> None:
+        """
+        Record that a connection pool was created.
+
+        :param pool: The connection pool.
+        :return: None
+        """
+        with self._lock:
+            self._pools.append(pool)
+
+    def record_created(self) -> None:
+        """
+        Record that a connection was opened.
+
+        :return: None
+        """
+        with self._lock:
+            self._created += 1
+
+    def record_wait_started(self) -> None:
+        """
+        Record that a caller started waiting for a connection.
+
+        :return: None
+        """
+        with self._lock:
+            self._waiting += 1
+
+    def record_wait_finished(self, *, duration: float, is_acquired: bool) -> None:
+        """
+        Record that a caller stopped waiting for a connection.
+
+        :param duration: The time in seconds the caller waited.
+        :param is_acquired: Whether the caller got a connection.
+        :return: None
+        """
+        with self._lock:
+            self._waiting -= 1
+            self._wait_time_sum += duration
+            self._wait_time_max = max(self._wait_time_max, duration)
+            if is_acquired:
+                self._acquired += 1
+            else:
+                self._errors += 1
+
+    @property
+    def statistics(self) -> RedisPoolStatistics:
+        """Get the statistics recorded so far."""
+        with self._lock:
+            return RedisPoolStatistics(
+                pools=len(self._pools),
+                max_connections=sum(pool.max_connections for pool in self._pools),
+                in_use=sum(pool.in_use for pool in self._pools),
+                waiting=self._waiting,
+                created=self._created,
+                acquired=self._acquired,
+                errors=self._errors,
+                wait_time_sum=self._wait_time_sum,
+                wait_time_max=self._wait_time_max,
+            )
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Blocking connection pool recording its usage.
+
+    Callers wait for a free connection once all connections are in use, and
+    fail with a `ConnectionError` if none becomes available within the timeout.
+    This caps the connections a process opens and applies backpressure under
+    bursts instead of opening ever more connections.
+    """
+
+    _metrics: RedisPoolMetrics
+
+    def __init__(self, *, metrics: RedisPoolMetrics, **kwargs: Any) -> None:
+        self._metrics = metrics
+        super().__init__(**kwargs)  # pyright: ignore
+        metrics.record_pool(self)
+
+    @property
+    def in_use(self) -> int:
+        """Get the number of connections currently handed out."""
+        # The queue holds idle connections and a placeholder for every
+        # connection not opened yet, every checkout takes one of them out
+        return self.max_connections - self.pool.qsize()  # pyright: ignore
+
+    @override
+    def make_connection(self) -> _PooledConnection:
+        connection = super().make_connection()
+        self._metrics.record_created()
+        return connection
+
+    @override
+    def get_connection(self, *args: Any, **kwargs: Any) -> _PooledConnection:
+        self._metrics.record_wait_started()
+        started = time.perf_counter()
+        try:
+            connection = super().get_connection(*args, **kwargs)  # pyright: ignore
+        except BaseException:
+            self._metrics.record_wait_finished(
+                duration=time.perf_counter() - started, is_acquired=False
+            )
+            raise
+
+        self._metrics.record_wait_finished(
+            duration=time.perf_counter() - started, is_acquired=True
+        )
+        return connection  # pyright: ignore
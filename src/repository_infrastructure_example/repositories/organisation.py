@@ -30,6 +30,15 @@ class OrganisationRepository(ABC):
         :return: Set of all organisation IDs.
         """
 
+    @abstractmethod
+    def get_most_active_organisation_ids(self, limit: int) -> list[UUID]:
+        """
+        Get the IDs of the organisations whose users were most recently updated.
+
+        :param limit: The maximum number of organisation IDs to return.
+        :return: List of organisation IDs, most recently active first.
+        """
+
     @abstractmethod
     def get_organisation(self, organisation_id: UUID) -> Organisation | None:
         """
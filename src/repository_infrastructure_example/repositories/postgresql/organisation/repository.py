@@ -1,7 +1,7 @@
 from typing import Callable, ContextManager
 from uuid import UUID
 
-from sqlmodel import Session, select
+from sqlmodel import Session, col, func, select
 from typing_extensions import override
 
 from repository_infrastructure_example.domain.organisation import Organisation
@@ -15,6 +15,9 @@ from repository_infrastructure_example.repositories.postgresql.organisation.mapp
     dao_from_organisation,
     organisation_from_dao,
 )
+from repository_infrastructure_example.repositories.postgresql.user.dao import (
+    PostgresUserDAO,
+)
 
 
 class PostgresOrganisationRepository(OrganisationRepository):
@@ -50,6 +53,19 @@ class PostgresOrganisationRepository(OrganisationRepository):
             results = session.exec(statement)
             return {organisation_id for organisation_id in results.all()}
 
+    @override
+    def get_most_active_organisation_ids(self, limit: int) -> list[UUID]:
+        statement = (
+            select(PostgresUserDAO.organisation_id)
+            .group_by(col(PostgresUserDAO.organisation_id))
+            .order_by(func.max(PostgresUserDAO.updated_at).desc())
+            .limit(limit)
+        )
+
+        with self._session_factory() as session:
+            results = session.exec(statement)
+            return list(results.all())
+
     @override
     def get_organisation(self, organisation_id: UUID) -> Organisation | None:
         statement = select(PostgresOrganisationDAO).where(
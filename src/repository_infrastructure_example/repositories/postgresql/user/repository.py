@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import Callable, ContextManager, override
 from uuid import UUID
 
@@ -52,6 +53,24 @@ class PostgresUserRepository(UserRepository):
             results = session.exec(statement)
             return {user_id for user_id in results.all()}
 
+    @override
+    def get_all_user_ids(self) -> set[UUID]:
+        statement = select(PostgresUserDAO.id)
+
+        with self._session_factory() as session:
+            results = session.exec(statement)
+            return {user_id for user_id in results.all()}
+
+    @override
+    def get_user_ids_by_organisation(self) -> dict[UUID, set[UUID]]:
+        statement = select(PostgresUserDAO.organisation_id, PostgresUserDAO.id)
+
+        user_ids: dict[UUID, set[UUID]] = defaultdict(set)
+        with self._session_factory() as session:
+            for organisation_id, user_id in session.exec(statement).all():
+                user_ids[organisation_id].add(user_id)
+        return dict(user_ids)
+
     @override
     def user_email_is_available(self, organisation_id: UUID, email: str) -> bool:
         statement = select(PostgresUserDAO.id).where(
@@ -33,6 +33,23 @@ class UserRepository(ABC):
         :return: A set of user IDs.
         """
 
+    @abstractmethod
+    def get_all_user_ids(self) -> set[UUID]:
+        """
+        Get the IDs of all users across all organisations.
+
+        :return: A set of user IDs.
+        """
+
+    @abstractmethod
+    def get_user_ids_by_organisation(self) -> dict[UUID, set[UUID]]:
+        """
+        Get the IDs of all users, grouped by the ID of their organisation.
+
+        :return: The user IDs per organisation ID, without organisations that
+            have no users.
+        """
+
     @abstractmethod
     def user_email_is_available(self, organisation_id: UUID, email: str) -> bool:
         """
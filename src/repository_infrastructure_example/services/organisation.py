@@ -3,8 +3,19 @@ from uuid import UUID
 from fastapi import status
 from typing_extensions import overload
 
-from repository_infrastructure_example.caching.cache import CacheService
+from repository_infrastructure_example.caching.bloom import IdentifierFilter
+from repository_infrastructure_example.caching.cache import CacheService, SetMembership
+from repository_infrastructure_example.caching.codecs import Codec
+from repository_infrastructure_example.caching.directory import OrganisationDirectory
 from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.reclaimer import KeyReclaimer
+from repository_infrastructure_example.caching.shared_index import (
+    SharedIdentifierIndex,
+)
+from repository_infrastructure_example.caching.single_flight import (
+    CachedValue,
+    SingleFlight,
+)
 from repository_infrastructure_example.domain.organisation import Organisation
 from repository_infrastructure_example.exceptions import HTTPError
 from repository_infrastructure_example.repositories.organisation import (
@@ -62,6 +73,12 @@ class OrganisationService:
     _repository: OrganisationRepository
     _cache_service: CacheService
     _cache_key_manager: CacheKeyManager
+    _organisation_codec: Codec[Organisation]
+    _single_flight: SingleFlight
+    _key_reclaimer: KeyReclaimer
+    _identifier_filter: IdentifierFilter | None
+    _shared_index: SharedIdentifierIndex | None
+    _directory: OrganisationDirectory | None
 
     def __init__(
         self,
@@ -69,39 +86,128 @@ class OrganisationService:
         repository: OrganisationRepository,
         cache_service: CacheService,
         cache_key_manager: CacheKeyManager,
+        organisation_codec: Codec[Organisation],
+        single_flight: SingleFlight,
+        key_reclaimer: KeyReclaimer,
+        identifier_filter: IdentifierFilter | None,
+        shared_index: SharedIdentifierIndex | None,
+        directory: OrganisationDirectory | None,
     ) -> None:
         self._repository = repository
         self._cache_service = cache_service
         self._cache_key_manager = cache_key_manager
-
-    def ensure_organisation_exists(self, organisation_id: UUID) -> None:
+        self._organisation_codec = organisation_codec
+        self._single_flight = single_flight
+        self._key_reclaimer = key_reclaimer
+        self._identifier_filter = identifier_filter
+        self._shared_index = shared_index
+        self._directory = directory
+
+    def _reject_unknown_organisation(self, organisation_id: UUID) -> None:
         """
-        Ensure that an organisation with the given ID exists.
+        Reject organisation IDs unknown to the identifier filter once confirmed.
+
+        The filter may not know IDs created by other processes yet, so its
+        negatives are confirmed by the cached organisation IDs. Lookups of IDs
+        that do not exist are still answered without querying the database.
 
         :param organisation_id: The ID of the organisation.
         :return: None
         :raises OrganisationNotFoundError: If the organisation does not exist.
         """
-        # Try to get all organisation IDs from cache
-        cached_organisation_ids: set[str] | None = self._cache_service.get_set(
-            self._cache_key_manager.organisation_ids_key
+        if self._identifier_filter is None or self._identifier_filter.might_contain(
+            organisation_id
+        ):
+            return
+
+        self.ensure_organisation_exists(organisation_id)
+
+    def get_cache_generation(self, organisation_id: UUID) -> int:
+        """
+        Get the generation the cache keys of an organisation are built with.
+
+        The generation is started if the organisation has none yet, so this
+        must only be called for organisations known to exist. Otherwise, a
+        counter would be left behind for every ID looked up.
+
+        :param organisation_id: The ID of the organisation.
+        :return: The current generation of the organisation.
+        """
+        return self._cache_service.start_generation(
+            self._cache_key_manager.get_organisation_generation_key(organisation_id)
         )
-        if cached_organisation_ids is not None:
-            if str(organisation_id) in cached_organisation_ids:
-                return
-            raise OrganisationNotFoundError(organisation_id)
 
-        # Fetch from the repository
-        organisation_ids = self._repository.get_organisation_ids()
+    def _find_cache_generation(self, organisation_id: UUID) -> int | None:
+        """
+        Get the generation of an organisation, without starting it.
+
+        :param organisation_id: The ID of the organisation.
+        :return: The current generation, or None if nothing of the
+            organisation has been cached yet.
+        """
+        return self._cache_service.get_generation(
+            self._cache_key_manager.get_organisation_generation_key(organisation_id)
+        )
 
-        # Store organisation IDs in cache
+    def _cache_organisation_ids(self) -> set[UUID]:
+        """
+        Fetch all organisation IDs from the repository and store them in cache.
+
+        :return: The organisation IDs.
+        """
+        organisation_ids = self._repository.get_organisation_ids()
         self._cache_service.store_set(
             key=self._cache_key_manager.organisation_ids_key,
             value=set(map(str, organisation_ids)),
         )
+        return organisation_ids
+
+    def warm_up_organisation_ids(self) -> int:
+        """
+        Preload the organisation IDs into the cache.
+
+        :return: The number of organisation IDs preloaded.
+        """
+        return len(self._cache_organisation_ids())
 
-        # Check if the organisation ID exists
-        if organisation_id not in organisation_ids:
+    def ensure_organisation_exists(self, organisation_id: UUID) -> None:
+        """
+        Ensure that an organisation with the given ID exists.
+
+        :param organisation_id: The ID of the organisation.
+        :return: None
+        :raises OrganisationNotFoundError: If the organisation does not exist.
+        """
+        # IDs missing from the shared index or the directory may have been
+        # created since
+        if self._shared_index is not None and self._shared_index.contains_organisation(
+            organisation_id
+        ):
+            return
+        if self._directory is not None and self._directory.get(organisation_id):
+            return
+
+        cache_key = self._cache_key_manager.organisation_ids_key
+        member = str(organisation_id)
+
+        def read_membership() -> CachedValue[SetMembership] | None:
+            # Look the organisation ID up in the cached organisation IDs
+            check = self._cache_service.check_member(key=cache_key, member=member)
+            if check.membership == SetMembership.NOT_CACHED:
+                return None
+            return CachedValue(value=check.membership, ttl=check.ttl)
+
+        def populate_membership() -> SetMembership:
+            organisation_ids = self._cache_organisation_ids()
+            if organisation_id in organisation_ids:
+                return SetMembership.MEMBER
+            return SetMembership.NOT_MEMBER
+
+        # Only one caller reloads the organisation IDs on a cache miss
+        membership = self._single_flight.run(
+            cache_key, read=read_membership, populate=populate_membership
+        )
+        if membership != SetMembership.MEMBER:
             raise OrganisationNotFoundError(organisation_id)
 
     def get_organisations(self) -> list[Organisation]:
@@ -110,6 +216,11 @@ class OrganisationService:
 
         :return: List of all organisations.
         """
+        if self._directory is not None:
+            organisations = self._directory.get_all()
+            if organisations is not None:
+                return organisations
+
         return self._repository.get_organisations()
 
     def get_organisation(self, organisation_id: UUID) -> Organisation:
@@ -119,9 +230,43 @@ class OrganisationService:
         :param organisation_id: The ID of the organisation.
         :return: The organisation if found, else None.
         """
+        self._reject_unknown_organisation(organisation_id)
+
+        if self._directory is not None:
+            organisation = self._directory.get(organisation_id)
+            if organisation is not None:
+                return organisation
+
+        # Nothing is cached for organisations without a generation, which
+        # includes IDs that do not exist
+        generation = self._find_cache_generation(organisation_id)
+        if generation is not None:
+            cached_organisation = self._cache_service.get_value(
+                self._cache_key_manager.get_organisation_key(
+                    organisation_id, generation=generation
+                ),
+                codec=self._organisation_codec,
+            )
+            if cached_organisation is not None:
+                return cached_organisation
+
+        # Fetch from the repository
         organisation = self._repository.get_organisation(organisation_id)
         if organisation is None:
             raise OrganisationNotFoundError(organisation_id)
+
+        # Store organisation in cache
+        self._cache_service.store_value(
+            key=self._cache_key_manager.get_organisation_key(
+                organisation_id,
+                generation=generation
+                if generation is not None
+                else self.get_cache_generation(organisation_id),
+            ),
+            value=organisation,
+            codec=self._organisation_codec,
+        )
+
         return organisation
 
     def add_organisation(self, *, name: str, email: str, is_active: bool) -> UUID:
@@ -136,6 +281,8 @@ class OrganisationService:
             name already exists.
         :raises OrganisationValidationError: If the organisation data is invalid.
         """
+        # Uniqueness is checked against the database, as a stale cache entry
+        # would let a duplicate through
         existing = self._repository.get_organisation_by_slug(create_slug(name))
         if existing:
             raise OrganisationAlreadyExistsError(name=name)
@@ -151,8 +298,16 @@ class OrganisationService:
 
         self._repository.add_or_update_organisation(organisation)
 
-        # Delete cached organisation IDs to force refresh on next access
-        self._cache_service.delete_key(self._cache_key_manager.organisation_ids_key)
+        if self._identifier_filter is not None:
+            self._identifier_filter.add(organisation.id)
+        if self._directory is not None:
+            self._directory.put(organisation)
+
+        # Add the organisation to the cached organisation IDs
+        self._cache_service.add_to_set(
+            key=self._cache_key_manager.organisation_ids_key,
+            member=str(organisation.id),
+        )
 
         return organisation.id
 
@@ -211,6 +366,22 @@ class OrganisationService:
             raise OrganisationValidationError(str(error)) from error
 
         self._repository.add_or_update_organisation(organisation)
+        if self._directory is not None:
+            self._directory.put(organisation)
+
+        # Delete the cached organisation to force refresh on next access. If
+        # the generation cannot be read, the cache may be unreachable, in which
+        # case deleting the generation invalidates everything once it is back.
+        generation = self._find_cache_generation(organisation_id)
+        self._cache_service.delete_key(
+            self._cache_key_manager.get_organisation_key(
+                organisation_id, generation=generation
+            )
+            if generation is not None
+            else self._cache_key_manager.get_organisation_generation_key(
+                organisation_id
+            )
+        )
 
     def delete_organisation(self, organisation_id: UUID) -> None:
         """
@@ -222,4 +393,24 @@ class OrganisationService:
         """
         self.ensure_organisation_exists(organisation_id)
         self._repository.delete_organisation(organisation_id)
-        self._cache_service.delete_key(self._cache_key_manager.organisation_ids_key)
+        if self._shared_index is not None:
+            self._shared_index.invalidate()
+        if self._directory is not None:
+            self._directory.remove(organisation_id)
+        self._cache_service.remove_from_set(
+            key=self._cache_key_manager.organisation_ids_key,
+            member=str(organisation_id),
+        )
+
+        # Invalidate all cached data of the organisation at once by deleting
+        # its generation, the keys built with it are deleted in the background
+        generation = self._find_cache_generation(organisation_id)
+        self._cache_service.delete_key(
+            self._cache_key_manager.get_organisation_generation_key(organisation_id)
+        )
+        if generation is not None:
+            self._key_reclaimer.reclaim(
+                self._cache_key_manager.get_organisation_keys_pattern(
+                    organisation_id, generation=generation
+                )
+            )
@@ -2,8 +2,18 @@ from uuid import UUID
 
 from fastapi import status
 
-from repository_infrastructure_example.caching.cache import CacheService
+from repository_infrastructure_example.caching.bloom import IdentifierFilter
+from repository_infrastructure_example.caching.cache import CacheService, SetMembership
+from repository_infrastructure_example.caching.codecs import Codec
 from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.negative import NegativeCache
+from repository_infrastructure_example.caching.shared_index import (
+    SharedIdentifierIndex,
+)
+from repository_infrastructure_example.caching.single_flight import (
+    CachedValue,
+    SingleFlight,
+)
 from repository_infrastructure_example.domain.user import User
 from repository_infrastructure_example.exceptions import HTTPError
 from repository_infrastructure_example.repositories.user import UserRepository
@@ -52,6 +62,11 @@ class UserService:
     _repository: UserRepository
     _cache_service: CacheService
     _cache_key_manager: CacheKeyManager
+    _user_codec: Codec[User]
+    _single_flight: SingleFlight
+    _negative_cache: NegativeCache
+    _identifier_filter: IdentifierFilter | None
+    _shared_index: SharedIdentifierIndex | None
 
     def __init__(
         self,
@@ -60,41 +75,107 @@ class UserService:
         user_repository: UserRepository,
         cache_service: CacheService,
         cache_key_manager: CacheKeyManager,
+        user_codec: Codec[User],
+        single_flight: SingleFlight,
+        negative_cache: NegativeCache,
+        identifier_filter: IdentifierFilter | None,
+        shared_index: SharedIdentifierIndex | None,
     ) -> None:
         self._organisation_service = organisation_service
         self._repository = user_repository
         self._cache_service = cache_service
         self._cache_key_manager = cache_key_manager
+        self._user_codec = user_codec
+        self._single_flight = single_flight
+        self._negative_cache = negative_cache
+        self._identifier_filter = identifier_filter
+        self._shared_index = shared_index
 
-    def ensure_user_exists(self, *, organisation_id: UUID, user_id: UUID) -> None:
+    def _reject_unknown_user(self, *, organisation_id: UUID, user_id: UUID) -> None:
         """
-        Ensure that a user with the given ID exists.
+        Reject user IDs unknown to the identifier filter once confirmed.
+
+        The filter may not know IDs created by other processes yet, so its
+        negatives are confirmed by the cached user IDs of the organisation.
 
         :param organisation_id: The ID of the organisation.
         :param user_id: The ID of the user.
         :return: None
         :raises UserNotFoundError: If the user does not exist.
         """
-        # Try to get all user IDs from cache
-        cached_user_ids = self._cache_service.get_set(
-            self._cache_key_manager.get_user_ids_key(organisation_id)
+        if self._identifier_filter is None or self._identifier_filter.might_contain(
+            user_id
+        ):
+            return
+
+        self.ensure_user_exists(organisation_id=organisation_id, user_id=user_id)
+
+    def _get_user_ids_key(self, organisation_id: UUID) -> str:
+        return self._cache_key_manager.get_user_ids_key(
+            organisation_id,
+            generation=self._organisation_service.get_cache_generation(organisation_id),
         )
-        if cached_user_ids is not None:
-            if str(user_id) in cached_user_ids:
-                return
-            raise UserNotFoundError(user_id)
 
-        # Fetch from the repository
+    def _cache_user_ids(self, organisation_id: UUID, *, cache_key: str) -> set[UUID]:
+        """
+        Fetch the user IDs of an organisation from the repository and store them in cache.
+
+        :param organisation_id: The ID of the organisation.
+        :param cache_key: The key to store the user IDs under.
+        :return: The user IDs.
+        """
         user_ids = self._repository.get_user_ids(organisation_id)
+        self._cache_service.store_set(key=cache_key, value=set(map(str, user_ids)))
+        return user_ids
+
+    def warm_up_user_ids(self, organisation_id: UUID) -> int:
+        """
+        Preload the user IDs of an organisation into the cache.
 
-        # Store user IDs in cache
-        self._cache_service.store_set(
-            key=self._cache_key_manager.get_user_ids_key(organisation_id),
-            value=set(map(str, user_ids)),
+        :param organisation_id: The ID of the organisation.
+        :return: The number of user IDs preloaded.
+        """
+        user_ids = self._cache_user_ids(
+            organisation_id, cache_key=self._get_user_ids_key(organisation_id)
         )
+        return len(user_ids)
 
-        # Check if the user exists
-        if user_id not in user_ids:
+    def ensure_user_exists(self, *, organisation_id: UUID, user_id: UUID) -> None:
+        """
+        Ensure that a user with the given ID exists.
+
+        :param organisation_id: The ID of the organisation.
+        :param user_id: The ID of the user.
+        :return: None
+        :raises UserNotFoundError: If the user does not exist.
+        """
+        # IDs missing from the shared index may have been created since
+        if self._shared_index is not None and self._shared_index.contains_user(
+            organisation_id=organisation_id, user_id=user_id
+        ):
+            return
+
+        cache_key = self._get_user_ids_key(organisation_id)
+        member = str(user_id)
+
+        def read_membership() -> CachedValue[SetMembership] | None:
+            # Look the user ID up in the cached user IDs
+            check = self._cache_service.check_member(key=cache_key, member=member)
+            if check.membership == SetMembership.NOT_CACHED:
+                return None
+            return CachedValue(value=check.membership, ttl=check.ttl)
+
+        def populate_membership() -> SetMembership:
+            user_ids = self._cache_user_ids(organisation_id, cache_key=cache_key)
+            if user_id in user_ids:
+                return SetMembership.MEMBER
+            return SetMembership.NOT_MEMBER
+
+        # Only one caller reloads the user IDs on a cache miss
+        membership = self._single_flight.run(
+            cache_key, read=read_membership, populate=populate_membership
+        )
+        if membership != SetMembership.MEMBER:
             raise UserNotFoundError(user_id)
 
     def get_users(self, organisation_id: UUID) -> list[User]:
@@ -119,13 +200,35 @@ class UserService:
         :return: The user.
         """
         self._organisation_service.ensure_organisation_exists(organisation_id)
+        self._reject_unknown_user(organisation_id=organisation_id, user_id=user_id)
 
-        user = self._repository.get_user(
-            user_id=user_id, organisation_id=organisation_id
+        generation = self._organisation_service.get_cache_generation(organisation_id)
+        cache_key = self._cache_key_manager.get_user_key(
+            organisation_id=organisation_id, generation=generation, user_id=user_id
+        )
+
+        # Try to get the user from cache
+        cached_user = self._cache_service.get_value(cache_key, codec=self._user_codec)
+        if cached_user is not None:
+            return cached_user
+
+        # Fetch from the repository, unless the user was recently not found
+        user = self._negative_cache.lookup(
+            self._cache_key_manager.get_absent_user_key(
+                organisation_id=organisation_id, generation=generation, user_id=user_id
+            ),
+            lambda: self._repository.get_user(
+                user_id=user_id, organisation_id=organisation_id
+            ),
         )
         if user is None:
             raise UserNotFoundError(user_id)
 
+        # Store user in cache
+        self._cache_service.store_value(
+            key=cache_key, value=user, codec=self._user_codec
+        )
+
         return user
 
     def _email_is_available(self, *, organisation_id: UUID, email: str) -> bool:
@@ -180,9 +283,15 @@ class UserService:
 
         self._repository.add_or_update_user(user)
 
-        # Invalidate the cache
-        self._cache_service.delete_key(
-            self._cache_key_manager.get_user_ids_key(organisation_id)
+        if self._identifier_filter is not None:
+            self._identifier_filter.add(user.id)
+
+        # User IDs are generated on creation and never match an ID that was
+        # looked up before, so there are no negative entries to forget
+
+        # Add the user to the cached user IDs
+        self._cache_service.add_to_set(
+            key=self._get_user_ids_key(organisation_id), member=str(user.id)
         )
 
         return user.id
@@ -246,6 +355,17 @@ class UserService:
 
         self._repository.add_or_update_user(user)
 
+        # Invalidate the cached user
+        self._cache_service.delete_key(
+            self._cache_key_manager.get_user_key(
+                organisation_id=organisation_id,
+                generation=self._organisation_service.get_cache_generation(
+                    organisation_id
+                ),
+                user_id=user_id,
+            )
+        )
+
     def delete_user(self, *, organisation_id: UUID, user_id: UUID) -> None:
         """
         Deletes a user from the system.
@@ -260,6 +380,17 @@ class UserService:
         )
         self.ensure_user_exists(organisation_id=organisation_id, user_id=user_id)
         self._repository.delete_user(organisation_id=organisation_id, user_id=user_id)
+        if self._shared_index is not None:
+            self._shared_index.invalidate()
+        generation = self._organisation_service.get_cache_generation(organisation_id)
+        self._cache_service.remove_from_set(
+            key=self._cache_key_manager.get_user_ids_key(
+                organisation_id, generation=generation
+            ),
+            member=str(user_id),
+        )
         self._cache_service.delete_key(
-            self._cache_key_manager.get_user_ids_key(organisation_id)
+            self._cache_key_manager.get_user_key(
+                organisation_id=organisation_id, generation=generation, user_id=user_id
+            )
         )
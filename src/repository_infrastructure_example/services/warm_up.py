@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from repository_infrastructure_example.repositories.organisation import (
+    OrganisationRepository,
+)
+from repository_infrastructure_example.services.organisation import OrganisationService
+from repository_infrastructure_example.services.user import UserService
+
+
+class CacheWarmUpReport(BaseModel):
+    organisation_id_count: int = Field(
+        description="The number of organisation IDs preloaded."
+    )
+    user_id_set_count: int = Field(
+        description="The number of organisations whose user IDs were preloaded."
+    )
+    failed_user_id_set_count: int = Field(
+        description="The number of organisations whose user IDs failed to load."
+    )
+    skipped_user_id_set_count: int = Field(
+        description="The number of organisations whose user IDs were not preloaded "
+        "within the time budget."
+    )
+    duration: float = Field(description="The duration of the warm-up in seconds.")
+
+
+class CacheWarmUpService:
+    """
+    Preloads the ID sets that are needed first after a deploy or a cache restart.
+
+    The organisation IDs are loaded first, then the user IDs of the most
+    recently active organisations, a bounded number at a time. Organisations
+    not reached within the time budget are left to be loaded on demand.
+    """
+
+    _organisation_service: OrganisationService
+    _user_service: UserService
+    _organisation_repository: OrganisationRepository
+
+    def __init__(
+        self,
+        *,
+        organisation_service: OrganisationService,
+        user_service: UserService,
+        organisation_repository: OrganisationRepository,
+    ) -> None:
+        self._organisation_service = organisation_service
+        self._user_service = user_service
+        self._organisation_repository = organisation_repository
+
+    def warm_up(
+        self, *, organisation_limit: int, concurrency: int, time_budget: float
+    ) -> CacheWarmUpReport:
+        """
+        Preload the organisation IDs and the user IDs of the most active organisations.
+
+        :param organisation_limit: The number of most active organisations to
+            preload the user IDs of.
+        :param concurrency: The number of user ID sets loaded at the same time.
+        :param time_budget: The time in seconds after which no more user ID sets
+            are loaded.
+        :return: The report of the warm-up.
+        """
+        started = time.perf_counter()
+        deadline = started + time_budget
+
+        organisation_id_count = self._organisation_service.warm_up_organisation_ids()
+        organisation_ids = (
+            self._organisation_repository.get_most_active_organisation_ids(
+                organisation_limit
+            )
+            if organisation_limit > 0
+            else []
+        )
+
+        executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="cache-warm-up"
+        )
+        futures = [
+            executor.submit(self._user_service.warm_up_user_ids, organisation_id)
+            for organisation_id in organisation_ids
+        ]
+        done, not_done = wait(futures, timeout=max(deadline - time.perf_counter(), 0))
+        # Loads that already started finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        failed_count = 0
+        for future in done:
+            error = future.exception()
+            if error is not None:
+                failed_count += 1
+                logger.warning(f"Failed to preload user IDs: {str(error)}")
+
+        report = CacheWarmUpReport(
+            organisation_id_count=organisation_id_count,
+            user_id_set_count=len(done) - failed_count,
+            failed_user_id_set_count=failed_count,
+            skipped_user_id_set_count=len(not_done),
+            duration=time.perf_counter() - started,
+        )
+        logger.info(
+            f"Cache warm-up took {report.duration:.3f}s: preloaded "
+            f"{report.organisation_id_count} organisation ID(s) and the user IDs "
+            f"of {report.user_id_set_count} organisation(s), "
+            f"{report.failed_user_id_set_count} failed, "
+            f"{report.skipped_user_id_set_count} skipped."
+        )
+        return report
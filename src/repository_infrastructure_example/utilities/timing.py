@@ -0,0 +1,70 @@
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+
+class PhaseTiming(BaseModel):
+    name: str = Field(description="The name of the phase.", examples=["migrations"])
+    duration: float = Field(
+        description="The duration of the phase in seconds.", examples=[0.042]
+    )
+
+
+class PhaseTimer:
+    """Records how long the consecutive phases of a process take."""
+
+    _phases: list[PhaseTiming]
+
+    def __init__(self) -> None:
+        self._phases = []
+
+    @contextmanager
+    def measure(self, name: str) -> Generator[None, None, None]:
+        """
+        Measure the duration of the wrapped block as a phase.
+
+        The phase is recorded even if the block raises.
+
+        :param name: The name of the phase.
+        :yield: None
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, duration: float) -> None:
+        """
+        Record the duration of a phase.
+
+        :param name: The name of the phase.
+        :param duration: The duration of the phase in seconds.
+        :return: None
+        """
+        self._phases.append(PhaseTiming(name=name, duration=duration))
+
+    @property
+    def phases(self) -> list[PhaseTiming]:
+        """Get the recorded phases in the order they were recorded."""
+        return list(self._phases)
+
+    @property
+    def total(self) -> float:
+        """Get the summed duration of all recorded phases in seconds."""
+        return sum(phase.duration for phase in self._phases)
+
+    def log(self, title: str) -> None:
+        """
+        Log the recorded phases.
+
+        :param title: The title of the process the phases belong to.
+        :return: None
+        """
+        phases = ", ".join(
+            f"{phase.name}={phase.duration:.3f}s" for phase in self._phases
+        )
+        logger.info(f"{title} took {self.total:.3f}s ({phases})")
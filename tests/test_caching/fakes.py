@@ -0,0 +1,118 @@
+from collections.abc import Callable, Mapping, Sequence
+from typing import override
+
+from repository_infrastructure_example.caching.bus import MessageBus
+from repository_infrastructure_example.caching.cache import (
+    CacheService,
+    DeferredDeletions,
+    MembershipCheck,
+)
+from repository_infrastructure_example.caching.circuit_breaker import CircuitBreaker
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+
+def create_memory_cache(max_entries: int = 1_000) -> MemoryCacheService:
+    return MemoryCacheService(
+        ttl_policy=TtlPolicy(), max_entries=max_entries, max_size=1_000_000
+    )
+
+
+class InMemoryMessageBus(MessageBus):
+    """Bus stand-in delivering every message synchronously to all subscribers."""
+
+    messages: list[str]
+
+    _callbacks: list[Callable[[str], None]]
+
+    def __init__(self) -> None:
+        self.messages = []
+        self._callbacks = []
+
+    @override
+    def publish(self, message: str, /) -> None:
+        self.messages.append(message)
+        for callback in self._callbacks:
+            callback(message)
+
+    @override
+    def subscribe(self, callback: Callable[[str], None], /) -> None:
+        self._callbacks.append(callback)
+
+    @override
+    def close(self) -> None:
+        self._callbacks.clear()
+
+
+class UnreliableCacheService(CacheService):
+    """Remote cache stand-in that fails every call while it is unavailable."""
+
+    is_available: bool
+    call_count: int
+
+    _cache: MemoryCacheService
+    _codec: BytesCodec
+
+    def __init__(self, *, circuit_breaker: CircuitBreaker | None = None) -> None:
+        self.is_available = True
+        self.call_count = 0
+        self._cache = create_memory_cache()
+        self._codec = BytesCodec()
+        self._circuit_breaker = circuit_breaker
+        self._deferred_deletions = DeferredDeletions()
+
+    def _reach(self) -> MemoryCacheService:
+        self.call_count += 1
+        if not self.is_available:
+            raise ConnectionError("Cache is unavailable.")
+        return self._cache
+
+    @override
+    def _store_set(self, *, key: str, value: set[str]) -> None:
+        self._reach().store_set(key=key, value=value)
+
+    @override
+    def _get_set(self, key: str, /) -> set[str] | None:
+        return self._reach().get_set(key)
+
+    @override
+    def _add_to_set(self, *, key: str, member: str) -> None:
+        self._reach().add_to_set(key=key, member=member)
+
+    @override
+    def _remove_from_set(self, *, key: str, member: str) -> None:
+        self._reach().remove_from_set(key=key, member=member)
+
+    @override
+    def _check_member(self, *, key: str, member: str) -> MembershipCheck:
+        return self._reach().check_member(key=key, member=member)
+
+    @override
+    def _store_values(self, *, values: Mapping[str, bytes], ttl: float | None) -> None:
+        self._reach().store_values(values=values, codec=self._codec, ttl=ttl)
+
+    @override
+    def _get_values(self, keys: Sequence[str], /) -> list[bytes | None]:
+        values = self._reach().get_values(keys, codec=self._codec)
+        return [values.get(key) for key in keys]
+
+    @override
+    def _acquire_lease(self, *, key: str, token: str, ttl: float) -> bool:
+        return self._reach().acquire_lease(key=key, token=token, ttl=ttl)
+
+    @override
+    def _release_lease(self, *, key: str, token: str) -> None:
+        self._reach().release_lease(key=key, token=token)
+
+    @override
+    def _delete_keys(self, keys: Sequence[str], /) -> None:
+        self._reach().delete_keys(keys)
+
+    @override
+    def _start_generation(self, key: str, /, *, initial: int) -> int:
+        return self._reach().start_generation(key)
+
+    @override
+    def _delete_matching(self, pattern: str, /) -> int:
+        return self._reach().delete_matching(pattern)
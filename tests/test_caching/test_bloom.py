@@ -0,0 +1,89 @@
+import time
+from collections.abc import Callable, Iterable
+from uuid import UUID, uuid4
+
+from repository_infrastructure_example.caching.bloom import (
+    BloomFilter,
+    IdentifierFilter,
+)
+from tests.test_caching.fakes import InMemoryMessageBus
+
+
+def _create_filter(
+    load_identifiers: Callable[[], Iterable[UUID]],
+    message_bus: InMemoryMessageBus | None = None,
+) -> IdentifierFilter:
+    return IdentifierFilter(
+        load_identifiers=load_identifiers,
+        message_bus=message_bus,
+        capacity=1_000,
+        error_rate=0.001,
+        rebuild_interval=60,
+    )
+
+
+def test_finding_every_added_identifier() -> None:
+    bloom_filter = BloomFilter(capacity=1_000, error_rate=0.01)
+    identifiers = [uuid4() for _ in range(1_000)]
+    for identifier in identifiers:
+        bloom_filter.add(identifier)
+
+    assert all(identifier in bloom_filter for identifier in identifiers), (
+        "Added identifier was not found."
+    )
+
+
+def test_keeping_false_positives_within_the_error_rate() -> None:
+    bloom_filter = BloomFilter(capacity=10_000, error_rate=0.01)
+    for _ in range(10_000):
+        bloom_filter.add(uuid4())
+
+    false_positive_count = sum(uuid4() in bloom_filter for _ in range(10_000))
+
+    # Allows for the variance of the sample
+    assert false_positive_count / 10_000 < 0.015, "Too many false positives."
+    assert bloom_filter.false_positive_rate < 0.015, (
+        "Expected false positive rate exceeds the error rate."
+    )
+
+
+def test_letting_every_identifier_through_before_the_first_build() -> None:
+    identifier_filter = _create_filter(list)
+
+    assert identifier_filter.might_contain(uuid4()), "Unbuilt filter rejected an ID."
+    assert not identifier_filter.statistics.is_ready, "Unbuilt filter was ready."
+
+    identifier_filter.rebuild()
+    assert not identifier_filter.might_contain(uuid4()), "Built filter let an ID in."
+
+
+def test_adding_identifiers_broadcast_by_another_process() -> None:
+    bus = InMemoryMessageBus()
+    first = _create_filter(list, bus)
+    second = _create_filter(list, bus)
+    for identifier_filter in (first, second):
+        identifier_filter.start()
+        deadline = time.monotonic() + 1
+        while not identifier_filter.statistics.is_ready:
+            assert time.monotonic() < deadline, "Filter was not built."
+            time.sleep(0.01)
+
+    identifier = uuid4()
+    first.add(identifier)
+
+    assert second.might_contain(identifier), "Broadcast identifier was not added."
+    for identifier_filter in (first, second):
+        identifier_filter.close()
+
+
+def test_dropping_deleted_identifiers_on_rebuild() -> None:
+    kept, deleted = uuid4(), uuid4()
+    identifiers = {kept, deleted}
+    identifier_filter = _create_filter(lambda: identifiers)
+    identifier_filter.rebuild()
+
+    identifiers.discard(deleted)
+    identifier_filter.rebuild()
+
+    assert identifier_filter.might_contain(kept), "Kept identifier was dropped."
+    assert not identifier_filter.might_contain(deleted), "Deleted identifier was kept."
@@ -0,0 +1,83 @@
+import time
+
+from repository_infrastructure_example.caching.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+)
+from tests.test_caching.fakes import UnreliableCacheService
+
+_RESET_TIMEOUT = 0.05
+
+
+def _create_circuit_breaker(failure_threshold: int = 1) -> CircuitBreaker:
+    return CircuitBreaker(
+        name="test",
+        failure_threshold=failure_threshold,
+        reset_timeout=_RESET_TIMEOUT,
+    )
+
+
+def test_opening_after_consecutive_failures() -> None:
+    circuit_breaker = _create_circuit_breaker(failure_threshold=2)
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.CLOSED, "Circuit opened too early."
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.CLOSED, (
+        "Failures separated by a success were counted as consecutive."
+    )
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.OPEN, "Circuit did not open."
+    assert not circuit_breaker.allow_request(), "Open circuit let a call through."
+
+
+def test_letting_a_single_probe_through_after_the_reset_timeout() -> None:
+    circuit_breaker = _create_circuit_breaker()
+    circuit_breaker.record_failure()
+
+    time.sleep(_RESET_TIMEOUT)
+    assert circuit_breaker.allow_request(), "Probe was not let through."
+    assert not circuit_breaker.allow_request(), "Second probe was let through."
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.OPEN, "Failed probe did not reopen."
+
+    time.sleep(_RESET_TIMEOUT)
+    assert circuit_breaker.allow_request(), "Probe was not let through."
+    circuit_breaker.record_success()
+    assert circuit_breaker.state == CircuitState.CLOSED, "Probe did not close."
+
+
+def test_skipping_the_cache_while_the_circuit_is_open() -> None:
+    cache_service = UnreliableCacheService(circuit_breaker=_create_circuit_breaker())
+    cache_service.is_available = False
+
+    assert cache_service.get_set("key") is None, "Failed lookup returned a value."
+    call_count = cache_service.call_count
+    assert cache_service.get_set("key") is None, "Skipped lookup returned a value."
+    assert cache_service.call_count == call_count, "Open circuit reached the cache."
+
+
+def test_deleting_sets_changed_while_the_circuit_was_open() -> None:
+    cache_service = UnreliableCacheService(circuit_breaker=_create_circuit_breaker())
+    cache_service.store_set(key="added", value={"a"})
+    cache_service.store_set(key="removed", value={"a", "b"})
+    cache_service.store_set(key="deleted", value={"a"})
+
+    # Writes made while the cache is down cannot be applied to the sets
+    cache_service.is_available = False
+    cache_service.add_to_set(key="added", member="b")
+    cache_service.remove_from_set(key="removed", member="b")
+    cache_service.delete_key("deleted")
+
+    # The first call after recovering must not read the outdated sets
+    cache_service.is_available = True
+    time.sleep(_RESET_TIMEOUT)
+    assert cache_service.get_set("added") is None, "Outdated set was served."
+    assert cache_service.get_set("removed") is None, "Outdated set was served."
+    assert cache_service.get_set("deleted") is None, "Deleted set was served."
+
+    cache_service.store_set(key="added", value={"a", "b"})
+    assert cache_service.get_set("added") == {"a", "b"}, "Reloaded set was deleted."
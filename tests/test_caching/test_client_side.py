@@ -0,0 +1,75 @@
+from redis.cache import CacheConfig, CacheEntry, CacheEntryStatus, CacheKey
+
+from repository_infrastructure_example.caching.client_side import ClientSideCache
+
+
+def _read(cache: ClientSideCache, cache_key: CacheKey, reply: bytes) -> bytes:
+    """Read a reply the way redis-py does, from Redis on a miss."""
+    assert cache.is_cachable(cache_key), "Command was not cachable."
+    entry = cache.get(cache_key)
+    if entry is not None and entry.status == CacheEntryStatus.VALID:
+        return entry.cache_value
+
+    cache.set(
+        CacheEntry(
+            cache_key=cache_key,
+            cache_value=b"",
+            status=CacheEntryStatus.IN_PROGRESS,
+            connection_ref=None,
+        )
+    )
+    cache.set(
+        CacheEntry(
+            cache_key=cache_key,
+            cache_value=reply,
+            status=CacheEntryStatus.VALID,
+            connection_ref=None,
+        )
+    )
+    return reply
+
+
+def test_counting_hits_and_misses() -> None:
+    cache = ClientSideCache(CacheConfig(max_size=10))
+    cache_key = CacheKey(command="GET", redis_keys=("a__user",))
+
+    assert _read(cache, cache_key, b"first") == b"first", "Miss was not read."
+    assert _read(cache, cache_key, b"second") == b"first", "Hit was not served."
+
+    statistics = cache.statistics
+    assert (statistics.lookups, statistics.hits, statistics.misses) == (2, 1, 1), (
+        "Lookups were not counted."
+    )
+    assert statistics.hit_ratio == 0.5, "Hit ratio was not computed."
+
+
+def test_dropping_only_the_replies_of_invalidated_keys() -> None:
+    cache = ClientSideCache(CacheConfig(max_size=10))
+    user_key = CacheKey(command="GET", redis_keys=("a__user",))
+    member_key = CacheKey(
+        command="SISMEMBER", redis_keys=("a__user_ids",), redis_args=("x",)
+    )
+    members_key = CacheKey(command="SMEMBERS", redis_keys=("a__user_ids",))
+    for cache_key in (user_key, member_key, members_key):
+        _read(cache, cache_key, b"reply")
+
+    assert cache.delete_by_redis_keys([b"a__user_ids"]) == [True, True], (
+        "Replies of the invalidated key were not dropped."
+    )
+    assert cache.get(user_key) is not None, "Reply of another key was dropped."
+    assert cache.get(members_key) is None, "Reply of the invalidated key was kept."
+
+    statistics = cache.statistics
+    assert statistics.invalidation_messages == 1, "Message was not counted."
+    assert statistics.invalidated_entries == 2, "Dropped replies were not counted."
+
+
+def test_counting_evictions() -> None:
+    cache = ClientSideCache(CacheConfig(max_size=2))
+    for key in ("a__user", "b__user", "c__user"):
+        _read(cache, CacheKey(command="GET", redis_keys=(key,)), b"reply")
+
+    assert cache.statistics.evictions == 1, "Eviction was not counted."
+    assert cache.statistics.entries == 2, "Cache exceeded its bound."
+    # Evicted replies are no longer indexed, so invalidating them drops nothing
+    assert cache.delete_by_redis_keys([b"a__user"]) == [], "Evicted reply was kept."
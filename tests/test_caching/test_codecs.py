@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from repository_infrastructure_example.caching.codecs import (
+    BytesCodec,
+    CompressingCodec,
+    ModelCodec,
+)
+from repository_infrastructure_example.domain.organisation import Organisation
+from tests.test_caching.fakes import create_memory_cache
+
+_ORGANISATION = Organisation(
+    id=uuid4(),
+    name="Acme",
+    slug="acme",
+    email="acme@example.com",
+    is_active=True,
+    created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    updated_at=datetime(2026, 1, 2, tzinfo=timezone.utc),
+)
+
+
+def test_encoding_models_without_field_names() -> None:
+    codec = ModelCodec(Organisation)
+
+    data = codec.encode(_ORGANISATION)
+
+    assert b"slug" not in data, "Field names were encoded."
+    assert codec.decode(data) == _ORGANISATION, "Model was not decoded."
+
+
+def test_compressing_encodings_from_the_threshold_on() -> None:
+    codec = CompressingCodec(BytesCodec(), threshold=100)
+    value = b"x" * 100
+
+    assert codec.encode(value[:99])[1:] == value[:99], (
+        "Encoding below the threshold was compressed."
+    )
+    assert len(codec.encode(value)) < len(value), (
+        "Encoding at the threshold was not compressed."
+    )
+    assert codec.decode(codec.encode(value)) == value, "Value was not decompressed."
+
+
+def test_decoding_values_encoded_with_another_threshold() -> None:
+    compressed = CompressingCodec(BytesCodec(), threshold=1).encode(b"value")
+
+    assert CompressingCodec(BytesCodec(), threshold=1_000).decode(compressed) == (
+        b"value"
+    ), "Value compressed under another threshold was not decoded."
+
+
+def test_rejecting_invalid_encodings() -> None:
+    codec = CompressingCodec(BytesCodec(), threshold=1)
+
+    with pytest.raises(ValueError):
+        codec.decode(b"\x07value")
+    with pytest.raises(ValueError):
+        codec.decode(b"\x01not compressed")
+
+
+def test_reading_several_keys_at_once() -> None:
+    cache_service = create_memory_cache()
+    codec = CompressingCodec(ModelCodec(Organisation), threshold=64)
+
+    cache_service.store_values(values={"a": _ORGANISATION}, codec=codec)
+
+    assert cache_service.get_values(["a", "b"], codec=codec) == {"a": _ORGANISATION}, (
+        "Found values were not returned by their keys."
+    )
+
+
+def test_treating_undecodable_values_as_missing() -> None:
+    cache_service = create_memory_cache()
+    cache_service.store_values(values={"a": b"\x07garbage"}, codec=BytesCodec())
+
+    codec = CompressingCodec(BytesCodec(), threshold=64)
+    assert cache_service.get_values(["a"], codec=codec) == {}, (
+        "Undecodable value was returned."
+    )
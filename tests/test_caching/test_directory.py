@@ -0,0 +1,81 @@
+from collections.abc import Callable
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from repository_infrastructure_example.caching.directory import OrganisationDirectory
+from repository_infrastructure_example.domain.organisation import Organisation
+
+
+def _create_organisation(name: str) -> Organisation:
+    now = datetime.now(timezone.utc)
+    return Organisation(
+        id=uuid4(),
+        name=name,
+        slug=name.lower(),
+        email=f"{name.lower()}@example.com",
+        is_active=True,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _create_directory(
+    load_organisations: Callable[[], list[Organisation]],
+) -> OrganisationDirectory:
+    return OrganisationDirectory(
+        load_organisations=load_organisations,
+        get_version=lambda: 1,
+        message_bus=None,
+        refresh_interval=60,
+    )
+
+
+def test_keeping_a_deletion_made_while_loading() -> None:
+    organisation = _create_organisation("Acme")
+    organisations = [organisation]
+
+    def load_organisations() -> list[Organisation]:
+        # Read before the deletion is applied
+        loaded = list(organisations)
+        if directory.get(organisation.id) is not None:
+            organisations.clear()
+            directory.remove(organisation.id)
+        return loaded
+
+    directory = _create_directory(load_organisations)
+    directory.refresh()
+    assert directory.get(organisation.id) == organisation, "Organisation was lost."
+
+    directory.refresh(force=True)
+    assert directory.get(organisation.id) is None, "Deleted organisation was revived."
+
+
+def test_keeping_an_update_made_while_loading() -> None:
+    organisation = _create_organisation("Acme")
+    updated = organisation.model_copy(update={"name": "Acme Two"})
+    organisations = [organisation]
+
+    def load_organisations() -> list[Organisation]:
+        loaded = list(organisations)
+        if directory.get(organisation.id) is not None:
+            organisations[0] = updated
+            directory.put(updated)
+        return loaded
+
+    directory = _create_directory(load_organisations)
+    directory.refresh()
+    directory.refresh(force=True)
+    assert directory.get(organisation.id) == updated, "Update was overwritten."
+
+
+def test_applying_changes_until_the_next_load() -> None:
+    organisation = _create_organisation("Acme")
+    directory = _create_directory(lambda: [organisation])
+    assert directory.get_all() is None, "Unloaded directory answered."
+
+    directory.refresh()
+    created = _create_organisation("Initech")
+    directory.put(created)
+    directory.remove(organisation.id)
+    assert directory.get_all() == [created], "Local changes were not applied."
+    assert not directory.refresh(), "Unchanged directory was reloaded."
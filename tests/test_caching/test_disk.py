@@ -0,0 +1,167 @@
+import time
+from pathlib import Path
+
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.disk import (
+    DiskCacheService,
+    DiskCacheValidator,
+)
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+_BYTES = BytesCodec()
+_MAX_SIZE = 64 * 1024
+_STAMPS = {"organisation": 1, "user": 1}
+
+
+def _open(directory: Path) -> DiskCacheService:
+    return DiskCacheService(
+        path=directory / "cache",
+        ttl_policy=TtlPolicy(),
+        get_key_family=CacheKeyManager().get_key_family,
+        max_size=_MAX_SIZE,
+    )
+
+
+def _open_validated(directory: Path) -> DiskCacheService:
+    cache_service = _open(directory)
+    cache_service.validate(_STAMPS)
+    return cache_service
+
+
+def test_reading_what_was_written(tmp_path: Path) -> None:
+    cache_service = _open_validated(tmp_path)
+    cache_service.store_values(values={"a__organisation": b"value"}, codec=_BYTES)
+    cache_service.store_set(key="a__user_ids", value={"x", "y"})
+    cache_service.add_to_set(key="a__user_ids", member="z")
+
+    assert cache_service.get_value("a__organisation", codec=_BYTES) == b"value", (
+        "Stored value was not read back."
+    )
+    assert cache_service.get_set("a__user_ids") == {"x", "y", "z"}, (
+        "Stored set was not read back."
+    )
+    cache_service.close()
+
+
+def test_reading_what_was_written_before_the_file_was_reopened(
+    tmp_path: Path,
+) -> None:
+    cache_service = _open_validated(tmp_path)
+    cache_service.store_values(values={"a__organisation": b"value"}, codec=_BYTES)
+    cache_service.delete_key("a__organisation")
+    cache_service.store_values(values={"b__organisation": b"other"}, codec=_BYTES)
+    cache_service.close()
+
+    cache_service = _open(tmp_path)
+    assert cache_service.validate(_STAMPS), "Unchanged data invalidated the file."
+    assert cache_service.get_values(
+        ["a__organisation", "b__organisation"], codec=_BYTES
+    ) == {"b__organisation": b"other"}, "Reopened file lost or revived entries."
+    cache_service.close()
+
+
+def test_dropping_a_record_cut_off_while_appending(tmp_path: Path) -> None:
+    cache_service = _open_validated(tmp_path)
+    cache_service.store_values(values={"a__organisation": b"value"}, codec=_BYTES)
+    # Released without writing the index, as if the process had crashed
+    cache_service.close()
+    (tmp_path / "cache.index").unlink()
+    with (tmp_path / "cache.data").open("ab") as file:
+        file.write(b"\x00\x01cut off")
+
+    cache_service = _open(tmp_path)
+    assert cache_service.get_value("a__organisation", codec=_BYTES) == b"value", (
+        "Records before the cut off one were lost."
+    )
+    cache_service.store_values(values={"b__organisation": b"other"}, codec=_BYTES)
+    assert cache_service.get_value("b__organisation", codec=_BYTES) == b"other", (
+        "Record appended after the truncated tail was not read back."
+    )
+    cache_service.close()
+
+
+def test_compacting_evicts_the_oldest_entries(tmp_path: Path) -> None:
+    cache_service = _open_validated(tmp_path)
+    for index in range(200):
+        cache_service.store_values(
+            values={f"{index}__organisation": b"x" * 1_000}, codec=_BYTES
+        )
+
+    assert (tmp_path / "cache.data").stat().st_size <= _MAX_SIZE, (
+        "File was not compacted."
+    )
+    assert cache_service.get_value("0__organisation", codec=_BYTES) is None, (
+        "Oldest entry was not evicted."
+    )
+    assert cache_service.get_value("199__organisation", codec=_BYTES) == (
+        b"x" * 1_000
+    ), "Newest entry was lost."
+    cache_service.close()
+
+    cache_service = _open(tmp_path)
+    assert cache_service.get_value("199__organisation", codec=_BYTES) == (
+        b"x" * 1_000
+    ), "Compacted file was not read back after reopening."
+    cache_service.close()
+
+
+def test_dropping_all_entries_never_validated(tmp_path: Path) -> None:
+    cache_service = _open(tmp_path)
+    cache_service.store_values(values={"a__organisation": b"value"}, codec=_BYTES)
+
+    assert not cache_service.validate(_STAMPS), "Unvalidated entries were kept."
+    assert cache_service.get_value("a__organisation", codec=_BYTES) is None, (
+        "Unvalidated entry was served."
+    )
+    cache_service.close()
+
+
+def test_dropping_only_the_families_whose_stamp_changed(tmp_path: Path) -> None:
+    cache_service = _open_validated(tmp_path)
+    cache_service.store_values(
+        values={"a__organisation": b"organisation", "a__user": b"user"},
+        codec=_BYTES,
+    )
+    cache_service.close()
+
+    cache_service = _open(tmp_path)
+    assert not cache_service.validate({**_STAMPS, "user": 2}), (
+        "Changed stamp did not invalidate the file."
+    )
+    assert cache_service.get_values(["a__organisation", "a__user"], codec=_BYTES) == {
+        "a__organisation": b"organisation"
+    }, "Entries of the wrong families were dropped."
+    assert cache_service.stamps == {**_STAMPS, "user": 2}, "Stamps were not updated."
+    cache_service.close()
+
+    # The dropped entries stay dropped, even without the index
+    (tmp_path / "cache.index").unlink()
+    cache_service = _open(tmp_path)
+    assert cache_service.validate({**_STAMPS, "user": 2}), "Stamps were not kept."
+    assert cache_service.get_value("a__user", codec=_BYTES) is None, (
+        "Dropped entry was revived."
+    )
+    cache_service.close()
+
+
+def test_validating_in_the_background(tmp_path: Path) -> None:
+    cache_service = _open_validated(tmp_path)
+    cache_service.store_values(values={"a__user": b"user"}, codec=_BYTES)
+
+    validator = DiskCacheValidator(
+        cache_service=cache_service,
+        get_stamps=lambda: {**_STAMPS, "user": 2},
+        interval=0.01,
+    )
+    validator.start()
+    deadline = time.monotonic() + 1
+    while cache_service.stamps != {**_STAMPS, "user": 2}:
+        assert time.monotonic() < deadline, "Validator did not validate."
+        time.sleep(0.01)
+    validator.close()
+
+    assert cache_service.get_value("a__user", codec=_BYTES) is None, (
+        "Entry of a changed family was served."
+    )
+    cache_service.close()
@@ -0,0 +1,74 @@
+import time
+
+from repository_infrastructure_example.caching.circuit_breaker import CircuitBreaker
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.fallback import FallbackCacheService
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from tests.test_caching.fakes import UnreliableCacheService, create_memory_cache
+
+_BYTES = BytesCodec()
+_RESET_TIMEOUT = 0.05
+
+
+def _create_caches() -> tuple[
+    FallbackCacheService, UnreliableCacheService, MemoryCacheService
+]:
+    circuit_breaker = CircuitBreaker(
+        name="test", failure_threshold=1, reset_timeout=_RESET_TIMEOUT
+    )
+    primary = UnreliableCacheService(circuit_breaker=circuit_breaker)
+    fallback = create_memory_cache()
+    cache_service = FallbackCacheService(
+        primary=primary, fallback=fallback, primary_circuit_breaker=circuit_breaker
+    )
+    return cache_service, primary, fallback
+
+
+def _fail_primary(
+    cache_service: FallbackCacheService, primary: UnreliableCacheService
+) -> None:
+    # The first failing call opens the circuit
+    primary.is_available = False
+    cache_service.get_set("probe")
+
+
+def _recover_primary(primary: UnreliableCacheService) -> None:
+    primary.is_available = True
+    time.sleep(_RESET_TIMEOUT)
+
+
+def test_serving_from_the_fallback_while_the_primary_fails() -> None:
+    cache_service, primary, fallback = _create_caches()
+    _fail_primary(cache_service, primary)
+
+    cache_service.store_set(key="key", value={"a"})
+    assert fallback.get_set("key") == {"a"}, "Fallback did not receive the write."
+    assert cache_service.get_set("key") == {"a"}, "Fallback did not serve the read."
+
+
+def test_deleting_keys_written_during_an_outage_from_the_primary() -> None:
+    cache_service, primary, _ = _create_caches()
+    cache_service.store_set(key="key", value={"a"})
+
+    _fail_primary(cache_service, primary)
+    cache_service.add_to_set(key="key", member="b")
+    cache_service.store_values(values={"value": b"new"}, codec=_BYTES)
+
+    _recover_primary(primary)
+    assert cache_service.get_set("key") is None, "Primary served an outdated set."
+    assert cache_service.get_value("value", codec=_BYTES) is None, (
+        "Primary served a value written during the outage."
+    )
+
+
+def test_invalidating_the_fallback_while_the_primary_serves() -> None:
+    cache_service, primary, fallback = _create_caches()
+    _fail_primary(cache_service, primary)
+    cache_service.store_set(key="added", value={"a"})
+    cache_service.store_set(key="deleted", value={"a"})
+
+    _recover_primary(primary)
+    cache_service.add_to_set(key="added", member="b")
+    cache_service.delete_key("deleted")
+    assert fallback.get_set("added") is None, "Fallback kept an outdated set."
+    assert fallback.get_set("deleted") is None, "Fallback kept a deleted set."
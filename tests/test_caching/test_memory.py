@@ -0,0 +1,136 @@
+import time
+
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.key_manager import CacheKeyFamily
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+from tests.test_caching.fakes import create_memory_cache
+
+_BYTES = BytesCodec()
+
+
+def test_evicting_the_least_recently_used_entry() -> None:
+    cache_service = create_memory_cache(max_entries=2)
+    cache_service.store_values(values={"a": b"a", "b": b"b"}, codec=_BYTES)
+    cache_service.get_value("a", codec=_BYTES)
+
+    cache_service.store_values(values={"c": b"c"}, codec=_BYTES)
+
+    assert cache_service.get_values(["a", "b", "c"], codec=_BYTES) == {
+        "a": b"a",
+        "c": b"c",
+    }, "Least recently used entry was not evicted."
+
+
+def test_evicting_entries_beyond_the_size_bound() -> None:
+    cache_service = MemoryCacheService(
+        ttl_policy=TtlPolicy(), max_entries=100, max_size=10
+    )
+    cache_service.store_values(values={"a": b"12345", "b": b"12345"}, codec=_BYTES)
+    cache_service.store_set(key="c", value={"123"})
+
+    assert cache_service.get_value("a", codec=_BYTES) is None, (
+        "Entry beyond the size bound was not evicted."
+    )
+    assert cache_service.get_set("c") == {"123"}, "Newest entry was evicted."
+
+    cache_service.store_values(values={"d": b"x" * 11}, codec=_BYTES)
+    assert cache_service.get_value("d", codec=_BYTES) is None, (
+        "Value larger than the cache was stored."
+    )
+    assert cache_service.get_value("b", codec=_BYTES) == b"12345", (
+        "Entry was evicted for a value that is never stored."
+    )
+
+
+def test_expiring_entries() -> None:
+    cache_service = create_memory_cache()
+    cache_service.store_values(values={"a": b"a"}, codec=_BYTES, ttl=0.05)
+    cache_service.store_values(values={"b": b"b"}, codec=_BYTES)
+
+    time.sleep(0.1)
+
+    assert cache_service.get_values(["a", "b"], codec=_BYTES) == {"b": b"b"}, (
+        "Expired entry was served."
+    )
+
+
+def test_renewing_the_ttl_of_sliding_families_on_read() -> None:
+    cache_service = MemoryCacheService(
+        ttl_policy=TtlPolicy(
+            default_ttl=0.2,
+            sliding_families={CacheKeyFamily.USER_IDS},
+        ),
+        max_entries=100,
+        max_size=1_000,
+    )
+    cache_service.store_set(key="a__user_ids", value={"x"})
+    cache_service.store_set(key="a__organisation_ids", value={"x"})
+
+    for _ in range(3):
+        time.sleep(0.1)
+        assert cache_service.get_set("a__user_ids") == {"x"}, (
+            "Sliding entry expired while being read."
+        )
+    assert cache_service.get_set("a__organisation_ids") is None, (
+        "Entry of a fixed family was renewed."
+    )
+
+
+def test_holding_a_lease_until_released_by_its_holder() -> None:
+    cache_service = create_memory_cache()
+    assert cache_service.acquire_lease(key="lease", token="a", ttl=5), (
+        "Free lease was not acquired."
+    )
+    assert not cache_service.acquire_lease(key="lease", token="b", ttl=5), (
+        "Held lease was acquired."
+    )
+
+    cache_service.release_lease(key="lease", token="b")
+    assert not cache_service.acquire_lease(key="lease", token="b", ttl=5), (
+        "Lease was released by another holder."
+    )
+
+    cache_service.release_lease(key="lease", token="a")
+    assert cache_service.acquire_lease(key="lease", token="b", ttl=5), (
+        "Released lease was not acquired."
+    )
+
+
+def test_acquiring_an_expired_lease() -> None:
+    cache_service = create_memory_cache()
+    cache_service.acquire_lease(key="lease", token="a", ttl=0.05)
+
+    time.sleep(0.1)
+
+    assert cache_service.acquire_lease(key="lease", token="b", ttl=5), (
+        "Expired lease was not acquired."
+    )
+
+
+def test_deleting_matching_keys() -> None:
+    cache_service = create_memory_cache()
+    cache_service.store_values(
+        values={"a__1__user": b"1", "a__2__user": b"2", "b__1__user": b"3"},
+        codec=_BYTES,
+    )
+
+    assert cache_service.delete_matching("a__*") == 2, "Deletions were not counted."
+    assert cache_service.get_values(
+        ["a__1__user", "a__2__user", "b__1__user"], codec=_BYTES
+    ) == {"b__1__user": b"3"}, "Wrong keys were deleted."
+
+
+def test_keeping_a_started_generation() -> None:
+    cache_service = create_memory_cache()
+    assert cache_service.get_generation("generation") is None, (
+        "Missing generation was found."
+    )
+
+    generation = cache_service.start_generation("generation")
+    assert cache_service.start_generation("generation") == generation, (
+        "Started generation was restarted."
+    )
+    assert cache_service.get_generation("generation") == generation, (
+        "Started generation was not found."
+    )
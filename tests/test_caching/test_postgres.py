@@ -0,0 +1,164 @@
+import time
+from typing import Generator
+from uuid import uuid4
+
+import pytest
+
+from repository_infrastructure_example.application.context import ApplicationContext
+from repository_infrastructure_example.caching.cache import SetMembership
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.key_manager import CacheKeyFamily
+from repository_infrastructure_example.caching.postgres import (
+    PostgresCacheService,
+    _glob_to_like,  # pyright: ignore[reportPrivateUsage]
+)
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+_BYTES = BytesCodec()
+
+
+@pytest.fixture
+def key_prefix() -> str:
+    # Keeps the keys of a test apart from the keys of the running application
+    return f"test__{uuid4()}__"
+
+
+@pytest.fixture
+def cache_service(key_prefix: str) -> Generator[PostgresCacheService, None, None]:
+    cache_service = PostgresCacheService(
+        session_factory=ApplicationContext().clients.postgres.session,
+        ttl_policy=TtlPolicy(),
+    )
+    yield cache_service
+
+    # Cleanup
+    cache_service.delete_matching(f"{key_prefix}*")
+
+
+def test_translating_glob_patterns() -> None:
+    assert _glob_to_like("a*b?c") == "a%b_c", "Wildcards were not translated."
+    assert _glob_to_like("a%b_c\\") == "a\\%b\\_c\\\\", "Literals were not escaped."
+
+
+def test_reading_what_was_written(
+    cache_service: PostgresCacheService, key_prefix: str
+) -> None:
+    cache_service.store_values(values={f"{key_prefix}value": b"value"}, codec=_BYTES)
+    cache_service.store_set(key=f"{key_prefix}set", value={"a", "b"})
+    cache_service.store_set(key=f"{key_prefix}empty_set", value=set())
+    cache_service.add_to_set(key=f"{key_prefix}set", member="c")
+    cache_service.remove_from_set(key=f"{key_prefix}set", member="a")
+
+    assert cache_service.get_value(f"{key_prefix}value", codec=_BYTES) == b"value", (
+        "Stored value was not read back."
+    )
+    assert cache_service.get_set(f"{key_prefix}set") == {"b", "c"}, (
+        "Stored set was not read back."
+    )
+    assert cache_service.get_set(f"{key_prefix}empty_set") == set(), (
+        "Empty set was not read back."
+    )
+    assert cache_service.is_member(key=f"{key_prefix}set", member="b") == (
+        SetMembership.MEMBER
+    ), "Member was not found."
+
+
+def test_not_adding_to_missing_sets(
+    cache_service: PostgresCacheService, key_prefix: str
+) -> None:
+    cache_service.add_to_set(key=f"{key_prefix}set", member="a")
+
+    assert cache_service.get_set(f"{key_prefix}set") is None, "Partial set was cached."
+    assert cache_service.is_member(key=f"{key_prefix}set", member="a") == (
+        SetMembership.NOT_CACHED
+    ), "Missing set was reported as cached."
+
+
+def test_skipping_and_sweeping_expired_entries(
+    cache_service: PostgresCacheService, key_prefix: str
+) -> None:
+    cache_service.store_values(
+        values={f"{key_prefix}value": b"value"}, codec=_BYTES, ttl=0.05
+    )
+
+    time.sleep(0.1)
+
+    assert cache_service.get_value(f"{key_prefix}value", codec=_BYTES) is None, (
+        "Expired entry was served."
+    )
+    assert cache_service.sweep(batch_size=1) >= 1, "Expired entry was not swept."
+    assert cache_service.delete_matching(f"{key_prefix}*") == 0, (
+        "Expired entry was kept."
+    )
+
+
+def test_renewing_the_ttls_of_sliding_keys_on_reads(key_prefix: str) -> None:
+    cache_service = PostgresCacheService(
+        session_factory=ApplicationContext().clients.postgres.session,
+        ttl_policy=TtlPolicy(
+            family_ttls={CacheKeyFamily.USER_IDS: 0.3, CacheKeyFamily.USER: 0.3},
+            sliding_families={CacheKeyFamily.USER_IDS},
+        ),
+    )
+    sliding_key, fixed_key = f"{key_prefix}user_ids", f"{key_prefix}user"
+    cache_service.store_set(key=sliding_key, value={"a"})
+    cache_service.store_values(values={fixed_key: b"value"}, codec=_BYTES)
+
+    for _ in range(3):
+        time.sleep(0.15)
+        assert cache_service.is_member(key=sliding_key, member="a") == (
+            SetMembership.MEMBER
+        ), "Sliding key expired although it was read."
+
+    assert cache_service.get_value(fixed_key, codec=_BYTES) is None, (
+        "Fixed key was renewed."
+    )
+    cache_service.delete_matching(f"{key_prefix}*")
+
+
+def test_holding_a_lease_until_released_by_its_holder(
+    cache_service: PostgresCacheService, key_prefix: str
+) -> None:
+    key = f"{key_prefix}lease"
+    assert cache_service.acquire_lease(key=key, token="a", ttl=5), (
+        "Free lease was not acquired."
+    )
+    assert not cache_service.acquire_lease(key=key, token="b", ttl=5), (
+        "Held lease was acquired."
+    )
+
+    cache_service.release_lease(key=key, token="b")
+    cache_service.release_lease(key=key, token="a")
+    assert cache_service.acquire_lease(key=key, token="b", ttl=5), (
+        "Released lease was not acquired."
+    )
+
+
+def test_keeping_a_started_generation(
+    cache_service: PostgresCacheService, key_prefix: str
+) -> None:
+    key = f"{key_prefix}generation"
+    generation = cache_service.start_generation(key)
+
+    assert cache_service.start_generation(key) == generation, (
+        "Started generation was restarted."
+    )
+    assert cache_service.get_generation(key) == generation, (
+        "Started generation was not found."
+    )
+
+
+def test_deleting_only_keys_matching_literally(
+    cache_service: PostgresCacheService, key_prefix: str
+) -> None:
+    cache_service.store_values(
+        values={f"{key_prefix}a_b": b"1", f"{key_prefix}axb": b"2"}, codec=_BYTES
+    )
+
+    # The underscore is a wildcard of LIKE, but not of glob patterns
+    assert cache_service.delete_matching(f"{key_prefix}a_b") == 1, (
+        "Underscore matched any character."
+    )
+    assert cache_service.get_value(f"{key_prefix}axb", codec=_BYTES) == b"2", (
+        "Key not matching the pattern was deleted."
+    )
@@ -0,0 +1,38 @@
+from typing import Any, override
+
+from redis import Redis
+
+from repository_infrastructure_example.caching.cache import SetMembership
+from repository_infrastructure_example.caching.redis import RedisCacheService
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+
+class _SetStoredDuringCheck(Redis):
+    """Client of a Redis in which a set is stored right after the first check."""
+
+    _is_stored: bool
+
+    def __init__(self) -> None:
+        # Never connects, the commands used by the check are answered here
+        super().__init__()  # pyright: ignore[reportUnknownMemberType]
+        self._is_stored = False
+
+    @override
+    def sismember(self, name: Any, value: Any) -> Any:
+        is_member = self._is_stored
+        self._is_stored = True
+        return is_member
+
+    @override
+    def exists(self, *names: Any) -> Any:
+        return int(self._is_stored)
+
+
+def test_finding_a_member_of_a_set_stored_during_the_check() -> None:
+    cache_service = RedisCacheService(
+        _SetStoredDuringCheck(), ttl_policy=TtlPolicy(), is_client_side_cached=True
+    )
+
+    assert cache_service.is_member(key="a__user_ids", member="b") == (
+        SetMembership.MEMBER
+    ), "Member of a set stored during the check was denied."
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.single_flight import (
+    CachedValue,
+    SingleFlight,
+)
+from tests.test_caching.fakes import create_memory_cache
+
+_KEY = "ids"
+
+
+def _create_single_flight() -> SingleFlight:
+    return SingleFlight(
+        cache_service=create_memory_cache(),
+        cache_key_manager=CacheKeyManager(prefix="test"),
+        lease_ttl=5,
+        wait_timeout=1,
+        stale_window=10,
+        refresh_ahead=5,
+    )
+
+
+def _wait_for(event: threading.Event) -> bool:
+    return event.wait(timeout=1)
+
+
+def test_serving_a_key_due_for_refresh_while_refreshing_it() -> None:
+    single_flight = _create_single_flight()
+    refreshed = threading.Event()
+
+    def populate() -> str:
+        refreshed.set()
+        return "new"
+
+    # Within the stale window after the TTL has ended
+    value = single_flight.run(
+        _KEY, read=lambda: CachedValue(value="old", ttl=8), populate=populate
+    )
+
+    assert value == "old", "Key due for refresh was not served as it was."
+    assert _wait_for(refreshed), "Key was not refreshed in the background."
+    single_flight.close()
+
+
+def test_not_refreshing_a_fresh_key() -> None:
+    single_flight = _create_single_flight()
+    refreshed = threading.Event()
+
+    def populate() -> str:
+        refreshed.set()
+        return "new"
+
+    single_flight.run(
+        _KEY, read=lambda: CachedValue(value="old", ttl=60), populate=populate
+    )
+    single_flight.run(
+        _KEY, read=lambda: CachedValue(value="old", ttl=None), populate=populate
+    )
+
+    assert not refreshed.wait(timeout=0.1), "Fresh key was refreshed."
+    single_flight.close()
+
+
+def test_refreshing_a_key_once_while_it_is_being_refreshed() -> None:
+    single_flight = _create_single_flight()
+    released = threading.Event()
+    refresh_count = 0
+
+    def populate() -> str:
+        nonlocal refresh_count
+        refresh_count += 1
+        released.wait(timeout=1)
+        return "new"
+
+    for _ in range(5):
+        single_flight.run(
+            _KEY, read=lambda: CachedValue(value="old", ttl=1), populate=populate
+        )
+    released.set()
+    # Give the background refresh the chance to finish
+    time.sleep(0.05)
+
+    assert refresh_count == 1, "Key was refreshed by every read."
+    single_flight.close()
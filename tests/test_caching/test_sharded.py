@@ -0,0 +1,89 @@
+from uuid import uuid4
+
+import pytest
+
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from repository_infrastructure_example.caching.sharded import ShardedCacheService
+from tests.test_caching.fakes import create_memory_cache
+
+_BYTES = BytesCodec()
+
+
+def _create_shards(count: int) -> dict[str, MemoryCacheService]:
+    return {f"node-{index}": create_memory_cache() for index in range(count)}
+
+
+def test_storing_the_keys_of_an_organisation_on_one_shard() -> None:
+    shards = _create_shards(4)
+    cache_service = ShardedCacheService(shards=shards)
+    cache_key_manager = CacheKeyManager()
+    organisation_id = uuid4()
+    keys = [
+        cache_key_manager.get_organisation_key(organisation_id, generation=1),
+        cache_key_manager.get_user_key(
+            organisation_id=organisation_id, generation=1, user_id=uuid4()
+        ),
+        cache_key_manager.get_organisation_generation_key(organisation_id),
+    ]
+
+    cache_service.store_values(values=dict.fromkeys(keys, b"value"), codec=_BYTES)
+
+    holding_shards = [
+        name for name, shard in shards.items() if shard.get_values(keys, codec=_BYTES)
+    ]
+    assert len(holding_shards) == 1, "Keys of an organisation were spread."
+    assert len(shards[holding_shards[0]].get_values(keys, codec=_BYTES)) == 3, (
+        "Keys of an organisation were lost."
+    )
+
+
+def test_reading_and_deleting_keys_across_shards() -> None:
+    shards = _create_shards(4)
+    cache_service = ShardedCacheService(shards=shards)
+    values = {f"{index}__user": str(index).encode() for index in range(50)}
+
+    cache_service.store_values(values=values, codec=_BYTES)
+
+    holding_shards = [
+        shard
+        for shard in shards.values()
+        if shard.get_values(list(values), codec=_BYTES)
+    ]
+    assert len(holding_shards) > 1, "Keys were not spread over the shards."
+    assert cache_service.get_values(list(values), codec=_BYTES) == values, (
+        "Values were not read back from their shards."
+    )
+    assert cache_service.delete_matching("*__user") == 50, (
+        "Keys were not deleted on every shard."
+    )
+    assert cache_service.get_values(list(values), codec=_BYTES) == {}, (
+        "Deleted keys were served."
+    )
+
+
+def test_moving_only_the_keys_taken_over_by_an_added_shard() -> None:
+    shards = _create_shards(3)
+    cache_service = ShardedCacheService(shards=shards)
+    keys = [f"{index}__user" for index in range(200)]
+    cache_service.store_values(values=dict.fromkeys(keys, b"value"), codec=_BYTES)
+
+    added_shard = create_memory_cache()
+    resized_cache_service = ShardedCacheService(
+        shards={**shards, "node-3": added_shard}
+    )
+
+    found = resized_cache_service.get_values(keys, codec=_BYTES)
+    assert len(found) > len(keys) // 2, "Most keys moved to another shard."
+    get_shard = resized_cache_service._get_shard  # pyright: ignore[reportPrivateUsage]
+    for key in keys:
+        if key not in found:
+            assert get_shard(key) is added_shard, (
+                "Key moved between shards that were kept."
+            )
+
+
+def test_requiring_a_shard() -> None:
+    with pytest.raises(ValueError):
+        ShardedCacheService(shards={})
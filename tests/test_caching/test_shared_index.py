@@ -0,0 +1,146 @@
+import threading
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from repository_infrastructure_example.caching.shared_index import (
+    SharedIdentifierIndex,
+)
+from tests.test_caching.fakes import InMemoryMessageBus
+
+
+class _Data:
+    """Stand-in for the database the index loads the IDs from."""
+
+    organisation_ids: set[UUID]
+    user_ids: dict[UUID, set[UUID]]
+    stamp: int
+    load_count: int
+
+    def __init__(self) -> None:
+        self.organisation_ids = set()
+        self.user_ids = {}
+        self.stamp = 0
+        self.load_count = 0
+
+    def add_user(self, organisation_id: UUID) -> UUID:
+        user_id = uuid4()
+        self.organisation_ids.add(organisation_id)
+        self.user_ids.setdefault(organisation_id, set()).add(user_id)
+        self.stamp += 1
+        return user_id
+
+    def load_organisation_ids(self) -> set[UUID]:
+        self.load_count += 1
+        return set(self.organisation_ids)
+
+
+def _create_index(
+    directory: Path,
+    data: _Data,
+    *,
+    message_bus: InMemoryMessageBus | None = None,
+    rebuild_interval: float = 0,
+) -> SharedIdentifierIndex:
+    return SharedIdentifierIndex(
+        directory=directory,
+        load_organisation_ids=data.load_organisation_ids,
+        load_user_ids=lambda: data.user_ids,
+        get_stamp=lambda: data.stamp,
+        message_bus=message_bus,
+        refresh_interval=1,
+        rebuild_interval=rebuild_interval,
+    )
+
+
+def test_answering_from_the_snapshot_of_another_process(tmp_path: Path) -> None:
+    data = _Data()
+    organisation_id = uuid4()
+    user_id = data.add_user(organisation_id)
+    _create_index(tmp_path, data).refresh()
+
+    index = _create_index(tmp_path, data)
+    assert index.contains_organisation(organisation_id), "Organisation was not found."
+    assert index.contains_user(organisation_id=organisation_id, user_id=user_id), (
+        "User was not found."
+    )
+    assert not index.contains_user(organisation_id=organisation_id, user_id=uuid4()), (
+        "Unknown user was found."
+    )
+
+
+def test_answering_nothing_after_a_deletion_until_rebuilt(tmp_path: Path) -> None:
+    data = _Data()
+    organisation_id = uuid4()
+    user_id = data.add_user(organisation_id)
+    refresher = _create_index(tmp_path, data)
+    refresher.refresh()
+
+    data.user_ids[organisation_id].discard(user_id)
+    _create_index(tmp_path, data).invalidate()
+    assert not refresher.contains_organisation(organisation_id), (
+        "Invalidated snapshot answered."
+    )
+
+    assert refresher.refresh(), "Invalidated snapshot was not rebuilt."
+    assert not refresher.contains_user(
+        organisation_id=organisation_id, user_id=user_id
+    ), "Deleted user was found."
+
+
+def test_answering_nothing_after_a_deletion_on_another_host(tmp_path: Path) -> None:
+    data = _Data()
+    organisation_id = uuid4()
+    data.add_user(organisation_id)
+    bus = InMemoryMessageBus()
+    # Hosts share the database and the bus, but not the index directory
+    indexes = [
+        _create_index(tmp_path / host, data, message_bus=bus)
+        for host in ("first", "second")
+    ]
+    for index in indexes:
+        index.refresh()
+        index.start()
+
+    indexes[0].invalidate()
+
+    for index in indexes:
+        assert not index.contains_organisation(organisation_id), (
+            "Invalidated snapshot answered."
+        )
+    count, _ = indexes[1]._read_control()  # pyright: ignore[reportPrivateUsage]
+    assert count == 1, "Invalidation was not counted once on the other host."
+    for index in indexes:
+        index.close()
+
+
+def test_counting_every_concurrent_invalidation(tmp_path: Path) -> None:
+    data = _Data()
+    index = _create_index(tmp_path, data)
+    thread_count, invalidation_count = 8, 200
+
+    def invalidate() -> None:
+        for _ in range(invalidation_count):
+            index.invalidate()
+
+    threads = [threading.Thread(target=invalidate) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    count, _ = index._read_control()  # pyright: ignore[reportPrivateUsage]
+    assert count == thread_count * invalidation_count, "Invalidations were lost."
+
+
+def test_rebuilding_at_most_once_per_rebuild_interval(tmp_path: Path) -> None:
+    data = _Data()
+    organisation_id = uuid4()
+    index = _create_index(tmp_path, data, rebuild_interval=60)
+    index.refresh()
+
+    user_id = data.add_user(organisation_id)
+    assert not index.refresh(), "Snapshot was rebuilt within the rebuild interval."
+    assert data.load_count == 1, "IDs were loaded within the rebuild interval."
+    assert not index.contains_user(organisation_id=organisation_id, user_id=user_id), (
+        "User created after the snapshot was found."
+    )
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from repository_infrastructure_example.caching.single_flight import (
+    CachedValue,
+    SingleFlight,
+)
+from tests.test_caching.fakes import create_memory_cache
+
+_KEY = "ids"
+
+
+class _Source:
+    """Source of truth storing what it loads in a stand-in cache."""
+
+    cached: CachedValue[str] | None
+    load_count: int
+
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.cached = None
+        self.load_count = 0
+        self._lock = threading.Lock()
+
+    def read(self) -> CachedValue[str] | None:
+        return self.cached
+
+    def populate(self) -> str:
+        with self._lock:
+            self.load_count += 1
+        # Slow enough for the other callers to pile up
+        time.sleep(0.05)
+        self.cached = CachedValue(value="loaded", ttl=None)
+        return "loaded"
+
+
+def _create_single_flight(
+    cache_service: MemoryCacheService, *, wait_timeout: float = 1
+) -> SingleFlight:
+    return SingleFlight(
+        cache_service=cache_service,
+        cache_key_manager=CacheKeyManager(prefix="test"),
+        lease_ttl=5,
+        wait_timeout=wait_timeout,
+        stale_window=0,
+        refresh_ahead=0,
+    )
+
+
+def test_populating_a_missing_key_once() -> None:
+    single_flight = _create_single_flight(create_memory_cache())
+    source = _Source()
+    results: list[str] = []
+
+    def run() -> None:
+        results.append(
+            single_flight.run(_KEY, read=source.read, populate=source.populate)
+        )
+
+    threads = [threading.Thread(target=run) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["loaded"] * 10, "Callers did not all get the value."
+    assert source.load_count == 1, "Key was populated more than once."
+
+
+def test_waiting_for_another_process_to_populate() -> None:
+    cache_service = create_memory_cache()
+    single_flight = _create_single_flight(cache_service)
+    source = _Source()
+    # Another process holds the lease and populates the key shortly
+    lease_key = CacheKeyManager(prefix="test").get_lease_key(_KEY)
+    cache_service.acquire_lease(key=lease_key, token="other", ttl=5)
+
+    def populate_elsewhere() -> None:
+        source.cached = CachedValue(value="other", ttl=None)
+
+    threading.Timer(0.1, populate_elsewhere).start()
+
+    value = single_flight.run(_KEY, read=source.read, populate=source.populate)
+
+    assert value == "other", "Value populated by the other process was not read."
+    assert source.load_count == 0, "Key was populated twice."
+
+
+def test_populating_once_the_lease_holder_gives_up() -> None:
+    cache_service = create_memory_cache()
+    single_flight = _create_single_flight(cache_service, wait_timeout=0.1)
+    source = _Source()
+    lease_key = CacheKeyManager(prefix="test").get_lease_key(_KEY)
+    cache_service.acquire_lease(key=lease_key, token="dead", ttl=5)
+
+    value = single_flight.run(_KEY, read=source.read, populate=source.populate)
+
+    assert value == "loaded", "Key was not populated after the wait timeout."
+    assert source.load_count == 1, "Key was not populated by the waiting caller."
@@ -0,0 +1,116 @@
+from repository_infrastructure_example.caching.cache import SetMembership
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.caching.memory import MemoryCacheService
+from repository_infrastructure_example.caching.tiered import TieredCacheService
+from tests.test_caching.fakes import InMemoryMessageBus, create_memory_cache
+
+_BYTES = BytesCodec()
+
+
+class _Processes:
+    """Two processes with local caches in front of one shared cache."""
+
+    shared: MemoryCacheService
+    first_local: MemoryCacheService
+    second_local: MemoryCacheService
+    first: TieredCacheService
+    second: TieredCacheService
+
+    def __init__(self) -> None:
+        bus = InMemoryMessageBus()
+        self.shared = create_memory_cache()
+        self.first_local = create_memory_cache()
+        self.second_local = create_memory_cache()
+        self.first = TieredCacheService(
+            local=self.first_local, shared=self.shared, invalidation_bus=bus
+        )
+        self.second = TieredCacheService(
+            local=self.second_local, shared=self.shared, invalidation_bus=bus
+        )
+
+
+def test_filling_the_local_cache_from_the_shared_cache() -> None:
+    processes = _Processes()
+    processes.shared.store_values(values={"key": b"value"}, codec=_BYTES)
+
+    assert processes.first.get_value("key", codec=_BYTES) == b"value", (
+        "Value was not read from the shared cache."
+    )
+    assert processes.first_local.get_value("key", codec=_BYTES) == b"value", (
+        "Local cache was not filled."
+    )
+
+
+def test_dropping_deleted_keys_from_every_local_cache() -> None:
+    processes = _Processes()
+    processes.first.store_values(values={"key": b"value"}, codec=_BYTES)
+    processes.second.get_value("key", codec=_BYTES)
+
+    processes.first.delete_key("key")
+
+    assert processes.second.get_value("key", codec=_BYTES) is None, (
+        "Other process served a deleted key from its local cache."
+    )
+
+
+def test_dropping_updated_sets_from_every_local_cache() -> None:
+    processes = _Processes()
+    processes.first.store_set(key="ids", value={"a"})
+    processes.second.get_set("ids")
+
+    processes.first.add_to_set(key="ids", member="b")
+
+    assert processes.second.get_set("ids") == {"a", "b"}, (
+        "Other process served an outdated set from its local cache."
+    )
+
+
+def test_dropping_keys_matching_a_pattern_from_every_local_cache() -> None:
+    processes = _Processes()
+    processes.first.store_values(
+        values={"organisation__1__user": b"a", "organisation__2__user": b"b"},
+        codec=_BYTES,
+    )
+    processes.second.get_values(
+        ["organisation__1__user", "organisation__2__user"], codec=_BYTES
+    )
+
+    processes.first.delete_matching("organisation__1__*")
+
+    assert processes.second.get_values(
+        ["organisation__1__user", "organisation__2__user"], codec=_BYTES
+    ) == {"organisation__2__user": b"b"}, (
+        "Other process served keys matching a deleted pattern."
+    )
+
+
+def test_answering_repeated_membership_checks_locally() -> None:
+    processes = _Processes()
+    processes.shared.store_set(key="a__user_ids", value={"x"})
+    processes.first.is_member(key="a__user_ids", member="x")
+    processes.first.is_member(key="a__user_ids", member="y")
+
+    # Gone from the shared cache, so only the local results can answer
+    processes.shared.delete_key("a__user_ids")
+
+    assert processes.first.is_member(key="a__user_ids", member="x") == (
+        SetMembership.MEMBER
+    ), "Repeated check of a member reached the shared cache."
+    assert processes.first.is_member(key="a__user_ids", member="y") == (
+        SetMembership.NOT_MEMBER
+    ), "Repeated check of a non-member reached the shared cache."
+    assert processes.first_local.get_set("a__user_ids") is None, (
+        "Whole set was transferred for a membership check."
+    )
+
+
+def test_dropping_membership_results_of_updated_sets() -> None:
+    processes = _Processes()
+    processes.first.store_set(key="a__user_ids", value={"x"})
+    processes.second.is_member(key="a__user_ids", member="y")
+
+    processes.first.add_to_set(key="a__user_ids", member="y")
+
+    assert processes.second.is_member(key="a__user_ids", member="y") == (
+        SetMembership.MEMBER
+    ), "Other process served an outdated membership result."
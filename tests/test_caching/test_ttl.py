@@ -0,0 +1,40 @@
+import pytest
+
+from repository_infrastructure_example.caching.key_manager import CacheKeyFamily
+from repository_infrastructure_example.caching.ttl import TtlPolicy
+
+
+def test_choosing_the_ttl_by_key_family() -> None:
+    ttl_policy = TtlPolicy(
+        default_ttl=60, family_ttls={CacheKeyFamily.USER_IDS: 600}, extension=5
+    )
+
+    assert ttl_policy.get_ttl("a__user_ids") == 605, "Family TTL was not used."
+    assert ttl_policy.get_ttl("a__user") == 65, "Default TTL was not used."
+    assert TtlPolicy().get_ttl("a__user") is None, "Key without a TTL expires."
+
+
+def test_keeping_jittered_ttls_within_bounds() -> None:
+    ttl_policy = TtlPolicy(default_ttl=100, jitter=0.2, extension=1)
+
+    ttls = [ttl_policy.get_ttl("a__user") for _ in range(200)]
+
+    assert all(ttl is not None and 81 <= ttl <= 101 for ttl in ttls), (
+        "Jittered TTL was out of bounds."
+    )
+    assert len(set(ttls)) > 1, "TTLs were not spread."
+
+
+def test_sliding_only_the_configured_families() -> None:
+    ttl_policy = TtlPolicy(sliding_families={CacheKeyFamily.USER_IDS})
+
+    assert ttl_policy.is_sliding("a__user_ids"), "Sliding family did not slide."
+    assert not ttl_policy.is_sliding("a__user"), "Fixed family slid."
+
+
+def test_rejecting_an_invalid_jitter() -> None:
+    with pytest.raises(ValueError):
+        TtlPolicy(jitter=-0.1)
+    # A jitter of 1 could shorten a TTL to nothing
+    with pytest.raises(ValueError):
+        TtlPolicy(jitter=1)
@@ -0,0 +1,101 @@
+from uuid import UUID
+
+from fastapi.testclient import TestClient
+
+
+def test_getting_startup_metrics(client: TestClient) -> None:
+    response = client.get("/v1/metrics/startup")
+    response.raise_for_status()
+    metrics = response.json()
+
+    phase_names = {phase["name"] for phase in metrics["phases"]}
+    assert {"settings", "clients", "schema_check"} <= phase_names, (
+        "Start-up phases were not recorded."
+    )
+    assert metrics["total"] > 0, "Start-up duration was not recorded."
+
+
+def test_getting_bloom_filter_metrics(client: TestClient) -> None:
+    response = client.get("/v1/metrics/bloom")
+    response.raise_for_status()
+    metrics = response.json()
+
+    if not metrics["is_enabled"]:
+        assert metrics["statistics"] is None, "Disabled filter reported statistics."
+        return
+
+    statistics = metrics["statistics"]
+    assert 0 <= statistics["false_positive_rate"] < 1, "Invalid false positive rate."
+    if statistics["is_ready"]:
+        assert statistics["size_in_bytes"] > 0, "Memory footprint was not reported."
+
+
+def test_getting_shared_index_metrics(client: TestClient) -> None:
+    response = client.get("/v1/metrics/shared-index")
+    response.raise_for_status()
+    metrics = response.json()
+
+    if not metrics["is_enabled"]:
+        assert metrics["statistics"] is None, "Disabled index reported statistics."
+        return
+
+    statistics = metrics["statistics"]
+    if not statistics["is_ready"]:
+        assert statistics["size_in_bytes"] == 0, "Missing snapshot reported a size."
+
+
+def test_getting_organisation_directory_metrics(client: TestClient) -> None:
+    response = client.get("/v1/metrics/organisation-directory")
+    response.raise_for_status()
+    metrics = response.json()
+
+    if not metrics["is_enabled"]:
+        assert metrics["statistics"] is None, "Disabled directory reported statistics."
+        return
+
+    statistics = metrics["statistics"]
+    if statistics["is_ready"]:
+        assert statistics["staleness"] >= 0, "Invalid staleness."
+
+
+def test_getting_client_side_cache_metrics(client: TestClient) -> None:
+    response = client.get("/v1/metrics/redis-client-cache")
+    response.raise_for_status()
+    metrics = response.json()
+
+    if not metrics["is_enabled"]:
+        assert metrics["statistics"] is None, "Disabled cache reported statistics."
+        return
+
+    statistics = metrics["statistics"]
+    if statistics["hit_ratio"] is not None:
+        assert 0 <= statistics["hit_ratio"] <= 1, "Invalid hit ratio."
+    assert statistics["entries"] <= statistics["max_entries"], "Cache is unbounded."
+
+
+def test_getting_cache_metrics(
+    client: TestClient, transient_organisation_id: UUID
+) -> None:
+    # Look the organisation up, so that the cache is used
+    response = client.get(f"/v1/organisations/{transient_organisation_id}/users")
+    response.raise_for_status()
+
+    response = client.get("/v1/metrics/cache")
+    response.raise_for_status()
+    tiers = response.json()["tiers"]
+
+    families = {
+        operation["family"] for tier in tiers for operation in tier["operations"]
+    }
+    assert "organisation_ids" in families, "Cache calls were not recorded."
+
+
+def test_getting_redis_pool_metrics(client: TestClient) -> None:
+    response = client.get("/v1/metrics/redis-pool")
+    response.raise_for_status()
+    statistics = response.json()
+
+    assert statistics["in_use"] <= statistics["max_connections"], (
+        "More connections in use than allowed."
+    )
+    assert statistics["waiting"] >= 0, "Invalid number of waiting callers."
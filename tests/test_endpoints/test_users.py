@@ -1,4 +1,4 @@
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from fastapi.testclient import TestClient
 
@@ -120,3 +120,8 @@ def test_deleting_a_user(
 
     # Verify deletion
     _ensure_no_users_exist(client, transient_organisation_id)
+
+
+def test_getting_users_of_an_unknown_organisation(client: TestClient) -> None:
+    response = client.get(f"/v1/organisations/{uuid4()}/users")
+    assert response.status_code == 404, "Unknown organisation was not rejected."
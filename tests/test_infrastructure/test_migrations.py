@@ -0,0 +1,151 @@
+import io
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext, MigrationInfo
+from sqlalchemy import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from repository_infrastructure_example.infrastructure.migrations import (
+    MigrationRunner,
+    MigrationStepTiming,
+    OnVersionApply,
+    create_index_concurrently,
+)
+
+
+class _DatabaseError(Exception):
+    """Stand-in for the driver error wrapped by SQLAlchemy."""
+
+    pgcode: str
+
+    def __init__(self, pgcode: str) -> None:
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+class _Connection:
+    statements: list[str]
+
+    def __init__(self) -> None:
+        self.statements = []
+
+    def exec_driver_sql(self, statement: str) -> None:
+        self.statements.append(statement)
+
+    def commit(self) -> None:
+        pass
+
+
+class _Engine:
+    connections: list[_Connection]
+
+    def __init__(self) -> None:
+        self.connections = []
+
+    @contextmanager
+    def connect(self) -> Generator[_Connection]:
+        connection = _Connection()
+        self.connections.append(connection)
+        yield connection
+
+
+def _fail(pgcode: str) -> OperationalError:
+    return OperationalError("ALTER TABLE users", {}, _DatabaseError(pgcode))
+
+
+def _apply(on_version_apply: OnVersionApply, revision: str) -> None:
+    step = SimpleNamespace(
+        up_revision_id=revision, up_revision=SimpleNamespace(doc=f"{revision} doc")
+    )
+    on_version_apply(cast(MigrationContext, None), cast(MigrationInfo, step), (), {})
+
+
+def _run(
+    runner: MigrationRunner,
+    engine: _Engine,
+    migrate: Callable[[Connection, OnVersionApply], None],
+) -> list[MigrationStepTiming]:
+    return runner.run(cast(Engine, engine), migrate)
+
+
+def _create_runner(max_attempts: int = 3) -> MigrationRunner:
+    return MigrationRunner(lock_timeout=1.5, max_attempts=max_attempts, retry_backoff=0)
+
+
+def test_setting_the_lock_timeout_on_every_connection() -> None:
+    engine = _Engine()
+
+    def migrate(connection: Connection, on_version_apply: OnVersionApply) -> None:
+        pass
+
+    _run(_create_runner(), engine, migrate)
+
+    assert engine.connections[0].statements == ["SET lock_timeout = 1500"], (
+        "Lock timeout was not set."
+    )
+
+
+def test_retrying_the_revision_that_timed_out() -> None:
+    engine = _Engine()
+    applied: list[str] = []
+
+    def migrate(connection: Connection, on_version_apply: OnVersionApply) -> None:
+        # Revisions applied before the timeout stay committed
+        if "first" not in applied:
+            applied.append("first")
+            _apply(on_version_apply, "first")
+        if len(engine.connections) == 1:
+            raise _fail("55P03")
+        applied.append("second")
+        _apply(on_version_apply, "second")
+
+    timings = _run(_create_runner(), engine, migrate)
+
+    assert applied == ["first", "second"], "Revisions were not resumed."
+    assert [(timing.revision, timing.attempts) for timing in timings] == [
+        ("first", 1),
+        ("second", 2),
+    ], "Attempts were not recorded per revision."
+    assert timings[1].description == "second doc", "Description was not recorded."
+
+
+def test_not_retrying_other_errors() -> None:
+    engine = _Engine()
+
+    def migrate(connection: Connection, on_version_apply: OnVersionApply) -> None:
+        raise _fail("42P01")
+
+    with pytest.raises(OperationalError):
+        _run(_create_runner(), engine, migrate)
+    assert len(engine.connections) == 1, "A failure other than a timeout was retried."
+
+
+def test_giving_up_after_the_last_attempt() -> None:
+    engine = _Engine()
+
+    def migrate(connection: Connection, on_version_apply: OnVersionApply) -> None:
+        raise _fail("55P03")
+
+    with pytest.raises(OperationalError):
+        _run(_create_runner(max_attempts=2), engine, migrate)
+    assert len(engine.connections) == 2, "Attempts were not limited."
+
+
+def test_creating_an_index_without_dropping_it_first() -> None:
+    output = io.StringIO()
+    migration_context = MigrationContext.configure(
+        dialect_name="postgresql", opts={"as_sql": True, "output_buffer": output}
+    )
+    with Operations.context(migration_context):
+        create_index_concurrently("ix_users_email", "users", ["email"])
+
+    script = output.getvalue()
+    assert "CREATE INDEX CONCURRENTLY ix_users_email ON users (email)" in script, (
+        "Index was not created concurrently."
+    )
+    assert "DROP INDEX" not in script, "Index was dropped before being created."
@@ -0,0 +1,82 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from repository_infrastructure_example.infrastructure.postgres import (
+    MigrationLockTimeoutError,
+    PostgresClient,
+)
+from repository_infrastructure_example.utilities.timing import PhaseTimer
+
+
+class _DatabaseError(Exception):
+    """Stand-in for the driver error wrapped by SQLAlchemy."""
+
+    pgcode: str
+
+    def __init__(self, pgcode: str) -> None:
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+class _Result:
+    _value: Any
+
+    def __init__(self, value: Any) -> None:
+        self._value = value
+
+    def scalar_one(self) -> Any:
+        return self._value
+
+
+class _LockHeldConnection:
+    """Connection to a database in which another instance holds the lock."""
+
+    statements: list[str]
+
+    def __init__(self) -> None:
+        self.statements = []
+
+    def exec_driver_sql(self, statement: str) -> None:
+        self.statements.append(statement)
+
+    def execute(self, statement: Any, parameters: Any = None) -> _Result:
+        self.statements.append(str(statement))
+        if "pg_try_advisory_lock" in str(statement):
+            return _Result(False)
+        # Postgres gives up waiting once the lock timeout has passed
+        raise OperationalError(str(statement), {}, _DatabaseError("55P03"))
+
+    def commit(self) -> None:
+        pass
+
+
+class _Engine:
+    connection: _LockHeldConnection
+
+    def __init__(self) -> None:
+        self.connection = _LockHeldConnection()
+
+    @contextmanager
+    def connect(self) -> Generator[_LockHeldConnection]:
+        yield self.connection
+
+
+def test_giving_up_waiting_for_the_migration_lock() -> None:
+    # Created without connecting, the engine is replaced by a stand-in
+    client = PostgresClient.__new__(PostgresClient, "test")
+    engine = _Engine()
+    client._engine = engine  # pyright: ignore[reportAttributeAccessIssue, reportPrivateUsage]
+
+    with pytest.raises(MigrationLockTimeoutError):
+        with client._migration_lock(  # pyright: ignore[reportPrivateUsage]
+            disable_logging=True, timer=PhaseTimer(), wait_timeout=1.5
+        ):
+            pass
+
+    assert "SET LOCAL lock_timeout = 1500" in engine.connection.statements, (
+        "Lock timeout was not set."
+    )
@@ -0,0 +1,224 @@
+from collections import Counter
+from typing import NamedTuple, override
+from uuid import UUID
+
+from repository_infrastructure_example.caching.bloom import IdentifierFilter
+from repository_infrastructure_example.caching.cache import CacheService
+from repository_infrastructure_example.caching.codecs import ModelCodec
+from repository_infrastructure_example.caching.key_manager import CacheKeyManager
+from repository_infrastructure_example.caching.negative import NegativeCache
+from repository_infrastructure_example.caching.reclaimer import KeyReclaimer
+from repository_infrastructure_example.caching.single_flight import SingleFlight
+from repository_infrastructure_example.domain.organisation import Organisation
+from repository_infrastructure_example.domain.user import User
+from repository_infrastructure_example.repositories.organisation import (
+    OrganisationRepository,
+)
+from repository_infrastructure_example.repositories.user import UserRepository
+from repository_infrastructure_example.services.organisation import OrganisationService
+from repository_infrastructure_example.services.user import UserService
+from tests.test_caching.fakes import create_memory_cache
+
+
+class InMemoryOrganisationRepository(OrganisationRepository):
+    """Repository stand-in that counts the calls made to it."""
+
+    organisations: dict[UUID, Organisation]
+    call_counts: Counter[str]
+
+    def __init__(self) -> None:
+        self.organisations = {}
+        self.call_counts = Counter()
+
+    @override
+    def organisation_exists(self, organisation_id: UUID) -> bool:
+        self.call_counts["organisation_exists"] += 1
+        return organisation_id in self.organisations
+
+    @override
+    def get_organisations(self) -> list[Organisation]:
+        self.call_counts["get_organisations"] += 1
+        return list(self.organisations.values())
+
+    @override
+    def get_organisation_ids(self) -> set[UUID]:
+        self.call_counts["get_organisation_ids"] += 1
+        return set(self.organisations)
+
+    @override
+    def get_most_active_organisation_ids(self, limit: int) -> list[UUID]:
+        self.call_counts["get_most_active_organisation_ids"] += 1
+        return list(self.organisations)[:limit]
+
+    @override
+    def get_organisation(self, organisation_id: UUID) -> Organisation | None:
+        self.call_counts["get_organisation"] += 1
+        return self.organisations.get(organisation_id)
+
+    @override
+    def get_organisation_by_slug(self, slug: str) -> Organisation | None:
+        self.call_counts["get_organisation_by_slug"] += 1
+        return next(
+            (
+                organisation
+                for organisation in self.organisations.values()
+                if organisation.slug == slug
+            ),
+            None,
+        )
+
+    @override
+    def get_organisation_by_name(self, name: str) -> Organisation | None:
+        self.call_counts["get_organisation_by_name"] += 1
+        return next(
+            (
+                organisation
+                for organisation in self.organisations.values()
+                if organisation.name == name
+            ),
+            None,
+        )
+
+    @override
+    def add_or_update_organisation(self, organisation: Organisation) -> None:
+        self.call_counts["add_or_update_organisation"] += 1
+        self.organisations[organisation.id] = organisation
+
+    @override
+    def delete_organisation(self, organisation_id: UUID) -> None:
+        self.call_counts["delete_organisation"] += 1
+        self.organisations.pop(organisation_id, None)
+
+
+class InMemoryUserRepository(UserRepository):
+    """Repository stand-in that counts the calls made to it."""
+
+    users: dict[UUID, User]
+    call_counts: Counter[str]
+
+    def __init__(self) -> None:
+        self.users = {}
+        self.call_counts = Counter()
+
+    def _get_organisation_users(self, organisation_id: UUID) -> list[User]:
+        return [
+            user
+            for user in self.users.values()
+            if user.organisation_id == organisation_id
+        ]
+
+    @override
+    def get_users(self, organisation_id: UUID) -> list[User]:
+        self.call_counts["get_users"] += 1
+        return self._get_organisation_users(organisation_id)
+
+    @override
+    def get_user(self, *, organisation_id: UUID, user_id: UUID) -> User | None:
+        self.call_counts["get_user"] += 1
+        user = self.users.get(user_id)
+        if user is None or user.organisation_id != organisation_id:
+            return None
+        return user
+
+    @override
+    def get_user_ids(self, organisation_id: UUID) -> set[UUID]:
+        self.call_counts["get_user_ids"] += 1
+        return {user.id for user in self._get_organisation_users(organisation_id)}
+
+    @override
+    def get_all_user_ids(self) -> set[UUID]:
+        self.call_counts["get_all_user_ids"] += 1
+        return set(self.users)
+
+    @override
+    def get_user_ids_by_organisation(self) -> dict[UUID, set[UUID]]:
+        self.call_counts["get_user_ids_by_organisation"] += 1
+        user_ids: dict[UUID, set[UUID]] = {}
+        for user in self.users.values():
+            user_ids.setdefault(user.organisation_id, set()).add(user.id)
+        return user_ids
+
+    @override
+    def user_email_is_available(self, organisation_id: UUID, email: str) -> bool:
+        self.call_counts["user_email_is_available"] += 1
+        return all(
+            user.email != email
+            for user in self._get_organisation_users(organisation_id)
+        )
+
+    @override
+    def add_or_update_user(self, user: User) -> None:
+        self.call_counts["add_or_update_user"] += 1
+        self.users[user.id] = user
+
+    @override
+    def delete_user(self, organisation_id: UUID, user_id: UUID) -> None:
+        self.call_counts["delete_user"] += 1
+        self.users.pop(user_id, None)
+
+
+class ServiceFixture(NamedTuple):
+    organisation_service: OrganisationService
+    user_service: UserService
+    organisation_repository: InMemoryOrganisationRepository
+    user_repository: InMemoryUserRepository
+    cache_service: CacheService
+    cache_key_manager: CacheKeyManager
+
+
+def create_services(
+    cache_service: CacheService | None = None,
+    *,
+    negative_ttl: float = 60,
+    identifier_filter: IdentifierFilter | None = None,
+) -> ServiceFixture:
+    """
+    Wire the services like the container does, on in-memory stand-ins.
+
+    :param cache_service: The cache to use, a memory cache if None.
+    :param negative_ttl: The TTL of not-found lookups. Defaults to 60 seconds.
+    :param identifier_filter: The filter of unknown IDs, none if None.
+    :return: The services and their dependencies.
+    """
+    cache_service = cache_service or create_memory_cache()
+    cache_key_manager = CacheKeyManager(prefix="test")
+    organisation_repository = InMemoryOrganisationRepository()
+    user_repository = InMemoryUserRepository()
+    single_flight = SingleFlight(
+        cache_service=cache_service,
+        cache_key_manager=cache_key_manager,
+        lease_ttl=5,
+        wait_timeout=1,
+        stale_window=0,
+        refresh_ahead=0,
+    )
+    organisation_service = OrganisationService(
+        repository=organisation_repository,
+        cache_service=cache_service,
+        cache_key_manager=cache_key_manager,
+        organisation_codec=ModelCodec(Organisation),
+        single_flight=single_flight,
+        key_reclaimer=KeyReclaimer(cache_service=cache_service),
+        identifier_filter=identifier_filter,
+        shared_index=None,
+        directory=None,
+    )
+    user_service = UserService(
+        organisation_service=organisation_service,
+        user_repository=user_repository,
+        cache_service=cache_service,
+        cache_key_manager=cache_key_manager,
+        user_codec=ModelCodec(User),
+        single_flight=single_flight,
+        negative_cache=NegativeCache(cache_service=cache_service, ttl=negative_ttl),
+        identifier_filter=identifier_filter,
+        shared_index=None,
+    )
+    return ServiceFixture(
+        organisation_service=organisation_service,
+        user_service=user_service,
+        organisation_repository=organisation_repository,
+        user_repository=user_repository,
+        cache_service=cache_service,
+        cache_key_manager=cache_key_manager,
+    )
@@ -0,0 +1,102 @@
+from uuid import UUID
+
+import pytest
+
+from repository_infrastructure_example.services.organisation import (
+    OrganisationNotFoundError,
+)
+from repository_infrastructure_example.services.user import UserNotFoundError
+from tests.test_services.fakes import ServiceFixture, create_services
+
+
+def _add_user(services: ServiceFixture) -> tuple[UUID, UUID]:
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    user_id = services.user_service.add_user(
+        organisation_id=organisation_id,
+        first_name="Ada",
+        last_name="Lovelace",
+        email="ada@example.com",
+        is_active=True,
+    )
+    return organisation_id, user_id
+
+
+def test_reading_an_organisation_through_the_cache() -> None:
+    services = create_services()
+    organisation_id, _ = _add_user(services)
+
+    first = services.organisation_service.get_organisation(organisation_id)
+    second = services.organisation_service.get_organisation(organisation_id)
+
+    assert first == second, "Cached organisation differs from the stored one."
+    assert services.organisation_repository.call_counts["get_organisation"] == 1, (
+        "Organisation was not served from the cache."
+    )
+
+
+def test_reading_an_updated_organisation() -> None:
+    services = create_services()
+    organisation_id, _ = _add_user(services)
+    services.organisation_service.get_organisation(organisation_id)
+
+    services.organisation_service.update_organisation(
+        organisation_id=organisation_id, email="contact@example.com"
+    )
+
+    organisation = services.organisation_service.get_organisation(organisation_id)
+    assert organisation.email == "contact@example.com", (
+        "Outdated organisation was served."
+    )
+
+
+def test_reading_a_user_through_the_cache() -> None:
+    services = create_services()
+    organisation_id, user_id = _add_user(services)
+
+    first = services.user_service.get_user(
+        organisation_id=organisation_id, user_id=user_id
+    )
+    second = services.user_service.get_user(
+        organisation_id=organisation_id, user_id=user_id
+    )
+
+    assert first == second, "Cached user differs from the stored one."
+    assert services.user_repository.call_counts["get_user"] == 1, (
+        "User was not served from the cache."
+    )
+
+
+def test_reading_an_updated_user() -> None:
+    services = create_services()
+    organisation_id, user_id = _add_user(services)
+    services.user_service.get_user(organisation_id=organisation_id, user_id=user_id)
+
+    services.user_service.update_user(
+        organisation_id=organisation_id,
+        user_id=user_id,
+        first_name="Augusta",
+        last_name=None,
+        email=None,
+        is_active=None,
+    )
+
+    user = services.user_service.get_user(
+        organisation_id=organisation_id, user_id=user_id
+    )
+    assert user.first_name == "Augusta", "Outdated user was served."
+
+
+def test_not_serving_deleted_entities() -> None:
+    services = create_services()
+    organisation_id, user_id = _add_user(services)
+    services.user_service.get_user(organisation_id=organisation_id, user_id=user_id)
+
+    services.user_service.delete_user(organisation_id=organisation_id, user_id=user_id)
+    with pytest.raises(UserNotFoundError):
+        services.user_service.get_user(organisation_id=organisation_id, user_id=user_id)
+
+    services.organisation_service.delete_organisation(organisation_id)
+    with pytest.raises(OrganisationNotFoundError):
+        services.organisation_service.get_organisation(organisation_id)
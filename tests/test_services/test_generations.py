@@ -0,0 +1,93 @@
+import time
+from uuid import UUID, uuid4
+
+import pytest
+
+from repository_infrastructure_example.caching.codecs import BytesCodec
+from repository_infrastructure_example.services.organisation import (
+    OrganisationNotFoundError,
+)
+from tests.test_services.fakes import ServiceFixture, create_services
+
+
+def _add_organisation(services: ServiceFixture) -> UUID:
+    return services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+
+
+def _get_generation_key(services: ServiceFixture, organisation_id: UUID) -> str:
+    return services.cache_key_manager.get_organisation_generation_key(organisation_id)
+
+
+def _get_generation(services: ServiceFixture, organisation_id: UUID) -> int | None:
+    return services.cache_service.get_generation(
+        _get_generation_key(services, organisation_id)
+    )
+
+
+def test_not_writing_to_the_cache_for_unknown_organisations() -> None:
+    services = create_services()
+
+    for _ in range(2):
+        with pytest.raises(OrganisationNotFoundError):
+            services.organisation_service.get_organisation(uuid4())
+
+    assert services.cache_service.delete_matching("*") == 0, (
+        "Unknown organisations left keys in the cache."
+    )
+
+
+def test_keeping_the_generation_on_updates() -> None:
+    services = create_services()
+    organisation_id = _add_organisation(services)
+    services.organisation_service.get_organisation(organisation_id)
+    generation = _get_generation(services, organisation_id)
+
+    services.organisation_service.update_organisation(
+        organisation_id=organisation_id, email="contact@example.com"
+    )
+
+    assert _get_generation(services, organisation_id) == generation, (
+        "Update restarted the generation."
+    )
+    assert services.organisation_service.get_organisation(organisation_id).email == (
+        "contact@example.com"
+    ), "Outdated organisation was served."
+
+
+def test_invalidating_all_keys_when_the_generation_is_lost() -> None:
+    services = create_services()
+    organisation_id = _add_organisation(services)
+    services.organisation_service.get_organisation(organisation_id)
+    organisation = services.organisation_repository.organisations[organisation_id]
+    # Changed behind the back of the cache, then the generation is evicted
+    services.organisation_repository.organisations[organisation_id] = (
+        organisation.model_copy(update={"name": "Acme Two"})
+    )
+    services.cache_service.delete_key(_get_generation_key(services, organisation_id))
+
+    assert services.organisation_service.get_organisation(organisation_id).name == (
+        "Acme Two"
+    ), "Key of a lost generation was read."
+
+
+def test_reclaiming_the_keys_of_deleted_organisations() -> None:
+    services = create_services()
+    organisation_id = _add_organisation(services)
+    services.organisation_service.get_organisation(organisation_id)
+    generation = _get_generation(services, organisation_id)
+    assert generation is not None, "Generation was not started on read."
+    organisation_key = services.cache_key_manager.get_organisation_key(
+        organisation_id, generation=generation
+    )
+
+    services.organisation_service.delete_organisation(organisation_id)
+
+    assert _get_generation(services, organisation_id) is None, (
+        "Generation of a deleted organisation was kept."
+    )
+    deadline = time.monotonic() + 1
+    while services.cache_service.get_value(organisation_key, codec=BytesCodec()):
+        assert time.monotonic() < deadline, "Orphaned key was not reclaimed."
+        time.sleep(0.01)
@@ -0,0 +1,76 @@
+from uuid import uuid4
+
+import pytest
+
+from repository_infrastructure_example.caching.bloom import IdentifierFilter
+from repository_infrastructure_example.domain.organisation import Organisation
+from repository_infrastructure_example.domain.user import User
+from repository_infrastructure_example.services.organisation import (
+    OrganisationNotFoundError,
+)
+from repository_infrastructure_example.services.user import UserNotFoundError
+from tests.test_services.fakes import ServiceFixture, create_services
+
+
+def _create_services_with_built_filter() -> ServiceFixture:
+    identifier_filter = IdentifierFilter(
+        load_identifiers=list,
+        message_bus=None,
+        capacity=100,
+        error_rate=0.001,
+        rebuild_interval=60,
+    )
+    identifier_filter.rebuild()
+    return create_services(identifier_filter=identifier_filter)
+
+
+def test_finding_an_organisation_created_by_another_process() -> None:
+    services = _create_services_with_built_filter()
+    # Stored without the filter of this process learning about it
+    organisation = Organisation.create_new(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    services.organisation_repository.organisations[organisation.id] = organisation
+
+    assert services.organisation_service.get_organisation(organisation.id) == (
+        organisation
+    ), "Organisation unknown to the filter was rejected."
+
+
+def test_finding_a_user_created_by_another_process() -> None:
+    services = _create_services_with_built_filter()
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    user = User.create_new(
+        organisation_id=organisation_id,
+        first_name="Ada",
+        last_name="Lovelace",
+        email="ada@example.com",
+        is_active=True,
+    )
+    services.user_repository.users[user.id] = user
+
+    assert (
+        services.user_service.get_user(organisation_id=organisation_id, user_id=user.id)
+        == user
+    ), "User unknown to the filter was rejected."
+
+
+def test_rejecting_unknown_ids_without_querying_them() -> None:
+    services = _create_services_with_built_filter()
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+
+    with pytest.raises(OrganisationNotFoundError):
+        services.organisation_service.get_organisation(uuid4())
+    with pytest.raises(UserNotFoundError):
+        services.user_service.get_user(organisation_id=organisation_id, user_id=uuid4())
+
+    assert services.organisation_repository.call_counts["get_organisation"] == 0, (
+        "Unknown organisation was queried."
+    )
+    assert services.user_repository.call_counts["get_user"] == 0, (
+        "Unknown user was queried."
+    )
@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+import pytest
+
+from repository_infrastructure_example.caching.cache import SetMembership
+from repository_infrastructure_example.services.user import UserNotFoundError
+from tests.test_caching.fakes import create_memory_cache
+from tests.test_services.fakes import create_services
+
+
+def test_checking_membership_without_fetching_the_set() -> None:
+    cache_service = create_memory_cache()
+    cache_service.store_set(key="ids", value={"a", "b"})
+
+    assert cache_service.is_member(key="ids", member="a") == SetMembership.MEMBER, (
+        "Member was not found."
+    )
+    assert cache_service.is_member(key="ids", member="c") == (
+        SetMembership.NOT_MEMBER
+    ), "Non-member was found."
+    assert cache_service.is_member(key="other", member="a") == (
+        SetMembership.NOT_CACHED
+    ), "Missing set was reported as cached."
+
+
+def test_answering_repeated_checks_from_the_cached_ids() -> None:
+    services = create_services()
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    user_id = services.user_service.add_user(
+        organisation_id=organisation_id,
+        first_name="Ada",
+        last_name="Lovelace",
+        email="ada@example.com",
+        is_active=True,
+    )
+    # The user IDs are only cached once they have been loaded
+    services.user_service.warm_up_user_ids(organisation_id)
+
+    for _ in range(3):
+        services.organisation_service.ensure_organisation_exists(organisation_id)
+        services.user_service.ensure_user_exists(
+            organisation_id=organisation_id, user_id=user_id
+        )
+
+    # Loaded once, by the check of the organisation when adding the user
+    assert services.organisation_repository.call_counts["get_organisation_ids"] == 1, (
+        "Organisation IDs were reloaded although they were cached."
+    )
+    assert services.user_repository.call_counts["get_user_ids"] == 1, (
+        "User IDs were reloaded although they were cached."
+    )
+
+
+def test_rejecting_ids_missing_from_the_cached_ids() -> None:
+    services = create_services()
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    services.user_service.warm_up_user_ids(organisation_id)
+
+    with pytest.raises(UserNotFoundError):
+        services.user_service.ensure_user_exists(
+            organisation_id=organisation_id, user_id=uuid4()
+        )
+    assert services.user_repository.call_counts["get_user_ids"] == 1, (
+        "User IDs were reloaded to reject an unknown ID."
+    )
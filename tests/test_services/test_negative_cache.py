@@ -0,0 +1,78 @@
+import time
+from uuid import uuid4
+
+import pytest
+
+from repository_infrastructure_example.caching.negative import NegativeCache
+from repository_infrastructure_example.services.organisation import (
+    OrganisationAlreadyExistsError,
+)
+from repository_infrastructure_example.services.user import UserNotFoundError
+from tests.test_caching.fakes import create_memory_cache
+from tests.test_services.fakes import create_services
+
+
+def test_remembering_lookups_that_found_nothing() -> None:
+    negative_cache = NegativeCache(cache_service=create_memory_cache(), ttl=0.05)
+    load_count = 0
+
+    def load() -> str | None:
+        nonlocal load_count
+        load_count += 1
+        return None
+
+    assert negative_cache.lookup("absent", load) is None, "Absent value was found."
+    assert negative_cache.lookup("absent", load) is None, "Absent value was found."
+    assert load_count == 1, "Lookup was repeated within the TTL."
+
+    time.sleep(0.06)
+    negative_cache.lookup("absent", load)
+    assert load_count == 2, "Lookup was not repeated after the TTL."
+
+
+def test_not_remembering_lookups_that_found_something() -> None:
+    negative_cache = NegativeCache(cache_service=create_memory_cache(), ttl=60)
+    negative_cache.lookup("present", lambda: "value")
+
+    assert negative_cache.lookup("present", lambda: "other") == "other", (
+        "Found value was remembered."
+    )
+
+
+def test_answering_repeated_lookups_of_unknown_users_from_the_cache() -> None:
+    services = create_services()
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    user_id = uuid4()
+
+    for _ in range(3):
+        with pytest.raises(UserNotFoundError):
+            services.user_service.get_user(
+                organisation_id=organisation_id, user_id=user_id
+            )
+
+    assert services.user_repository.call_counts["get_user"] == 1, (
+        "Unknown user was looked up repeatedly."
+    )
+
+
+def test_checking_uniqueness_against_the_repository() -> None:
+    services = create_services()
+    services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+
+    # Deleted without the cache knowing, e.g. by another process
+    services.organisation_repository.organisations.clear()
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    with pytest.raises(OrganisationAlreadyExistsError):
+        services.organisation_service.add_organisation(
+            name="Acme", email="acme@example.com", is_active=True
+        )
+
+    assert organisation_id in services.organisation_repository.organisations, (
+        "Organisation was not added."
+    )
@@ -0,0 +1,65 @@
+import pytest
+
+from repository_infrastructure_example.services.organisation import (
+    OrganisationNotFoundError,
+)
+from repository_infrastructure_example.services.user import UserNotFoundError
+from tests.test_caching.fakes import create_memory_cache
+from tests.test_services.fakes import create_services
+
+
+def test_not_caching_a_partial_set() -> None:
+    cache_service = create_memory_cache()
+
+    cache_service.add_to_set(key="ids", member="a")
+
+    assert cache_service.get_set("ids") is None, (
+        "Adding to a missing set cached a partial set."
+    )
+
+
+def test_updating_the_cached_user_ids_in_place() -> None:
+    services = create_services()
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    services.user_service.warm_up_user_ids(organisation_id)
+
+    user_id = services.user_service.add_user(
+        organisation_id=organisation_id,
+        first_name="Ada",
+        last_name="Lovelace",
+        email="ada@example.com",
+        is_active=True,
+    )
+    services.user_service.ensure_user_exists(
+        organisation_id=organisation_id, user_id=user_id
+    )
+
+    services.user_service.delete_user(organisation_id=organisation_id, user_id=user_id)
+    with pytest.raises(UserNotFoundError):
+        services.user_service.ensure_user_exists(
+            organisation_id=organisation_id, user_id=user_id
+        )
+
+    assert services.user_repository.call_counts["get_user_ids"] == 1, (
+        "User IDs were reloaded instead of being updated."
+    )
+
+
+def test_updating_the_cached_organisation_ids_in_place() -> None:
+    services = create_services()
+    services.organisation_service.warm_up_organisation_ids()
+
+    organisation_id = services.organisation_service.add_organisation(
+        name="Acme", email="acme@example.com", is_active=True
+    )
+    services.organisation_service.ensure_organisation_exists(organisation_id)
+
+    services.organisation_service.delete_organisation(organisation_id)
+    with pytest.raises(OrganisationNotFoundError):
+        services.organisation_service.ensure_organisation_exists(organisation_id)
+
+    assert services.organisation_repository.call_counts["get_organisation_ids"] == 1, (
+        "Organisation IDs were reloaded instead of being updated."
+    )
@@ -0,0 +1,104 @@
+import threading
+from uuid import UUID
+
+import pytest
+
+from repository_infrastructure_example.domain.organisation import Organisation
+from repository_infrastructure_example.domain.user import User
+from repository_infrastructure_example.services.warm_up import CacheWarmUpService
+from tests.test_services.fakes import ServiceFixture, create_services
+
+
+def _store_organisations(services: ServiceFixture, count: int) -> None:
+    # Stored in the repositories only, as if written before the cache started
+    for index in range(count):
+        organisation = Organisation.create_new(
+            name=f"Organisation {index}",
+            email=f"organisation-{index}@example.com",
+            is_active=True,
+        )
+        user = User.create_new(
+            organisation_id=organisation.id,
+            first_name="Ada",
+            last_name="Lovelace",
+            email="ada@example.com",
+            is_active=True,
+        )
+        services.organisation_repository.organisations[organisation.id] = organisation
+        services.user_repository.users[user.id] = user
+
+
+def _create_warm_up_service(services: ServiceFixture) -> CacheWarmUpService:
+    return CacheWarmUpService(
+        organisation_service=services.organisation_service,
+        user_service=services.user_service,
+        organisation_repository=services.organisation_repository,
+    )
+
+
+def test_preloading_the_ids_of_the_most_active_organisations() -> None:
+    services = create_services()
+    _store_organisations(services, 3)
+
+    report = _create_warm_up_service(services).warm_up(
+        organisation_limit=2, concurrency=2, time_budget=5
+    )
+
+    assert report.organisation_id_count == 3, "Organisation IDs were not preloaded."
+    assert report.user_id_set_count == 2, "User IDs were not preloaded."
+    assert report.failed_user_id_set_count == 0, "Preloads failed."
+    assert report.skipped_user_id_set_count == 0, "Preloads were skipped."
+
+    for user in list(services.user_repository.users.values())[:2]:
+        services.user_service.ensure_user_exists(
+            organisation_id=user.organisation_id, user_id=user.id
+        )
+    assert services.organisation_repository.call_counts["get_organisation_ids"] == 1, (
+        "Organisation IDs were loaded again after the warm-up."
+    )
+    assert services.user_repository.call_counts["get_user_ids"] == 2, (
+        "User IDs were loaded again after the warm-up."
+    )
+
+
+def test_counting_failed_preloads(monkeypatch: pytest.MonkeyPatch) -> None:
+    services = create_services()
+    _store_organisations(services, 2)
+
+    def get_user_ids(organisation_id: UUID) -> set[UUID]:
+        raise ConnectionError("Database is unavailable.")
+
+    monkeypatch.setattr(services.user_repository, "get_user_ids", get_user_ids)
+
+    report = _create_warm_up_service(services).warm_up(
+        organisation_limit=2, concurrency=2, time_budget=5
+    )
+
+    assert report.failed_user_id_set_count == 2, "Failed preloads were not counted."
+    assert report.user_id_set_count == 0, "Failed preloads were counted as done."
+
+
+def test_skipping_preloads_beyond_the_time_budget(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    services = create_services()
+    _store_organisations(services, 2)
+    released = threading.Event()
+    get_user_ids = services.user_repository.get_user_ids
+
+    def get_user_ids_slowly(organisation_id: UUID) -> set[UUID]:
+        released.wait(timeout=5)
+        return get_user_ids(organisation_id)
+
+    monkeypatch.setattr(services.user_repository, "get_user_ids", get_user_ids_slowly)
+
+    try:
+        report = _create_warm_up_service(services).warm_up(
+            organisation_limit=2, concurrency=1, time_budget=0.05
+        )
+    finally:
+        released.set()
+
+    assert report.organisation_id_count == 2, "Organisation IDs were not preloaded."
+    assert report.skipped_user_id_set_count == 2, "Slow preloads were not skipped."
+    assert report.user_id_set_count == 0, "Skipped preloads were counted as done."